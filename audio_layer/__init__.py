@@ -1,5 +1,12 @@
 """Audio Layer Package"""
 
 from .audio_manager import AudioManager
+from .ring_buffer import RingBuffer
+from .endpointer import Endpointer
+from .playback import PlaybackEngine
+from .barge_in import BargeInDetector, EchoReference
+from .speech_gate import SpeechGate
 
-__all__ = ['AudioManager']
+__all__ = ['AudioManager', 'RingBuffer', 'Endpointer',
+           'PlaybackEngine', 'BargeInDetector', 'EchoReference',
+           'SpeechGate']
@@ -7,8 +7,16 @@ import pyaudio
 import wave
 import numpy as np
 import logging
-from typing import Optional
-import yaml
+from typing import Callable, Iterable, Optional, Tuple
+
+from .ring_buffer import RingBuffer
+from .endpointer import Endpointer
+from .playback import PlaybackEngine
+from .barge_in import BargeInDetector, EchoReference
+from .speech_gate import SpeechGate
+from utils.boot_cache import BootCache
+from utils.config import load_config
+from utils.tracing import traced
 
 
 class AudioManager:
@@ -22,9 +30,8 @@ class AudioManager:
         import os
         os.environ['ALSA_CARD'] = 'default'
         
-        # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Shared configuration snapshot (parsed once for all components)
+        config = load_config(config_path)
         
         self.audio_config = config['audio']
         self.sample_rate = self.audio_config['sample_rate']
@@ -32,7 +39,30 @@ class AudioManager:
         self.chunk_size = self.audio_config['chunk_size']
         self.card_index = self.audio_config['card_index']
         self.silence_threshold = self.audio_config['silence_threshold']
-        self.silence_duration = self.audio_config['silence_duration']
+        
+        # Format of the most recent recording (fallback streams may differ
+        # from the configured rate/channels)
+        self.last_record_rate = self.sample_rate
+        self.last_record_channels = self.channels
+        # (start, end) of the detected utterance within the chunks passed to
+        # on_chunk, in samples per channel (None when nothing was trimmed)
+        self.last_utterance_bounds: Optional[Tuple[int, int]] = None
+        
+        # Persistent capture stream (see start_capture)
+        self.persistent_capture = self.audio_config.get('persistent_capture', False)
+        self.ring_buffer_seconds = self.audio_config.get('ring_buffer_seconds', 10.0)
+        self.preroll_seconds = self.audio_config.get('preroll_seconds', 0.3)
+        self.capture_stream = None
+        self.ring_buffer: Optional[RingBuffer] = None
+        self.capture_rate = self.sample_rate
+        self.capture_channels = self.channels
+        self.capture_overflows = 0
+        
+        # Utterance endpointer, created for the stream format in use
+        self.endpointer: Optional[Endpointer] = None
+        
+        # Pre-STT check for speech in recorded windows
+        self.speech_gate: Optional[SpeechGate] = SpeechGate.from_config(self.audio_config)
         
         # Redirect ALSA errors to /dev/null
         try:
@@ -46,13 +76,57 @@ class AudioManager:
         except:
             pass  # If suppression fails, continue anyway
         
+        self.boot_cache = BootCache.from_config(config)
         self.audio = pyaudio.PyAudio()
         self.device_index = self._find_usb_device()
         
         if self.device_index is None:
             self.logger.warning(f"USB device Card {self.card_index} not found, using default device")
+        
+        # Persistent output stream for in-memory playback
+        self.playback: Optional[PlaybackEngine] = None
+        if self.audio_config.get('playback_engine', False):
+            self._open_playback_engine()
+    
+    def _open_playback_engine(self):
+        """Open the persistent output stream (falls back to aplay on failure)"""
+        for device_index in (self.device_index, None):
+            try:
+                engine = PlaybackEngine(self.audio, device_index=device_index,
+                                        chunk_size=self.chunk_size)
+                engine.open()
+                self.playback = engine
+                return
+            except Exception as e:
+                self.logger.warning(f"Failed to open playback engine on device {device_index}: {e}")
+        
+        self.logger.error("Playback engine unavailable, falling back to aplay")
     
     def _find_usb_device(self) -> Optional[int]:
+        """Find the USB audio device, reusing the last boot's result if still valid"""
+        cached = self.boot_cache.get('audio_device')
+        if cached and cached.get('card_index') == self.card_index:
+            try:
+                device_info = self.audio.get_device_info_by_index(cached['index'])
+                if (device_info.get('name') == cached.get('name') and
+                        (device_info.get('maxInputChannels', 0) > 0 or
+                         device_info.get('maxOutputChannels', 0) > 0)):
+                    self.logger.info(f"Using cached audio device: {cached['name']} at index {cached['index']}")
+                    return cached['index']
+            except Exception as e:
+                self.logger.debug(f"Cached audio device is stale: {e}")
+        
+        device_index = self._scan_for_usb_device()
+        if device_index is not None:
+            device_info = self.audio.get_device_info_by_index(device_index)
+            self.boot_cache.set('audio_device', {
+                'card_index': self.card_index,
+                'index': device_index,
+                'name': device_info.get('name', '')
+            })
+        return device_index
+    
+    def _scan_for_usb_device(self) -> Optional[int]:
         """Find the USB audio device by card index"""
         device_count = self.audio.get_device_count()
         
@@ -96,19 +170,183 @@ class AudioManager:
                            f"Inputs: {device_info['maxInputChannels']}, "
                            f"Outputs: {device_info['maxOutputChannels']}")
     
+    def start_capture(self) -> bool:
+        """
+        Open a persistent, callback-driven capture stream
+        
+        Audio is written continuously into a preallocated ring buffer, so
+        recordings start without device-open latency and can include
+        speech from just before record_audio() was called.
+        
+        Returns:
+            True if the capture stream is running
+        """
+        if self.capture_stream is not None:
+            return True
+        
+        attempts = [
+            (self.channels, self.sample_rate, self.device_index),
+            (self.channels, self.sample_rate, None),  # Default device
+        ]
+        
+        for channels, rate, device_index in attempts:
+            try:
+                self.ring_buffer = RingBuffer(int(self.ring_buffer_seconds * rate * channels))
+                self.capture_stream = self.audio.open(
+                    format=pyaudio.paInt16,
+                    channels=channels,
+                    rate=rate,
+                    input=True,
+                    input_device_index=device_index,
+                    frames_per_buffer=self.chunk_size,
+                    stream_callback=self._capture_callback
+                )
+                self.capture_stream.start_stream()
+                self.capture_rate = rate
+                self.capture_channels = channels
+                self.logger.info(f"✓ Persistent capture started "
+                                 f"({self.ring_buffer_seconds:.0f}s ring buffer)")
+                return True
+            except Exception as e:
+                self.logger.warning(f"Failed to open capture stream on device {device_index}: {e}")
+                self.capture_stream = None
+        
+        self.ring_buffer = None
+        self.logger.error("Persistent capture unavailable, falling back to per-turn streams")
+        return False
+    
+    def stop_capture(self):
+        """Close the persistent capture stream"""
+        if self.capture_stream is None:
+            return
+        
+        try:
+            self.capture_stream.stop_stream()
+            self.capture_stream.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing capture stream: {e}")
+        
+        self.capture_stream = None
+        self.logger.info("Persistent capture stopped")
+    
+    def calibrate_speech_gate(self, seconds: float = 1.5) -> bool:
+        """
+        Calibrate the speech gate on the latest captured audio
+        
+        Call while nobody is expected to talk (e.g. before the startup
+        message); needs the persistent capture stream.
+        
+        Returns:
+            True if the gate was calibrated
+        """
+        if self.speech_gate is None or not self.is_capturing():
+            return False
+        ambient = self.get_recent_audio(seconds)
+        self.speech_gate.calibrate(ambient, self.capture_rate, self.capture_channels)
+        return self.speech_gate.calibrated
+    
+    @traced('speech_gate')
+    def has_speech(self, audio_data: bytes) -> bool:
+        """
+        Check whether the latest recording is worth transcribing
+        
+        Args:
+            audio_data: Audio returned by record_audio()
+        
+        Returns:
+            False for empty or noise-only audio (always True without a gate)
+        """
+        if not audio_data:
+            return False
+        if self.speech_gate is None:
+            return True
+        return self.speech_gate.accept(np.frombuffer(audio_data, dtype=np.int16),
+                                       self.last_record_rate, self.last_record_channels)
+    
+    def create_barge_in_detector(self) -> Optional[BargeInDetector]:
+        """
+        Build a detector for user speech over Pluto's own playback
+        
+        Needs the persistent capture stream (to listen while playing) and
+        the playback engine (to know what is being played and to stop it).
+        
+        Returns:
+            The detector, or None if either is unavailable
+        """
+        if not self.is_capturing() or self.playback is None:
+            return None
+        
+        if self.playback.echo_reference is None:
+            frame_ms = (self.audio_config.get('endpointing', {}) or {}).get('frame_ms', 20)
+            self.playback.echo_reference = EchoReference(frame_ms)
+        
+        endpointer = self._get_endpointer(self.capture_rate, self.capture_channels)
+        return BargeInDetector.from_config(self.audio_config, endpointer,
+                                           self.playback.echo_reference)
+    
+    def stop_playback(self):
+        """Cut off everything playing or queued on the playback engine"""
+        if self.playback is not None:
+            self.playback.stop()
+    
+    def is_capturing(self) -> bool:
+        """Check whether the persistent capture stream is running"""
+        return self.capture_stream is not None and self.capture_stream.is_active()
+    
+    def _capture_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: copy the new chunk into the ring buffer"""
+        if status & pyaudio.paInputOverflow:
+            self.capture_overflows += 1
+        self.ring_buffer.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, pyaudio.paContinue)
+    
+    def get_recent_audio(self, seconds: float) -> np.ndarray:
+        """
+        Get the last `seconds` of captured audio
+        
+        Args:
+            seconds: Amount of audio wanted
+        
+        Returns:
+            Read-only int16 view into the ring buffer (no copy). Copy it if
+            it must outlive the ring buffer's capacity.
+        """
+        if self.ring_buffer is None:
+            return np.zeros(0, dtype=np.int16)
+        
+        num_samples = int(seconds * self.capture_rate * self.capture_channels)
+        return self.ring_buffer.latest(num_samples)
+    
+    @traced('record_audio')
     def record_audio(self, duration: Optional[float] = None, 
-                     stop_on_silence: bool = True) -> bytes:
+                     stop_on_silence: bool = True,
+                     on_chunk: Optional[Callable[[np.ndarray], None]] = None,
+                     start_position: Optional[int] = None,
+                     on_speech_start: Optional[Callable[[int], None]] = None) -> bytes:
         """
         Record audio from the microphone
         
         Args:
             duration: Recording duration in seconds (None for voice-activated)
             stop_on_silence: Stop recording after detecting silence
+            on_chunk: Called with each int16 chunk as it is captured
+                      (e.g. to feed a streaming transcriber)
+            start_position: Ring buffer position to start from (persistent
+                            capture only), e.g. where a barge-in began
+            on_speech_start: Called once the endpointer detects speech, with
+                             the utterance start (pre-roll included) in
+                             samples per channel of the on_chunk audio
         
         Returns:
             Raw audio data as bytes
         """
+        if self.is_capturing():
+            return self._record_from_ring(duration, on_chunk, start_position,
+                                          on_speech_start)
+        
         frames = []
+        self.last_record_rate = self.sample_rate
+        self.last_record_channels = self.channels
         
         # Open stream with error handling
         try:
@@ -134,6 +372,7 @@ class AudioManager:
                     input_device_index=self.device_index,
                     frames_per_buffer=self.chunk_size
                 )
+                self.last_record_channels = 2
                 self.logger.info("✓ Recording with stereo")
             except Exception as e2:
                 self.logger.error(f"Stereo also failed: {e2}")
@@ -145,75 +384,207 @@ class AudioManager:
                     input=True,
                     frames_per_buffer=self.chunk_size
                 )
+                self.last_record_rate = 44100
+                self.last_record_channels = 1
+        
+        def read_chunk() -> np.ndarray:
+            data = stream.read(self.chunk_size, exception_on_overflow=False)
+            frames.append(data)
+            return np.frombuffer(data, dtype=np.int16)
+        
+        self.logger.info("Recording started...")
+        bounds = self._run_recording(read_chunk, duration,
+                                     self.last_record_rate, self.last_record_channels,
+                                     on_chunk, on_speech_start)
+        self.last_utterance_bounds = bounds
+        
+        stream.stop_stream()
+        stream.close()
+        
+        self.logger.info("Recording stopped")
+        
+        audio_data = b''.join(frames)
+        if bounds is not None:
+            frame_bytes = 2 * self.last_record_channels
+            audio_data = audio_data[bounds[0] * frame_bytes:bounds[1] * frame_bytes]
+        
+        return audio_data
+    
+    def _record_from_ring(self, duration: Optional[float],
+                          on_chunk: Optional[Callable[[np.ndarray], None]] = None,
+                          start_position: Optional[int] = None,
+                          on_speech_start: Optional[Callable[[int], None]] = None) -> bytes:
+        """Record from the persistent capture stream's ring buffer"""
+        ring = self.ring_buffer
+        chunk_samples = self.chunk_size * self.capture_channels
+        preroll = int(self.preroll_seconds * self.capture_rate) * self.capture_channels
+        
+        # Start slightly in the past so speech that began before the
+        # prompt is not clipped
+        if start_position is None:
+            start_position = ring.total_written
+        start = max(0, start_position - preroll, ring.total_written - ring.capacity)
+        position = start
+        
+        def read_chunk() -> np.ndarray:
+            nonlocal position
+            if not ring.wait_for(position + chunk_samples, timeout=2.0):
+                raise IOError("Capture stream stalled")
+            chunk = ring.segment(position, position + chunk_samples)
+            position += chunk_samples
+            return chunk
+        
+        self.last_record_rate = self.capture_rate
+        self.last_record_channels = self.capture_channels
         
         self.logger.info("Recording started...")
+        bounds = self._run_recording(read_chunk, duration,
+                                     self.capture_rate, self.capture_channels,
+                                     on_chunk, on_speech_start)
+        self.last_utterance_bounds = bounds
+        self.logger.info("Recording stopped")
+        
+        end = position
+        if bounds is not None:
+            start, end = (start + bounds[0] * self.capture_channels,
+                          start + bounds[1] * self.capture_channels)
+        
+        return ring.segment(start, end).tobytes()
+    
+    def _run_recording(self, read_chunk: Callable[[], np.ndarray],
+                       duration: Optional[float], rate: int, channels: int,
+                       on_chunk: Optional[Callable[[np.ndarray], None]] = None,
+                       on_speech_start: Optional[Callable[[int], None]] = None
+                       ) -> Optional[Tuple[int, int]]:
+        """
+        Pull chunks until the recording should stop
+        
+        Args:
+            read_chunk: Returns the next int16 chunk of audio
+            duration: Fixed duration in seconds (None for voice-activated)
+            rate: Sample rate of the chunks
+            channels: Channel count of the chunks
+            on_chunk: Called with each chunk after it is read
+            on_speech_start: Called once with the utterance start offset
+                             when the endpointer detects speech
+        
+        Returns:
+            (start, end) sample offsets per channel of the detected
+            utterance, or None to keep everything that was read
+        """
+        if on_chunk:
+            read_raw = read_chunk
+            
+            def read_chunk() -> np.ndarray:
+                chunk = read_raw()
+                on_chunk(chunk)
+                return chunk
         
         if duration:
             # Fixed duration recording
-            num_chunks = int(self.sample_rate / self.chunk_size * duration)
+            num_chunks = int(rate / self.chunk_size * duration)
             for _ in range(num_chunks):
-                data = stream.read(self.chunk_size, exception_on_overflow=False)
-                frames.append(data)
-        else:
-            # Voice-activated recording with silence detection
-            silence_chunks = 0
-            max_silence_chunks = int(self.silence_duration * self.sample_rate / self.chunk_size)
-            speech_detected = False
-            min_speech_chunks = 5  # Minimum chunks before checking for silence
-            
-            self.logger.info("Listening for speech...")
-            
-            while True:
-                data = stream.read(self.chunk_size, exception_on_overflow=False)
-                frames.append(data)
-                
-                # Check audio level
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                amplitude = np.abs(audio_data).mean()
-                
-                # Debug: show audio level every 10 chunks
-                if len(frames) % 10 == 0:
-                    self.logger.debug(f"Audio level: {amplitude:.0f} (threshold: {self.silence_threshold})")
-                
-                # Detect speech
-                if amplitude > self.silence_threshold:
-                    speech_detected = True
-                    silence_chunks = 0
-                    if len(frames) == 1:
-                        self.logger.info("Speech detected!")
-                elif speech_detected and len(frames) > min_speech_chunks:
-                    # Only count silence after speech has been detected
-                    silence_chunks += 1
-                    if silence_chunks >= max_silence_chunks:
-                        self.logger.info("Silence detected, stopping recording")
-                        break
-                
-                # Safety limit: max 4.5 seconds
-                if len(frames) > self.sample_rate / self.chunk_size * 4.5:
-                    self.logger.info("Maximum recording time (4.5s) reached")
-                    break
+                read_chunk()
+            return None
         
-        stream.stop_stream()
-        stream.close()
+        # Voice-activated recording with adaptive endpointing
+        endpointer = self._get_endpointer(rate, channels)
+        endpointer.reset()
         
-        self.logger.info("Recording stopped")
+        self.logger.info("Listening for speech...")
         
-        return b''.join(frames)
+        while not endpointer.done:
+            endpointer.process(read_chunk())
+            if on_speech_start and endpointer.speech_detected:
+                on_speech_start(endpointer.utterance_bounds()[0])
+                on_speech_start = None
+        
+        bounds = endpointer.utterance_bounds()
+        if bounds is None:
+            self.logger.info("No speech detected")
+            return (0, 0)
+        
+        if endpointer.end_reason == 'max_length':
+            self.logger.info("Maximum utterance length reached")
+        else:
+            self.logger.info("Silence detected, stopping recording")
+        
+        return bounds
+    
+    def _get_endpointer(self, rate: int, channels: int) -> Endpointer:
+        """Get the endpointer for this stream format (keeps the noise floor)"""
+        endpointer = self.endpointer
+        if endpointer is None or endpointer.sample_rate != rate or endpointer.channels != channels:
+            endpointer = Endpointer.from_config(self.audio_config, rate, channels)
+            self.endpointer = endpointer
+        return endpointer
     
-    def save_audio(self, audio_data: bytes, filepath: str):
-        """Save audio data to WAV file"""
+    @traced('save_audio')
+    def save_audio(self, audio_data: bytes, filepath: str,
+                   rate: Optional[int] = None, channels: Optional[int] = None):
+        """
+        Save audio data to WAV file
+        
+        Args:
+            audio_data: Raw int16 PCM
+            filepath: WAV file to write
+            rate: Sample rate of the PCM (default: that of the last recording)
+            channels: Channel count of the PCM (default: that of the last recording)
+        """
         with wave.open(filepath, 'wb') as wf:
-            wf.setnchannels(self.channels)
+            wf.setnchannels(channels or self.last_record_channels)
             wf.setsampwidth(self.audio.get_sample_size(pyaudio.paInt16))
-            wf.setframerate(self.sample_rate)
+            wf.setframerate(rate or self.last_record_rate)
             wf.writeframes(audio_data)
         
         self.logger.info(f"Audio saved to {filepath}")
     
+    @traced('play_audio')
+    def play_pcm(self, pcm, sample_rate: int, channels: int = 1,
+                 wait: bool = True) -> bool:
+        """
+        Play int16 PCM from memory
+        
+        Args:
+            pcm: Raw int16 PCM bytes or NumPy array
+            sample_rate: Sample rate of the PCM
+            channels: Channel count of the PCM
+            wait: Block until playback has finished at the speaker
+        
+        Returns:
+            True if playback was queued (and, with wait, completed)
+        """
+        if self.playback is None:
+            if not isinstance(pcm, (bytes, bytearray)):
+                pcm = np.asarray(pcm, dtype=np.int16).tobytes()
+            return self.play_pcm_stream([pcm], sample_rate, channels)
+        
+        handle = self.playback.play(pcm, sample_rate, channels)
+        if wait:
+            handle.wait()
+            return not handle.cancelled
+        return True
+    
+    @traced('play_audio')
     def play_audio(self, filepath: str):
         """Play audio file through speakers"""
         import subprocess
         
+        # Play from memory through the persistent output stream
+        if self.playback is not None:
+            try:
+                with wave.open(filepath, 'rb') as wf:
+                    if wf.getsampwidth() != 2:
+                        raise ValueError(f"unsupported sample width {wf.getsampwidth()}")
+                    pcm = wf.readframes(wf.getnframes())
+                    rate, channels = wf.getframerate(), wf.getnchannels()
+                self.logger.info(f"Playing audio from memory: {filepath}")
+                self.play_pcm(pcm, rate, channels)
+                self.logger.info("Playback finished")
+                return
+            except Exception as e:
+                self.logger.warning(f"In-memory playback failed: {e}")
+        
         # Try using aplay with explicit device
         try:
             self.logger.info(f"Playing audio with aplay on Card {self.card_index}: {filepath}")
@@ -288,7 +659,101 @@ class AudioManager:
         except Exception as e:
             self.logger.error(f"Error playing audio: {e}")
     
+    @traced('play_audio')
+    def play_pcm_stream(self, chunks: Iterable[bytes], sample_rate: int,
+                        channels: int = 1) -> bool:
+        """
+        Play raw int16 PCM as it is produced
+        
+        Playback starts with the first chunk, so streamed TTS output is
+        heard while later audio is still being synthesized.
+        
+        Args:
+            chunks: Iterable of raw PCM byte chunks
+            sample_rate: Sample rate of the PCM
+            channels: Channel count of the PCM
+        
+        Returns:
+            True if playback completed
+        """
+        import subprocess
+        
+        chunks = iter(chunks)
+        
+        if self.playback is not None:
+            handle = self.playback.begin(sample_rate, channels)
+            try:
+                for chunk in chunks:
+                    if handle.cancelled:
+                        break
+                    handle.write(chunk)
+            finally:
+                handle.finish()
+            handle.wait()
+            self.logger.info("Playback finished")
+            return not handle.cancelled
+        
+        cmd = ['aplay', '-q', '-D', f'plughw:{self.card_index},0',
+               '-t', 'raw', '-f', 'S16_LE', '-c', str(channels), '-r', str(sample_rate)]
+        
+        try:
+            self.logger.info(f"Streaming audio with aplay on Card {self.card_index}")
+            player = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        except Exception as e:
+            self.logger.warning(f"aplay not available: {e}")
+            return self._play_pcm_pyaudio(chunks, sample_rate, channels)
+        
+        try:
+            for chunk in chunks:
+                player.stdin.write(chunk)
+            player.stdin.close()
+            player.wait(timeout=30)
+        except (BrokenPipeError, OSError) as e:
+            error = player.stderr.read().decode(errors='replace') if player.stderr else ''
+            self.logger.warning(f"aplay stream failed: {error or e}")
+            player.kill()
+            return self._play_pcm_pyaudio(chunks, sample_rate, channels)
+        except BaseException:
+            player.kill()
+            raise
+        
+        if player.returncode != 0:
+            self.logger.warning(f"aplay exited with code {player.returncode}")
+            return False
+        
+        self.logger.info("Playback finished")
+        return True
+    
+    def _play_pcm_pyaudio(self, chunks: Iterable[bytes], sample_rate: int,
+                          channels: int) -> bool:
+        """Play the remaining PCM chunks through a PyAudio output stream"""
+        try:
+            try:
+                stream = self.audio.open(format=pyaudio.paInt16, channels=channels,
+                                         rate=sample_rate, output=True,
+                                         output_device_index=self.device_index)
+            except Exception as e:
+                self.logger.warning(f"Failed to open output stream with device index: {e}")
+                stream = self.audio.open(format=pyaudio.paInt16, channels=channels,
+                                         rate=sample_rate, output=True)
+            
+            for chunk in chunks:
+                stream.write(chunk)
+            
+            stream.stop_stream()
+            stream.close()
+            self.logger.info("Playback finished")
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Error playing audio: {e}")
+            return False
+    
     def cleanup(self):
         """Clean up audio resources"""
+        self.stop_capture()
+        if self.playback is not None:
+            self.playback.close()
+            self.playback = None
         self.audio.terminate()
         self.logger.info("Audio manager cleaned up")
@@ -0,0 +1,185 @@
+"""
+Barge-In Detection
+Spots the user talking over Pluto, with echo suppression from the known output
+"""
+
+import time
+import logging
+import threading
+import numpy as np
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+# Level reported for silence and for times with no reference audio
+SILENCE_DB = -120.0
+
+
+class EchoReference:
+    """
+    Recent levels of the audio sent to the speaker
+    
+    The playback engine reports every block just before writing it, and
+    each analysis frame is stamped with the monotonic time it should be
+    heard (now plus the device's output latency). The microphone picks
+    that audio back up as echo; level_between() says how loud the output
+    was around a given capture time.
+    """
+    
+    def __init__(self, frame_ms: float = 20, history_s: float = 5.0):
+        self.frame_s = frame_ms / 1000
+        self.history_s = history_s
+        self._levels: Deque[Tuple[float, float]] = deque()
+        self._lock = threading.Lock()
+    
+    def add(self, frames: np.ndarray, rate: int, latency: float = 0.0):
+        """
+        Record a block about to be written to the output stream
+        
+        Args:
+            frames: (frames, channels) int16 block at the device format
+            rate: Output sample rate
+            latency: Output latency of the device, in seconds
+        """
+        mono = frames.astype(np.float32).mean(axis=1) / 32768.0
+        frame_len = max(1, int(rate * self.frame_s))
+        count = len(mono) // frame_len
+        if count == 0:
+            return
+        
+        power = np.mean(mono[:count * frame_len].reshape(count, frame_len) ** 2, axis=1)
+        levels = 10.0 * np.log10(power + 1e-12)
+        heard_at = time.monotonic() + latency
+        
+        with self._lock:
+            for i, level in enumerate(levels):
+                self._levels.append((heard_at + i * self.frame_s, float(level)))
+            while self._levels and self._levels[0][0] < heard_at - self.history_s:
+                self._levels.popleft()
+    
+    def level_between(self, start: float, end: float) -> float:
+        """Loudest output level (dBFS) heard between two monotonic times"""
+        with self._lock:
+            levels = [level for t, level in self._levels if start <= t <= end]
+        return max(levels, default=SILENCE_DB)
+    
+    def clear(self):
+        with self._lock:
+            self._levels.clear()
+
+
+class BargeInDetector:
+    """
+    Detects user speech in the capture stream while Pluto is talking
+    
+    A frame is user speech when it is `margin_db` above the endpointer's
+    noise floor and also `margin_db` above the echo it could be: the
+    loudest output level within `echo_tail_ms` of the frame plus the
+    speaker-to-microphone coupling. The coupling starts at a
+    conservative `echo_coupling_db` and is learned from frames that are
+    audible but not speech, so it follows the room and volume setting.
+    Barge-in fires after `onset_ms` of consecutive user speech.
+    """
+    
+    def __init__(self, endpointer, echo: EchoReference, onset_ms: float = 200,
+                 margin_db: float = 6.0, echo_tail_ms: float = 200,
+                 echo_coupling_db: float = 0.0, coupling_adapt_rate: float = 0.05):
+        """
+        Initialize detector
+        
+        Args:
+            endpointer: Endpointer for the capture format (framing and
+                        noise floor are shared with it)
+            echo: Reference fed by the playback engine
+            onset_ms: Consecutive user speech needed to barge in
+            margin_db: Level above noise floor and expected echo that
+                       counts as user speech
+            echo_tail_ms: How long after (and before) output audio the
+                          echo may arrive, for latency error and reverb
+            echo_coupling_db: Starting speaker-to-microphone gain estimate
+            coupling_adapt_rate: Coupling smoothing factor per frame
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.endpointer = endpointer
+        self.echo = echo
+        self.margin_db = margin_db
+        self.echo_tail_s = echo_tail_ms / 1000
+        self.coupling_db = echo_coupling_db
+        self.coupling_adapt_rate = coupling_adapt_rate
+        
+        self.frame_len = endpointer.frame_len
+        self.frame_s = self.frame_len / endpointer.sample_rate
+        self.onset_frames = max(1, int(round(onset_ms / 1000 / self.frame_s)))
+        self.reset(0)
+    
+    @classmethod
+    def from_config(cls, audio_config: dict, endpointer,
+                    echo: EchoReference) -> 'BargeInDetector':
+        """Build a detector from the `audio.barge_in` config section"""
+        options = dict(audio_config.get('barge_in', {}) or {})
+        options.pop('enabled', None)
+        return cls(endpointer, echo, **options)
+    
+    def reset(self, position: int):
+        """
+        Start watching from an absolute capture position
+        
+        Args:
+            position: Ring buffer position (interleaved samples)
+        """
+        self.position = position
+        self._speech_run = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+    
+    def process(self, chunk: np.ndarray, captured_at: float) -> Optional[int]:
+        """
+        Feed the capture audio that followed the previous chunk
+        
+        Args:
+            chunk: Interleaved int16 samples
+            captured_at: Monotonic time the chunk's last sample was captured
+        
+        Returns:
+            Ring buffer position where the interrupting speech started, or
+            None if the user has not barged in
+        """
+        channels = self.endpointer.channels
+        samples = np.asarray(chunk, dtype=np.float32) / 32768.0
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels]
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        
+        start = self.position - len(self._pending) * channels
+        self.position += len(chunk)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        
+        levels = self.endpointer.frame_levels(samples)
+        self._pending = samples[len(levels) * self.frame_len:]
+        
+        # Time the end of each frame was captured
+        frame_ends = self.frame_len * np.arange(1, len(levels) + 1)
+        end_times = captured_at - (len(samples) - frame_ends) / self.endpointer.sample_rate
+        
+        for i, (level, t) in enumerate(zip(levels, end_times)):
+            reference = self.echo.level_between(t - self.frame_s - self.echo_tail_s,
+                                                t + self.echo_tail_s)
+            expected = reference + self.coupling_db
+            above_noise = level > self.endpointer.noise_db + self.margin_db
+            above_echo = level > expected + self.margin_db
+            
+            if above_noise and above_echo:
+                self._speech_run += 1
+                if self._speech_run >= self.onset_frames:
+                    onset = i - self.onset_frames + 1
+                    self.logger.info(f"Barge-in: {level:.1f} dBFS over expected echo "
+                                     f"{expected:.1f} dBFS")
+                    return start + onset * self.frame_len * channels
+                continue
+            
+            self._speech_run = 0
+            if above_noise and reference > SILENCE_DB + 1:
+                # Audible echo only: learn how loud the output comes back
+                self.coupling_db += self.coupling_adapt_rate * ((level - reference) - self.coupling_db)
+        
+        return None
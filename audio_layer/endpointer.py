@@ -0,0 +1,218 @@
+"""
+Voice Activity Endpointer
+Decides when an utterance starts and ends from frame energy
+"""
+
+import logging
+import numpy as np
+from typing import Optional
+
+
+class Endpointer:
+    """
+    Energy-based utterance endpointer with an adaptive noise floor
+    
+    Audio is cut into short frames whose RMS level (dBFS) is computed in
+    one vectorized pass per chunk. A frame counts as speech when it is
+    `margin_db` above the running noise-floor estimate and above the
+    absolute `min_speech_db` floor. The utterance starts after `onset_ms`
+    of consecutive speech and ends once `hangover_ms` of non-speech follows
+    it, subject to the min/max utterance lengths.
+    
+    Sample offsets are counted per channel from the first sample fed.
+    """
+    
+    WAITING = 'waiting'
+    SPEECH = 'speech'
+    DONE = 'done'
+    
+    def __init__(self, sample_rate: int, channels: int = 1,
+                 frame_ms: float = 20, margin_db: float = 9.0,
+                 min_speech_db: float = -60.0, initial_noise_db: float = -70.0,
+                 noise_adapt_rate: float = 0.05, calibration_ms: float = 200,
+                 onset_ms: float = 60,
+                 hangover_ms: float = 400, preroll_ms: float = 300,
+                 min_utterance_ms: float = 300, max_utterance_s: float = 6.0,
+                 max_wait_s: Optional[float] = 6.0):
+        """
+        Initialize endpointer
+        
+        Args:
+            sample_rate: Sample rate of the audio fed in
+            channels: Number of interleaved channels (downmixed internally)
+            frame_ms: Analysis frame length
+            margin_db: Level above the noise floor that counts as speech
+            min_speech_db: Absolute level below which nothing is speech
+            initial_noise_db: Starting noise-floor estimate
+            noise_adapt_rate: Noise-floor smoothing factor per frame
+            calibration_ms: Audio used to seed the noise floor on first use
+            onset_ms: Consecutive speech needed to start an utterance
+            hangover_ms: Trailing non-speech that ends an utterance
+            preroll_ms: Audio kept before the detected onset
+            min_utterance_ms: Utterances shorter than this keep listening
+            max_utterance_s: Hard cap on utterance length
+            max_wait_s: Give up if no speech starts within this time
+                        (None waits forever)
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.initial_noise_db = initial_noise_db
+        self.noise_adapt_rate = noise_adapt_rate
+        self.calibration_frames = self._ms_to_frames(calibration_ms)
+        self._calibration_levels = []
+        self.noise_db = initial_noise_db
+        
+        self.onset_frames = max(1, self._ms_to_frames(onset_ms))
+        self.hangover_frames = max(1, self._ms_to_frames(hangover_ms))
+        self.preroll_samples = int(sample_rate * preroll_ms / 1000)
+        self.min_utterance_frames = self._ms_to_frames(min_utterance_ms)
+        self.max_utterance_frames = self._ms_to_frames(max_utterance_s * 1000)
+        self.max_wait_frames = (self._ms_to_frames(max_wait_s * 1000)
+                                if max_wait_s else None)
+        
+        self.reset()
+    
+    @classmethod
+    def from_config(cls, audio_config: dict, sample_rate: int,
+                    channels: int = 1) -> 'Endpointer':
+        """Build an endpointer from the `audio` config section"""
+        options = dict(audio_config.get('endpointing', {}) or {})
+        
+        # The legacy amplitude threshold doubles as the absolute speech floor
+        if 'min_speech_db' not in options and audio_config.get('silence_threshold'):
+            options['min_speech_db'] = 20 * np.log10(audio_config['silence_threshold'] / 32768.0)
+        
+        return cls(sample_rate, channels=channels, **options)
+    
+    def _ms_to_frames(self, ms: float) -> int:
+        return int(round(ms / 1000 * self.sample_rate / self.frame_len))
+    
+    def reset(self):
+        """Prepare for a new utterance (the noise floor is kept)"""
+        self.state = self.WAITING
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._frames_seen = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._onset_frame: Optional[int] = None
+        self._last_speech_frame: Optional[int] = None
+        self.end_reason: Optional[str] = None
+    
+    @property
+    def done(self) -> bool:
+        return self.state == self.DONE
+    
+    @property
+    def speech_detected(self) -> bool:
+        return self._onset_frame is not None
+    
+    def frame_levels(self, samples: np.ndarray) -> np.ndarray:
+        """Vectorized per-frame RMS level in dBFS for complete frames"""
+        usable = len(samples) - len(samples) % self.frame_len
+        if usable == 0:
+            return np.zeros(0, dtype=np.float32)
+        frames = samples[:usable].reshape(-1, self.frame_len)
+        power = np.mean(frames * frames, axis=1)
+        return 10.0 * np.log10(power + 1e-10)
+    
+    def process(self, chunk: np.ndarray) -> str:
+        """
+        Feed the next chunk of int16 audio
+        
+        Args:
+            chunk: Interleaved int16 samples
+        
+        Returns:
+            Current state (WAITING, SPEECH or DONE)
+        """
+        if self.state == self.DONE:
+            return self.state
+        
+        samples = np.asarray(chunk, dtype=np.float32) / 32768.0
+        if self.channels > 1:
+            usable = len(samples) - len(samples) % self.channels
+            samples = samples[:usable].reshape(-1, self.channels).mean(axis=1)
+        
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        
+        levels = self.frame_levels(samples)
+        self._pending = samples[len(levels) * self.frame_len:]
+        
+        for level in levels:
+            self._step(float(level))
+            if self.state == self.DONE:
+                break
+        
+        return self.state
+    
+    def _step(self, level: float):
+        """Advance the state machine by one frame"""
+        frame = self._frames_seen
+        self._frames_seen += 1
+        
+        # Seed the noise floor from the quietest part of the first frames
+        if len(self._calibration_levels) < self.calibration_frames:
+            self._calibration_levels.append(level)
+            if len(self._calibration_levels) == self.calibration_frames:
+                self.noise_db = float(np.percentile(self._calibration_levels, 20))
+                self.logger.debug(f"Noise floor calibrated: {self.noise_db:.1f} dBFS")
+            return
+        
+        is_speech = (level > self.noise_db + self.margin_db
+                     and level > self.min_speech_db)
+        
+        if not is_speech:
+            # Track the noise floor: fall quickly, rise slowly
+            rate = 0.5 if level < self.noise_db else self.noise_adapt_rate
+            self.noise_db += rate * (level - self.noise_db)
+        
+        if self.state == self.WAITING:
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+            if self._speech_run >= self.onset_frames:
+                self.state = self.SPEECH
+                self._onset_frame = frame - self.onset_frames + 1
+                self._last_speech_frame = frame
+                self._silence_run = 0
+                self.logger.info("Speech detected!")
+            elif self.max_wait_frames and frame + 1 >= self.max_wait_frames:
+                self._finish('no_speech')
+            return
+        
+        # In speech
+        if is_speech:
+            self._silence_run = 0
+            self._last_speech_frame = frame
+        else:
+            self._silence_run += 1
+        
+        length = frame - self._onset_frame + 1
+        if length >= self.max_utterance_frames:
+            self._finish('max_length')
+        elif (self._silence_run >= self.hangover_frames
+              and length - self._silence_run >= self.min_utterance_frames):
+            self._finish('silence')
+    
+    def _finish(self, reason: str):
+        self.state = self.DONE
+        self.end_reason = reason
+        self.logger.debug(f"Endpoint: {reason} (noise floor {self.noise_db:.1f} dBFS)")
+    
+    def utterance_bounds(self) -> Optional[tuple]:
+        """
+        Get the utterance's sample range, including pre-roll and hangover
+        
+        Returns:
+            (start, end) offsets per channel, or None if no speech was found
+        """
+        if self._onset_frame is None:
+            return None
+        
+        start = max(0, self._onset_frame * self.frame_len - self.preroll_samples)
+        end = self._frames_seen * self.frame_len
+        return start, end
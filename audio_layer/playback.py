@@ -0,0 +1,281 @@
+"""
+Playback Engine
+Persistent output stream that plays PCM buffers from memory
+"""
+
+import queue
+import logging
+import threading
+import numpy as np
+import pyaudio
+from typing import Optional, Union
+
+
+class LinearResampler:
+    """Stateful linear-interpolation resampler for chunked int16 audio"""
+    
+    def __init__(self, in_rate: int, out_rate: int):
+        self.step = in_rate / out_rate
+        self._prev: Optional[np.ndarray] = None
+        self._pos = 1.0  # Next output position; index 0 is the previous sample
+    
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resample the next chunk
+        
+        Args:
+            samples: (frames, channels) float32 array
+        
+        Returns:
+            Resampled (frames, channels) float32 array
+        """
+        if self.step == 1.0 or len(samples) == 0:
+            return samples
+        
+        if self._prev is None:
+            self._prev = samples[:1]
+        x = np.concatenate((self._prev, samples))
+        last = len(x) - 1
+        
+        if self._pos > last:
+            self._pos -= len(samples)
+            self._prev = x[-1:]
+            return samples[:0]
+        
+        count = int((last - self._pos) // self.step) + 1
+        positions = self._pos + self.step * np.arange(count)
+        index = np.arange(len(x))
+        out = np.stack([np.interp(positions, index, x[:, c]) for c in range(x.shape[1])], axis=1)
+        
+        self._pos = positions[-1] + self.step - last
+        self._prev = x[-1:]
+        return out.astype(np.float32)
+
+
+class PlaybackHandle:
+    """Tracks one queued playback until it has actually been heard"""
+    
+    def __init__(self, engine: 'PlaybackEngine', sample_rate: int, channels: int):
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.resampler = LinearResampler(sample_rate, engine.rate)
+        self.cancelled = False
+        self._input_finished = False
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+    
+    def write(self, pcm: Union[bytes, np.ndarray]):
+        """Queue more int16 PCM for this playback"""
+        with self._lock:
+            self._pending += 1
+        self.engine._enqueue(self, pcm)
+    
+    def finish(self):
+        """Mark that no more PCM will be written"""
+        with self._lock:
+            self._input_finished = True
+            if self._pending == 0:
+                self.engine._enqueue(self, None)
+    
+    def _chunk_played(self):
+        with self._lock:
+            self._pending -= 1
+            return self._input_finished and self._pending == 0
+    
+    def _mark_done(self):
+        self._done.set()
+    
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until playback has finished at the speaker
+        
+        Returns:
+            True if playback finished (or was cancelled), False on timeout
+        """
+        return self._done.wait(timeout)
+
+
+class PlaybackEngine:
+    """
+    Keeps one PyAudio output stream open and plays queued PCM
+    
+    Buffers are converted to the device's native rate and channel count
+    and written by a dedicated thread, so callers never pay process spawn
+    or device-open latency. Handles report completion once the audio has
+    drained through the device's output latency.
+    """
+    
+    def __init__(self, audio: pyaudio.PyAudio, device_index: Optional[int] = None,
+                 chunk_size: int = 1024, rate: Optional[int] = None,
+                 channels: Optional[int] = None):
+        """
+        Initialize playback engine
+        
+        Args:
+            audio: Shared PyAudio instance
+            device_index: Output device (None for default)
+            chunk_size: Frames per write
+            rate: Output rate (defaults to the device's native rate)
+            channels: Output channels (defaults to min(device max, 2))
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.audio = audio
+        self.device_index = device_index
+        self.chunk_size = chunk_size
+        self.rate = rate
+        self.channels = channels
+        
+        self.stream = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._current: Optional[PlaybackHandle] = None
+        
+        # Told about every block just before it is written (EchoReference)
+        self.echo_reference = None
+    
+    def open(self):
+        """Open the output device and start the writer thread"""
+        if self.stream is not None:
+            return
+        
+        if self.device_index is not None:
+            info = self.audio.get_device_info_by_index(self.device_index)
+        else:
+            info = self.audio.get_default_output_device_info()
+        
+        if self.rate is None:
+            self.rate = int(info.get('defaultSampleRate', 48000))
+        if self.channels is None:
+            self.channels = max(1, min(int(info.get('maxOutputChannels', 1)), 2))
+        
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=self.channels,
+            rate=self.rate,
+            output=True,
+            output_device_index=self.device_index,
+            frames_per_buffer=self.chunk_size
+        )
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="playback", daemon=True)
+        self._thread.start()
+        self.logger.info(f"✓ Playback engine open ({self.rate} Hz, {self.channels} ch)")
+    
+    def begin(self, sample_rate: int, channels: int = 1) -> PlaybackHandle:
+        """Start a streamed playback; write() chunks, then finish()"""
+        return PlaybackHandle(self, sample_rate, channels)
+    
+    def play(self, pcm: Union[bytes, np.ndarray], sample_rate: int,
+             channels: int = 1) -> PlaybackHandle:
+        """Queue a complete int16 PCM buffer for playback"""
+        handle = self.begin(sample_rate, channels)
+        handle.write(pcm)
+        handle.finish()
+        return handle
+    
+    def stop(self):
+        """Cancel the current and all queued playback"""
+        while True:
+            try:
+                handle, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            handle.cancelled = True
+            handle._mark_done()
+        
+        current = self._current
+        if current is not None:
+            current.cancelled = True
+    
+    @property
+    def is_playing(self) -> bool:
+        return self._current is not None or not self._queue.empty()
+    
+    def _enqueue(self, handle: PlaybackHandle, pcm):
+        if handle.cancelled:
+            handle._mark_done()
+            return
+        self._queue.put((handle, pcm))
+    
+    def _convert(self, handle: PlaybackHandle, pcm) -> np.ndarray:
+        """Convert int16 PCM to the device's rate and channel layout"""
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(pcm, dtype=np.int16)
+        else:
+            samples = np.asarray(pcm)
+        
+        usable = len(samples) - len(samples) % handle.channels
+        frames = samples[:usable].reshape(-1, handle.channels).astype(np.float32)
+        frames = handle.resampler.process(frames)
+        
+        if handle.channels != self.channels:
+            mono = frames.mean(axis=1, keepdims=True)
+            frames = np.repeat(mono, self.channels, axis=1)
+        
+        return np.clip(frames, -32768, 32767).astype(np.int16)
+    
+    def _run(self):
+        """Writer thread: play queued chunks back to back"""
+        while self._running:
+            try:
+                handle, pcm = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            
+            self._current = handle
+            try:
+                if pcm is None:
+                    finished = True
+                else:
+                    if not handle.cancelled:
+                        frames = self._convert(handle, pcm)
+                        for start in range(0, len(frames), self.chunk_size):
+                            if handle.cancelled or not self._running:
+                                break
+                            block = frames[start:start + self.chunk_size]
+                            if self.echo_reference is not None:
+                                self.echo_reference.add(block, self.rate,
+                                                        self.stream.get_output_latency())
+                            self.stream.write(block.tobytes())
+                    finished = handle._chunk_played()
+                
+                if handle.cancelled:
+                    handle._mark_done()
+                elif finished:
+                    # write() returns once the data is buffered; report the
+                    # handle done when it has drained through the device
+                    # without holding up whatever is queued next
+                    timer = threading.Timer(self.stream.get_output_latency(), handle._mark_done)
+                    timer.daemon = True
+                    timer.start()
+            except Exception as e:
+                self.logger.error(f"Playback error: {e}")
+                handle.cancelled = True
+                handle._mark_done()
+            finally:
+                self._current = None
+    
+    def close(self):
+        """Stop playback and close the output device"""
+        self.stop()
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        
+        if self.stream is not None:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception as e:
+                self.logger.debug(f"Error closing output stream: {e}")
+            self.stream = None
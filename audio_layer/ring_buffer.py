@@ -0,0 +1,120 @@
+"""
+Audio Ring Buffer
+Fixed-size, preallocated sample buffer fed by the capture callback
+"""
+
+import threading
+import numpy as np
+from typing import Optional
+
+
+class RingBuffer:
+    """
+    Preallocated NumPy ring buffer with zero-copy reads of recent audio
+    
+    Every sample is written twice, at i and i + capacity, so the most
+    recent N samples are always one contiguous slice of the backing array
+    and can be handed out as a view instead of a copy.
+    
+    Positions used by since()/segment() are absolute sample counts since
+    the buffer was created (see total_written). Views stay valid until the
+    writer wraps around over them, i.e. for roughly `capacity` samples.
+    """
+    
+    def __init__(self, capacity: int, dtype=np.int16):
+        """
+        Initialize ring buffer
+        
+        Args:
+            capacity: Number of samples kept
+            dtype: Sample type
+        """
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity * 2, dtype=dtype)
+        self._write_pos = 0
+        self.total_written = 0
+        self._cond = threading.Condition()
+    
+    def write(self, samples: np.ndarray):
+        """Append samples, overwriting the oldest ones when full"""
+        count = len(samples)
+        if count == 0:
+            return
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+        
+        n = len(samples)
+        pos = self._write_pos
+        first = min(n, self.capacity - pos)
+        rest = n - first
+        
+        self._buffer[pos:pos + first] = samples[:first]
+        self._buffer[pos + self.capacity:pos + self.capacity + first] = samples[:first]
+        if rest:
+            self._buffer[:rest] = samples[first:]
+            self._buffer[self.capacity:self.capacity + rest] = samples[first:]
+        
+        with self._cond:
+            self._write_pos = (pos + n) % self.capacity
+            self.total_written += count
+            self._cond.notify_all()
+    
+    def latest(self, num_samples: int) -> np.ndarray:
+        """
+        Get the most recent samples as a read-only view
+        
+        Args:
+            num_samples: Number of samples wanted (clipped to what is stored)
+        
+        Returns:
+            View of up to num_samples samples, oldest first
+        """
+        with self._cond:
+            pos = self._write_pos
+            total = self.total_written
+        
+        n = max(0, min(num_samples, self.capacity, total))
+        end = pos + self.capacity
+        view = self._buffer[end - n:end]
+        view.flags.writeable = False
+        return view
+    
+    def since(self, position: int) -> np.ndarray:
+        """Get a view of everything written after absolute position"""
+        return self.latest(self.total_written - position)
+    
+    def segment(self, start: int, end: int) -> np.ndarray:
+        """
+        Get a view of the absolute sample range [start, end)
+        
+        Samples that have already been overwritten are dropped from the
+        front of the range; samples not yet written are not included.
+        """
+        with self._cond:
+            pos = self._write_pos
+            total = self.total_written
+        
+        end = min(end, total)
+        start = max(start, total - self.capacity)
+        if end <= start:
+            return self._buffer[:0]
+        
+        # Index of `total` in the upper copy of the buffer
+        top = pos + self.capacity
+        view = self._buffer[top - (total - start):top - (total - end)]
+        view.flags.writeable = False
+        return view
+    
+    def wait_for(self, position: int, timeout: Optional[float] = None) -> bool:
+        """
+        Block until at least `position` samples have been written
+        
+        Returns:
+            True if the position was reached, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.total_written >= position,
+                                       timeout=timeout)
@@ -0,0 +1,175 @@
+"""
+Speech Presence Gate
+Cheap check that a recorded window contains speech before it goes to Whisper
+"""
+
+import logging
+import numpy as np
+from typing import Optional
+
+
+class SpeechGate:
+    """
+    Scores how likely a window of audio is to contain speech
+    
+    Every frame gets a likelihood from three vectorized features: its
+    speech-band energy above the calibrated noise floor, its zero-crossing
+    rate (hiss and fan noise cross zero far more often than voiced
+    speech) and the spectral flatness of the speech band (noise is flat,
+    vowels are peaky). The window's score is the best mean likelihood over any
+    `min_speech_ms` stretch, so a click or a door bump does not pass on
+    a single loud frame. Windows scoring below `threshold` skip STT.
+    
+    calibrate() measures ambient audio to set the noise floor and raise
+    the threshold above the scores that noise alone reaches.
+    """
+    
+    def __init__(self, frame_ms: float = 20, min_speech_ms: float = 200,
+                 threshold: float = 0.5, snr_db: float = 10.0,
+                 noise_db: float = -60.0, max_crossings: float = 3000.0,
+                 band_hz: tuple = (250.0, 4000.0)):
+        """
+        Initialize gate
+        
+        Args:
+            frame_ms: Analysis frame length
+            min_speech_ms: Speech-like audio a window needs
+            threshold: Minimum window score (0-1) to run STT
+            snr_db: Level above the noise floor where the energy score
+                    reaches one half
+            noise_db: Noise floor (dBFS) until calibrate() is called
+            max_crossings: Zero crossings per second where the crossing
+                           score reaches one half
+            band_hz: Speech band for the energy and flatness features
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.frame_ms = frame_ms
+        self.min_speech_ms = min_speech_ms
+        self.threshold = threshold
+        self.snr_db = snr_db
+        self.noise_db = noise_db
+        self.max_crossings = max_crossings
+        self.band_hz = band_hz
+        self.calibrated = False
+    
+    @classmethod
+    def from_config(cls, audio_config: dict) -> Optional['SpeechGate']:
+        """Build a gate from the `audio.speech_gate` section (None when disabled)"""
+        options = dict(audio_config.get('speech_gate', {}) or {})
+        if not options.pop('enabled', False):
+            return None
+        if 'band_hz' in options:
+            options['band_hz'] = tuple(options['band_hz'])
+        frame_ms = (audio_config.get('endpointing', {}) or {}).get('frame_ms')
+        if frame_ms and 'frame_ms' not in options:
+            options['frame_ms'] = frame_ms
+        return cls(**options)
+    
+    def _frames(self, audio: np.ndarray, sample_rate: int, channels: int) -> np.ndarray:
+        """(frames, frame_len) float32 mono frames"""
+        samples = np.asarray(audio, dtype=np.float32) / 32768.0
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels]
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        frame_len = max(1, int(sample_rate * self.frame_ms / 1000))
+        count = len(samples) // frame_len
+        return samples[:count * frame_len].reshape(count, frame_len)
+    
+    def _band_levels(self, frames: np.ndarray, sample_rate: int):
+        """
+        Speech-band level (dBFS) and spectral flatness of every frame
+        
+        The level counts only the power inside band_hz, so mains hum and
+        rumble below it do not look like speech.
+        """
+        power = np.abs(np.fft.rfft(frames * np.hanning(frames.shape[1]), axis=1)) ** 2 + 1e-12
+        freqs = np.fft.rfftfreq(frames.shape[1], 1.0 / sample_rate)
+        band = power[:, (freqs >= self.band_hz[0]) & (freqs <= self.band_hz[1])]
+        
+        band_fraction = band.sum(axis=1) / power.sum(axis=1)
+        level_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) * band_fraction + 1e-10)
+        flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+        return level_db, flatness
+    
+    def frame_scores(self, audio: np.ndarray, sample_rate: int,
+                     channels: int = 1) -> np.ndarray:
+        """
+        Speech likelihood of every frame
+        
+        Args:
+            audio: Interleaved int16 samples
+            sample_rate: Sample rate of the audio
+            channels: Channel count of the audio
+        
+        Returns:
+            float32 likelihoods in [0, 1], one per frame
+        """
+        frames = self._frames(audio, sample_rate, channels)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=np.float32)
+        frame_seconds = frames.shape[1] / sample_rate
+        level_db, flatness = self._band_levels(frames, sample_rate)
+        
+        # Energy: logistic in the SNR, one half at snr_db
+        energy = 1.0 / (1.0 + np.exp(-(level_db - self.noise_db - self.snr_db) / 3.0))
+        
+        # Zero-crossing rate, in crossings per second
+        signs = np.signbit(frames)
+        crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_seconds
+        voicing = 1.0 / (1.0 + np.exp((crossings - self.max_crossings) / (0.2 * self.max_crossings)))
+        
+        # Flatness is ~0.5 for white noise and ~0.05 or below for vowels;
+        # scored on a log scale
+        tonality = np.clip(np.log10(0.5 / flatness), 0.0, 1.0)
+        
+        return (energy * (0.5 * voicing + 0.5 * tonality)).astype(np.float32)
+    
+    def score(self, audio: np.ndarray, sample_rate: int, channels: int = 1) -> float:
+        """
+        Speech score of a window: best mean frame likelihood over any
+        min_speech_ms stretch (over the whole window if it is shorter)
+        """
+        scores = self.frame_scores(audio, sample_rate, channels)
+        if len(scores) == 0:
+            return 0.0
+        
+        span = min(len(scores), max(1, int(round(self.min_speech_ms / self.frame_ms))))
+        sums = np.concatenate(([0.0], np.cumsum(scores)))
+        return float(np.max(sums[span:] - sums[:-span]) / span)
+    
+    def accept(self, audio: np.ndarray, sample_rate: int, channels: int = 1) -> bool:
+        """Whether the window is worth transcribing"""
+        score = self.score(audio, sample_rate, channels)
+        if score < self.threshold:
+            self.logger.info(f"Speech gate: no speech (score {score:.2f} < {self.threshold:.2f}), "
+                             "skipping transcription")
+            return False
+        self.logger.debug(f"Speech gate: score {score:.2f}")
+        return True
+    
+    def calibrate(self, noise: np.ndarray, sample_rate: int, channels: int = 1):
+        """
+        Adapt to ambient audio with nobody speaking
+        
+        The noise floor becomes the median frame level, and the threshold
+        is raised (never lowered) to clear the best score the ambient
+        audio reaches by a margin.
+        
+        Args:
+            noise: Interleaved int16 ambient audio, a second or more
+            sample_rate: Sample rate of the audio
+            channels: Channel count of the audio
+        """
+        frames = self._frames(noise, sample_rate, channels)
+        if len(frames) < 10:
+            self.logger.warning("Speech gate: not enough audio to calibrate")
+            return
+        
+        level_db, _ = self._band_levels(frames, sample_rate)
+        self.noise_db = float(np.median(level_db))
+        ambient = self.score(noise, sample_rate, channels)
+        self.threshold = max(self.threshold, min(0.9, ambient + 0.15))
+        self.calibrated = True
+        self.logger.info(f"✓ Speech gate calibrated: noise floor {self.noise_db:.1f} dBFS, "
+                         f"ambient score {ambient:.2f}, threshold {self.threshold:.2f}")
@@ -0,0 +1,136 @@
+"""
+Pluto Chatbot - Full-Duplex Controller
+Keeps listening while Pluto talks, so the user can interrupt it (barge-in)
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from utils import tracer
+
+# Seconds between scans of the capture ring buffer during playback
+POLL_INTERVAL = 0.02
+
+
+class DuplexController:
+    """
+    asyncio conversation loop with barge-in
+    
+    The persistent capture stream runs the whole time. Each turn records
+    and works out a response on a worker thread (PlutoChatbot.listen),
+    then speaks it as a cancellable task while a watcher scans the
+    capture stream for user speech over Pluto's own echo. On barge-in the
+    speaking task is cancelled, which stops the TTS producer and the
+    playback engine, and the next turn records from where the
+    interruption began instead of waiting for Pluto to finish.
+    """
+    
+    def __init__(self, pluto):
+        """
+        Initialize controller
+        
+        Args:
+            pluto: Initialized PlutoChatbot (capture must be running)
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.pluto = pluto
+        self.audio_manager = pluto.audio_manager
+        self.detector = self.audio_manager.create_barge_in_detector()
+        self.barge_ins = 0
+        
+        # listen() and speak() block; one thread each is enough
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="duplex")
+    
+    @property
+    def available(self) -> bool:
+        """Whether the audio setup supports barge-in"""
+        return self.detector is not None
+    
+    def run(self):
+        """Run turns until pluto.running is cleared"""
+        self.logger.info("Full-duplex mode: talk over Pluto to interrupt it")
+        try:
+            asyncio.run(self._run())
+        finally:
+            self.executor.shutdown(wait=False)
+    
+    async def _run(self):
+        start_position = None
+        while self.pluto.running:
+            start_position = await self._turn(start_position)
+    
+    async def _turn(self, start_position: Optional[int]) -> Optional[int]:
+        """
+        Listen, respond and speak once
+        
+        Args:
+            start_position: Capture position to record from (a barge-in)
+        
+        Returns:
+            Capture position where the user barged in, or None
+        """
+        loop = asyncio.get_running_loop()
+        with tracer.turn():
+            # Executor threads start outside the turn; bind() carries it over
+            response = await loop.run_in_executor(self.executor, tracer.bind(self.pluto.listen),
+                                                  start_position)
+            try:
+                return await self._speak(response)
+            except Exception as e:
+                self.logger.error(f"Error speaking response: {e}")
+                return None
+    
+    async def _speak(self, text: str) -> Optional[int]:
+        """Speak text, returning the barge-in position if interrupted"""
+        cancel = threading.Event()
+        speaking = asyncio.ensure_future(self._play(text, cancel))
+        watching = asyncio.ensure_future(self._watch())
+        
+        done, _ = await asyncio.wait({speaking, watching},
+                                     return_when=asyncio.FIRST_COMPLETED)
+        
+        if watching in done:
+            position = watching.result()
+            speaking.cancel()
+            try:
+                await speaking
+            except asyncio.CancelledError:
+                pass
+            self.barge_ins += 1
+            return position
+        
+        watching.cancel()
+        speaking.result()
+        return None
+    
+    async def _play(self, text: str, cancel: threading.Event):
+        """Playback task; cancelling it silences Pluto right away"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, tracer.bind(self.pluto.speak), text, cancel)
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel.set()
+            self.audio_manager.stop_playback()
+            # Let speak() unwind, then drop anything it queued meanwhile
+            await future
+            self.audio_manager.stop_playback()
+            raise
+    
+    async def _watch(self) -> int:
+        """Scan the capture stream until the user speaks over playback"""
+        ring = self.audio_manager.ring_buffer
+        self.detector.reset(ring.total_written)
+        
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            end = ring.total_written
+            chunk = ring.segment(self.detector.position, end)
+            position = self.detector.process(chunk, time.monotonic())
+            if position is not None:
+                return position
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Pluto Chatbot - Offline Evaluation
+Runs a corpus of WAV files through the pipeline stages and reports
+latency, throughput, word error rate and intent accuracy
+
+Usage:
+    python evaluate.py corpus/ --workers 2 --tts
+
+The corpus directory holds .wav clips. Expectations come from an
+optional manifest.csv (columns: file, transcript, intent) or, per clip,
+a .txt file with the transcript next to the .wav. Clips without an
+expected intent count towards WER only.
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import wave
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stt_layer.benchmark import normalize_text, word_error_rate
+
+STAGES = ['stt', 'intent', 'scenario', 'humanize', 'tts']
+
+# Pipeline components of a worker process (see _init_worker)
+_components: Dict = {}
+
+
+def _init_worker(config_path: str, with_tts: bool, log_level: str, ready):
+    """Load the pipeline once per worker process, then wait at the barrier"""
+    logging.basicConfig(level=log_level, format="%(processName)s %(name)s: %(message)s")
+    
+    try:
+        from stt_layer import WhisperSTT
+        from intent_layer import IntentDetector
+        from scenario_layer import ScenarioManager
+        from utils import Humanizer
+        
+        _components['stt'] = WhisperSTT(config_path)
+        _components['intent_detector'] = IntentDetector(config_path)
+        _components['scenario_manager'] = ScenarioManager(config_path)
+        _components['humanizer'] = Humanizer(config_path)
+        if with_tts:
+            from tts_layer import PiperTTS
+            _components['tts'] = PiperTTS(config_path)
+    except Exception:
+        ready.abort()
+        raise
+    
+    ready.wait()
+
+
+def _run_clip(path: str) -> Dict:
+    """
+    Run one clip through the stages of PlutoChatbot.process_audio
+    
+    Returns:
+        {'file', 'transcript', 'intent', 'response', 'timings'}
+    """
+    stt = _components['stt']
+    timings = {}
+    
+    with wave.open(path, 'rb') as wf:
+        audio = wf.readframes(wf.getnframes())
+        sample_rate, channels = wf.getframerate(), wf.getnchannels()
+    
+    start = time.perf_counter()
+    transcription, intent = stt.transcribe_intent(audio, sample_rate=sample_rate,
+                                                  channels=channels)
+    timings['stt'] = time.perf_counter() - start
+    
+    # Same rules as PlutoChatbot.respond_to
+    start = time.perf_counter()
+    if not transcription or len(transcription.strip()) < 2:
+        intent, response_intent = 'unknown', 'fun_fact'
+    else:
+        if intent is None:
+            intent = _components['intent_detector'].detect(transcription)
+        response_intent = intent
+    timings['intent'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    response = _components['scenario_manager'].get_response(response_intent)
+    timings['scenario'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    humanized = _components['humanizer'].humanize(response)
+    timings['humanize'] = time.perf_counter() - start
+    
+    tts = _components.get('tts')
+    if tts is not None:
+        # Synthesize into a null sink: the audio is discarded
+        start = time.perf_counter()
+        try:
+            for _ in tts.stream_pcm(humanized):
+                pass
+            timings['tts'] = time.perf_counter() - start
+        except Exception:
+            pass  # logged by the TTS layer; the clip gets no tts timing
+    
+    return {'file': path, 'transcript': transcription, 'intent': intent,
+            'response': humanized, 'timings': timings}
+
+
+def load_corpus(directory: str) -> List[Dict]:
+    """
+    Find clips and their expected transcript and intent
+    
+    Returns:
+        [{'file', 'transcript' (or None), 'intent' (or None)}], sorted by file
+    """
+    manifest = {}
+    manifest_path = os.path.join(directory, 'manifest.csv')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                manifest[row['file']] = row
+    
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.wav'):
+            continue
+        row = manifest.get(name, {})
+        transcript = row.get('transcript') or None
+        if transcript is None:
+            text_path = os.path.join(directory, name[:-4] + '.txt')
+            if os.path.exists(text_path):
+                with open(text_path, 'r') as f:
+                    transcript = f.read().strip()
+        corpus.append({'file': os.path.join(directory, name),
+                       'transcript': transcript,
+                       'intent': row.get('intent') or None})
+    return corpus
+
+
+def summarize(corpus: List[Dict], results: List[Dict], wall_seconds: float) -> Dict:
+    """Aggregate per-clip results into the report"""
+    report = {'clips': len(results), 'wall_seconds': wall_seconds,
+              'clips_per_second': len(results) / wall_seconds if wall_seconds else 0.0,
+              'stages': {}}
+    
+    totals = [sum(result['timings'].values()) for result in results]
+    for stage in STAGES + ['total']:
+        values = totals if stage == 'total' else [r['timings'][stage] for r in results
+                                                  if stage in r['timings']]
+        if not values:
+            continue
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        report['stages'][stage] = {'mean': float(np.mean(values)), 'p50': float(p50),
+                                   'p90': float(p90), 'p99': float(p99), 'max': float(max(values))}
+    
+    # Corpus WER: total edits over total reference words
+    errors = words = 0.0
+    intent_hits = intent_total = 0
+    report['mistakes'] = []
+    for expected, result in zip(corpus, results):
+        if expected['transcript'] is not None:
+            ref_words = len(normalize_text(expected['transcript']))
+            errors += word_error_rate(expected['transcript'], result['transcript']) * max(ref_words, 1)
+            words += max(ref_words, 1)
+        if expected['intent'] is not None:
+            intent_total += 1
+            if result['intent'] == expected['intent']:
+                intent_hits += 1
+            else:
+                report['mistakes'].append({'file': os.path.basename(result['file']),
+                                           'expected': expected['intent'],
+                                           'got': result['intent'],
+                                           'transcript': result['transcript']})
+    
+    report['wer'] = errors / words if words else None
+    report['intent_accuracy'] = intent_hits / intent_total if intent_total else None
+    report['intent_clips'] = intent_total
+    return report
+
+
+def print_report(report: Dict):
+    print()
+    print(f"Clips: {report['clips']} in {report['wall_seconds']:.1f}s "
+          f"({report['clips_per_second']:.2f} clips/sec)")
+    print()
+    print(f"{'stage':<10} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<10} " + " ".join(f"{stats[key] * 1000:>9.1f}"
+                                         for key in ('mean', 'p50', 'p90', 'p99', 'max')))
+    print()
+    if report['wer'] is not None:
+        print(f"WER: {report['wer']:.1%}")
+    if report['intent_accuracy'] is not None:
+        print(f"Intent accuracy: {report['intent_accuracy']:.1%} "
+              f"({report['intent_clips']} clips with an expected intent)")
+    for mistake in report['mistakes']:
+        print(f"  {mistake['file']}: expected {mistake['expected']}, got {mistake['got']} "
+              f"('{mistake['transcript']}')")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate Pluto on a corpus of WAV files")
+    parser.add_argument('corpus', help="Directory of .wav clips with expectations")
+    parser.add_argument('--config', default='config/config.yaml')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes (each loads its own Whisper model)")
+    parser.add_argument('--tts', action='store_true', help="Also synthesize responses (audio is discarded)")
+    parser.add_argument('--json', help="Also write the report to this file")
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+    
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"No .wav files found in {args.corpus}")
+        return 1
+    
+    print(f"Loading {args.workers} worker(s)...")
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(args.workers + 1)
+    with context.Pool(args.workers, initializer=_init_worker,
+                      initargs=(args.config, args.tts, args.log_level, ready)) as pool:
+        # Every worker has loaded its models before the clock starts
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            print("A worker failed to load the pipeline")
+            pool.terminate()
+            return 1
+        
+        print(f"Evaluating {len(corpus)} clip(s)...")
+        start = time.perf_counter()
+        results = pool.map(_run_clip, [entry['file'] for entry in corpus], chunksize=1)
+        wall_seconds = time.perf_counter() - start
+    
+    report = summarize(corpus, results, wall_seconds)
+    print_report(report)
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'report': report, 'results': results}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
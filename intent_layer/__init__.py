@@ -1,5 +1,6 @@
 """Intent Layer Package"""
 
 from .intent_detector import IntentDetector
+from .similarity_classifier import SimilarityClassifier
 
-__all__ = ['IntentDetector']
+__all__ = ['IntentDetector', 'SimilarityClassifier']
@@ -3,9 +3,13 @@ Intent Detection Layer
 Detects user intent from transcribed text using keyword matching
 """
 
-import yaml
+import re
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from .similarity_classifier import SimilarityClassifier
+from utils.config import load_config
+from utils.tracing import traced
 
 
 class IntentDetector:
@@ -15,13 +19,112 @@ class IntentDetector:
         """Initialize intent detector with configuration"""
         self.logger = logging.getLogger(__name__)
         
-        # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Shared configuration snapshot (parsed once for all components)
+        config = load_config(config_path)
         
-        self.intents = config['intents']
+        self.reload(config)
         self.logger.info("Intent detector initialized")
     
+    def reload(self, config):
+        """
+        Rebuild the matcher from a config snapshot
+        
+        The keyword regex and the classifier are built first and swapped in
+        together, so a detect() running meanwhile uses either the old
+        intents or the new ones.
+        
+        Args:
+            config: Configuration with `intents` and `intent_classifier`
+        """
+        intents = config['intents']
+        pattern, keywords = self._compile(intents)
+        
+        # Fuzzy second stage for transcripts no keyword matches
+        classifier = None
+        classifier_config = config.get('intent_classifier', {}) or {}
+        if classifier_config.get('enabled', False):
+            classifier = SimilarityClassifier(
+                intents,
+                n_features=classifier_config.get('n_features', 4096),
+                threshold=classifier_config.get('threshold', 0.7),
+                margin=classifier_config.get('margin', 0.15),
+                min_word_chars=classifier_config.get('min_word_chars', 4)
+            )
+        
+        self._matcher = (intents, pattern, keywords, classifier)
+    
+    @property
+    def intents(self):
+        return self._matcher[0]
+    
+    @property
+    def classifier(self) -> Optional[SimilarityClassifier]:
+        return self._matcher[3]
+    
+    def _compile(self, intents) -> Tuple[Optional[re.Pattern], Dict]:
+        """
+        Compile every keyword into one regex
+        
+        Keywords match whole words only ("hi" does not match "this"), and
+        phrase words may be separated by any whitespace. Alternatives are
+        ordered longest first, so at each position the longest keyword
+        wins ("good morning" over "good").
+        
+        Returns:
+            (pattern, keywords); pattern is None when there are no keywords
+        """
+        # keyword -> (intent, rank); lower rank wins. Intents rank by their
+        # optional `priority` (higher first), then by order in the config
+        keywords: Dict[str, Tuple[str, Tuple[int, int]]] = {}
+        for order, (intent_name, intent_data) in enumerate(intents.items()):
+            rank = (-int(intent_data.get('priority', 0)), order)
+            for keyword in intent_data.get('keywords', []):
+                key = self._normalize(keyword)
+                if key and (key not in keywords or rank < keywords[key][1]):
+                    keywords[key] = (intent_name, rank)
+        
+        if not keywords:
+            return None, keywords
+        
+        alternatives = [r'\s+'.join(re.escape(word) for word in key.split())
+                        for key in sorted(keywords, key=len, reverse=True)]
+        pattern = re.compile(r'(?<!\w)(?:' + '|'.join(alternatives) + r')(?!\w)',
+                             re.IGNORECASE)
+        return pattern, keywords
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+    
+    def match(self, text: str, matcher: Optional[tuple] = None) -> Optional[Tuple[str, str]]:
+        """
+        Find the best keyword match in a single pass over the text
+        
+        Matches are ranked by intent priority, then keyword length, then
+        position.
+        
+        Args:
+            text: User's transcribed speech
+            matcher: Matcher state to use (the current one by default)
+        
+        Returns:
+            (intent, keyword) or None if nothing matched
+        """
+        _, pattern, keywords, _ = matcher or self._matcher
+        if not text or pattern is None:
+            return None
+        
+        best = None
+        for found in pattern.finditer(text):
+            keyword = self._normalize(found.group())
+            intent_name, rank = keywords[keyword]
+            score = (rank, -len(keyword), found.start())
+            if best is None or score < best[0]:
+                best = (score, intent_name, keyword)
+        
+        return (best[1], best[2]) if best else None
+    
+    @traced('detect')
     def detect(self, text: str) -> str:
         """
         Detect intent from user input text
@@ -35,19 +138,22 @@ class IntentDetector:
         if not text:
             return 'unknown'
         
-        # Convert to lowercase for case-insensitive matching
-        text_lower = text.lower().strip()
-        
         self.logger.debug(f"Detecting intent for: '{text}'")
         
-        # Check each intent's keywords
-        for intent_name, intent_data in self.intents.items():
-            keywords = intent_data.get('keywords', [])
-            
-            for keyword in keywords:
-                if keyword.lower() in text_lower:
-                    self.logger.info(f"Intent detected: {intent_name} (matched: '{keyword}')")
-                    return intent_name
+        # One read of the matcher, so a reload mid-call cannot mix intents
+        matcher = self._matcher
+        result = self.match(text, matcher)
+        if result:
+            intent_name, keyword = result
+            self.logger.info(f"Intent detected: {intent_name} (matched: '{keyword}')")
+            return intent_name
+        
+        classifier = matcher[3]
+        if classifier is not None:
+            intent_name, confidence = classifier.classify(text)
+            if intent_name != 'unknown':
+                self.logger.info(f"Intent detected: {intent_name} (similarity {confidence:.2f})")
+                return intent_name
         
         # No match found
         self.logger.info("Intent detected: unknown (no keyword match)")
@@ -0,0 +1,183 @@
+"""
+Similarity Intent Classifier
+Fuzzy intent scoring with hashed character n-grams and cosine similarity
+"""
+
+import re
+import zlib
+import logging
+import numpy as np
+from typing import Dict, List, Tuple
+
+
+class SimilarityClassifier:
+    """
+    Second-stage intent classifier for transcripts keywords miss
+    
+    Every keyword (and optional example phrase) of every intent becomes a
+    prototype: its words, each weighted by its length. Words are compared
+    whole, by the cosine of their hashed character n-gram counts, and a
+    prototype of k words is compared with every run of k transcript words
+    position by position. So ASR variants such as "helo" or "greetins"
+    still match, while n-grams never pair up across word boundaries
+    ("help me" is not half of "hello" plus half of "tell me").
+    
+    Keywords shorter than `min_word_chars` only count when they match
+    exactly: a two- or three-letter word has too few n-grams to tell a
+    misheard "hey" from "they" or "heyday". A prototype with any word
+    below `word_floor` does not match at all, so "good" alone is not a
+    fuzzy "good morning". An intent is only returned when it beats the
+    runner-up by `margin`.
+    """
+    
+    def __init__(self, intents: Dict, n_features: int = 4096,
+                 ngram_sizes: Tuple[int, ...] = (1, 2, 3), threshold: float = 0.7,
+                 margin: float = 0.15, min_word_chars: int = 4, word_floor: float = 0.4):
+        """
+        Initialize classifier
+        
+        Args:
+            intents: The config `intents` section (keywords and optional
+                     `examples` per intent)
+            n_features: Hashed vector size
+            ngram_sizes: Character n-gram lengths
+            threshold: Minimum prototype similarity to accept an intent
+            margin: Minimum lead of the best intent over the runner-up
+            min_word_chars: Shorter prototype words must match exactly
+            word_floor: Minimum similarity of every word of a prototype
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.n_features = n_features
+        self.ngram_sizes = ngram_sizes
+        self.threshold = threshold
+        self.margin = margin
+        self.min_word_chars = min_word_chars
+        self.word_floor = word_floor
+        self._word_cache: Dict[str, np.ndarray] = {}
+        
+        self.intent_names: List[str] = []
+        self.vocabulary: List[str] = []
+        self._index: Dict[str, int] = {}
+        by_width: Dict[int, List[Tuple[int, List[int]]]] = {}
+        count = 0
+        for intent_name, intent_data in intents.items():
+            texts = list(intent_data.get('keywords', [])) + list(intent_data.get('examples', []))
+            phrases = [words for words in (self._words(text) for text in texts) if words]
+            if not phrases:
+                continue
+            intent_index = len(self.intent_names)
+            self.intent_names.append(intent_name)
+            for words in phrases:
+                for word in words:
+                    if word not in self._index:
+                        self._index[word] = len(self.vocabulary)
+                        self.vocabulary.append(word)
+                by_width.setdefault(len(words), []).append(
+                    (intent_index, [self._index[word] for word in words]))
+                count += 1
+        
+        # Vocabulary words as rows of unit n-gram vectors; short ones only
+        # ever match themselves
+        self.word_vectors = self._normalize(
+            np.stack([self._word_vector(word) for word in self.vocabulary])
+            if self.vocabulary else np.zeros((0, n_features), np.float32))
+        self._exact_only = np.array([len(word) < min_word_chars for word in self.vocabulary], bool)
+        
+        # Prototypes grouped by word count: (intent per row, word indices,
+        # word weights); the weights of a row sum to one
+        self._prototypes: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        lengths = np.array([len(word) for word in self.vocabulary], np.float32)
+        for width, rows in by_width.items():
+            owners = np.array([intent_index for intent_index, _ in rows])
+            words = np.array([word_indices for _, word_indices in rows])
+            weights = lengths[words] / lengths[words].sum(axis=1, keepdims=True)
+            self._prototypes[width] = (owners, words, weights)
+        
+        self.logger.info(f"Similarity classifier: {count} prototypes, "
+                         f"{len(self.intent_names)} intents")
+    
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return re.findall(r"[a-z0-9']+", text.lower())
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+    
+    def _word_vector(self, word: str) -> np.ndarray:
+        """Hashed n-gram counts of one word, padded with spaces"""
+        vector = self._word_cache.get(word)
+        if vector is None:
+            padded = f" {word} ".encode('utf-8')
+            indices = [zlib.crc32(padded[i:i + n]) % self.n_features
+                       for n in self.ngram_sizes
+                       for i in range(len(padded) - n + 1)]
+            vector = np.bincount(indices, minlength=self.n_features).astype(np.float32)
+            if len(self._word_cache) < 4096:
+                self._word_cache[word] = vector
+        return vector
+    
+    def _word_similarity(self, words: List[str]) -> np.ndarray:
+        """Similarity of each transcript word to each vocabulary word"""
+        vectors = self._normalize(np.stack([self._word_vector(word) for word in words]))
+        similarity = vectors @ self.word_vectors.T
+        
+        exact = np.zeros(similarity.shape, bool)
+        for row, word in enumerate(words):
+            if word in self._index:
+                exact[row, self._index[word]] = True
+        similarity = np.where(self._exact_only, exact, similarity)
+        return np.where(similarity >= self.word_floor, similarity, -np.inf)
+    
+    def score(self, text: str) -> Dict[str, float]:
+        """
+        Best prototype similarity per intent
+        
+        Args:
+            text: User's transcribed speech
+        
+        Returns:
+            {intent: similarity in [0, 1]}
+        """
+        scores = np.zeros(len(self.intent_names), np.float32)
+        words = self._words(text)
+        if not words or not self.intent_names:
+            return {name: float(value) for name, value in zip(self.intent_names, scores)}
+        
+        similarity = self._word_similarity(words)
+        for width, (owners, prototype_words, weights) in self._prototypes.items():
+            if width > len(words):
+                continue
+            # (span, prototype, position): transcript word start + position
+            # against the prototype's word at that position
+            spans = np.arange(len(words) - width + 1)[:, np.newaxis] + np.arange(width)
+            aligned = similarity[spans[:, np.newaxis, :], prototype_words[np.newaxis, :, :]]
+            best = (aligned * weights).sum(axis=2).max(axis=0)
+            np.maximum.at(scores, owners, np.maximum(best, 0.0))
+        
+        return {name: float(value) for name, value in zip(self.intent_names, scores)}
+    
+    def classify(self, text: str) -> Tuple[str, float]:
+        """
+        Classify a transcript
+        
+        Args:
+            text: User's transcribed speech
+        
+        Returns:
+            (intent, confidence); intent is 'unknown' below the threshold
+            or without a clear lead over the runner-up
+        """
+        scores = self.score(text)
+        if not scores:
+            return 'unknown', 0.0
+        
+        ranked = sorted(scores.values(), reverse=True)
+        intent_name = max(scores, key=scores.get)
+        confidence = ranked[0]
+        runner_up = ranked[1] if len(ranked) > 1 else 0.0
+        if confidence < self.threshold or confidence - runner_up < self.margin:
+            return 'unknown', confidence
+        return intent_name, confidence
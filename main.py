@@ -8,17 +8,28 @@ import os
 import sys
 import signal
 import tempfile
+import time
 import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, Tuple, Union
+
+# Taken before the heavier imports so the startup report covers them
+LAUNCH_TIME = time.monotonic()
+
+import numpy as np
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils import setup_logger, Humanizer
+from utils import setup_logger, setup_tracing, tracer, Humanizer, ConfigWatcher, load_config
 from audio_layer import AudioManager
-from stt_layer import WhisperSTT
+from stt_layer import WhisperSTT, StreamingTranscriber
 from intent_layer import IntentDetector
 from scenario_layer import ScenarioManager
 from tts_layer import PiperTTS
+from duplex import DuplexController
 
 
 class PlutoChatbot:
@@ -28,78 +39,191 @@ class PlutoChatbot:
         """Initialize Pluto chatbot"""
         # Setup logging first
         setup_logger(config_path)
+        setup_tracing(config_path)
         self.logger = logging.getLogger(__name__)
         self.logger.info("=" * 60)
         self.logger.info("Initializing Pluto Chatbot")
         self.logger.info("=" * 60)
         
         self.config_path = config_path
+        self.config = load_config(config_path)
         self.running = False
+        self.partial_result: Optional[Tuple[str, str]] = None
+        self.tts_held = False
+        self.warmup_report = {}
+        self.config_watcher: Optional[ConfigWatcher] = None
         
         # Create temp directory for audio files
         self.temp_dir = "temp"
         if not os.path.exists(self.temp_dir):
             os.makedirs(self.temp_dir)
         
-        # Initialize all components
+        # Initialize all components (independent ones load concurrently)
         try:
             self.logger.info("Loading components...")
+            self.startup_report = self._load_components(config_path)
             
-            self.audio_manager = AudioManager(config_path)
-            self.logger.info("✓ Audio Manager loaded")
-            
-            self.stt = WhisperSTT(config_path)
-            self.logger.info("✓ Whisper STT loaded")
-            
-            self.intent_detector = IntentDetector(config_path)
-            self.logger.info("✓ Intent Detector loaded")
-            
-            self.scenario_manager = ScenarioManager(config_path)
-            self.logger.info("✓ Scenario Manager loaded")
+            if self.audio_manager.persistent_capture:
+                self.audio_manager.start_capture()
             
-            self.tts = PiperTTS(config_path)
-            self.logger.info("✓ Piper TTS loaded")
-            
-            self.humanizer = Humanizer(config_path)
-            self.logger.info("✓ Humanizer loaded")
+            self.config_watcher = self._create_config_watcher()
             
             self.logger.info("All components initialized successfully!")
-            
+            self._log_startup_report()
+        
         except Exception as e:
             self.logger.error(f"Failed to initialize components: {e}")
             raise
     
-    def speak(self, text: str):
-        """Speak text through TTS"""
-        self.logger.info(f"Speaking: {text}")
+    def _load_components(self, config_path: str) -> Dict[str, float]:
+        """
+        Build all components in parallel
+        
+        Returns:
+            Wall time in seconds per component
+        """
+        components = [
+            ('audio_manager', "Audio Manager", AudioManager),
+            ('stt', "Whisper STT", WhisperSTT),
+            ('intent_detector', "Intent Detector", IntentDetector),
+            ('scenario_manager', "Scenario Manager", ScenarioManager),
+            ('tts', "Piper TTS", PiperTTS),
+            ('humanizer', "Humanizer", Humanizer),
+        ]
+        
+        def load(label, factory):
+            start = time.perf_counter()
+            component = factory(config_path)
+            elapsed = time.perf_counter() - start
+            self.logger.info(f"✓ {label} loaded ({elapsed:.2f}s)")
+            return component, elapsed
+        
+        timings = {}
+        with ThreadPoolExecutor(max_workers=len(components),
+                                thread_name_prefix="startup") as pool:
+            futures = {pool.submit(load, label, factory): (attr, label)
+                       for attr, label, factory in components}
+            
+            for future in as_completed(futures):
+                attr, label = futures[future]
+                component, elapsed = future.result()
+                setattr(self, attr, component)
+                timings[label] = elapsed
+        
+        return timings
+    
+    def _create_config_watcher(self) -> Optional[ConfigWatcher]:
+        """Hot reload of intents, responses and humanizer rules, if enabled"""
+        watcher = ConfigWatcher.from_config(self.config)
+        if watcher is None:
+            return None
         
-        # Humanize the text
-        humanized_text = self.humanizer.humanize(text)
+        # Only text-level state is swapped; the loaded models stay as they are
+        watcher.subscribe(self._reload_intents, ['intents', 'intent_classifier'])
+        watcher.subscribe(self.scenario_manager.reload, ['responses'])
+        watcher.subscribe(self.humanizer.reload, ['humanizer'])
+        return watcher
+    
+    def _reload_intents(self, config):
+        """Apply new intents to the detector and Whisper's intent decoding together"""
+        if (self.stt.intent_keywords_fixed and
+                config.get('intents') != load_config(self.config.path).get('intents')):
+            raise ValueError("intent decoding runs in the STT worker, restart to change intents")
+        self.intent_detector.reload(config)
+        self.stt.reload_intents(config)
+    
+    def _log_startup_report(self):
+        """Log per-component load times and total time since launch"""
+        self.logger.info("Startup report:")
+        for label, elapsed in sorted(self.startup_report.items(), key=lambda item: -item[1]):
+            self.logger.info(f"  {label:<18} {elapsed:6.2f}s")
+        self.logger.info(f"  {'Sum of components':<18} {sum(self.startup_report.values()):6.2f}s")
+        self.logger.info(f"  {'Since launch':<18} {time.monotonic() - LAUNCH_TIME:6.2f}s")
+    
+    def speak(self, text: str, cancel: Optional[threading.Event] = None):
+        """Speak text through TTS (stops early once cancel is set)"""
+        self.logger.info(f"Speaking: {text}")
         
-        # Synthesize and play
-        self.tts.speak(humanized_text, self.audio_manager)
+        try:
+            # Humanize the text
+            humanized_text = self.humanizer.humanize(text)
+            
+            # Synthesize and play
+            self.tts.speak(humanized_text, self.audio_manager, cancel=cancel)
+        finally:
+            # The reply held since the user started talking has been spoken
+            if self.tts_held:
+                self.tts_held = False
+                self.tts.release_background()
+    
+    def _warm_up(self):
+        """Run dummy inputs through Whisper and Piper, recording cold vs warm latency"""
+        for label, component in (("Whisper STT", self.stt), ("Piper TTS", self.tts)):
+            try:
+                self.warmup_report[label] = component.warmup()
+            except Exception as e:
+                self.logger.warning(f"{label} warm-up failed: {e}")
     
-    def process_audio(self, audio_path: str) -> str:
+    def _prerender_responses(self):
+        """Synthesize all static responses into the TTS cache"""
+        try:
+            texts = [self.humanizer.humanize(text)
+                     for text in self.scenario_manager.get_static_responses()]
+            self.tts.prerender(texts)
+        except Exception as e:
+            self.logger.warning(f"TTS pre-rendering failed: {e}")
+    
+    def process_audio(self, audio: Union[str, bytes, np.ndarray],
+                      sample_rate: Optional[int] = None,
+                      channels: Optional[int] = None) -> str:
         """
-        Process audio file through the full pipeline
+        Process audio through the full pipeline
         
         Args:
-            audio_path: Path to audio file
+            audio: Path to audio file, raw int16 PCM bytes, or NumPy buffer
+            sample_rate: Sample rate of an in-memory buffer
+                         (defaults to the audio manager's capture rate)
+            channels: Channel count of an in-memory buffer
         
         Returns:
             Response text
         """
         # 1. Speech to Text (Whisper)
         self.logger.info("Step 1: Transcribing audio...")
-        transcription = self.stt.transcribe(audio_path)
+        intent = None
+        if isinstance(audio, str):
+            transcription = self.stt.transcribe(audio)
+        else:
+            # Intent decoding may already recognise the intent while decoding
+            transcription, intent = self.stt.transcribe_intent(
+                audio,
+                sample_rate=sample_rate or self.audio_manager.last_record_rate,
+                channels=channels or self.audio_manager.last_record_channels
+            )
+        
+        return self.respond_to(transcription, intent)
+    
+    def respond_to(self, transcription: str, intent: Optional[str] = None) -> str:
+        """
+        Run intent detection and response generation on a transcript
+        
+        Args:
+            transcription: Text from the STT layer
+            intent: Intent already matched during decoding, if any
         
+        Returns:
+            Response text
+        """
         if not transcription or len(transcription.strip()) < 2:
             self.logger.warning("Empty or unclear transcription, sharing fun fact")
             return self.scenario_manager.get_response('fun_fact')
         
         # 2. Intent Detection
         self.logger.info("Step 2: Detecting intent...")
-        intent = self.intent_detector.detect(transcription)
+        if intent is None:
+            intent = self.intent_detector.detect(transcription)
+        else:
+            self.logger.info(f"Intent detected: {intent} (during transcription)")
         
         # 3. Generate Response (Scenario)
         self.logger.info("Step 3: Generating response...")
@@ -107,63 +231,163 @@ class PlutoChatbot:
         
         return response
     
-    def listen_and_respond(self):
-        """Listen to user, process, and respond"""
-        temp_audio = None
+    def _on_speech_start(self, stream: Optional[StreamingTranscriber], start: int):
+        """The user started talking: keep pre-rendering off Piper until the reply is spoken"""
+        if not self.tts_held:
+            self.tts_held = True
+            self.tts.hold_background()
+        if stream:
+            stream.set_start(start)
+    
+    def _on_partial_transcript(self, text: str):
+        """Run intent detection on a partial hypothesis during capture"""
+        self.partial_result = (text, self.intent_detector.detect(text))
+    
+    def listen(self, start_position: Optional[int] = None) -> str:
+        """
+        Record one utterance and work out the response
+        
+        Args:
+            start_position: Capture ring buffer position to record from
+                            (where a barge-in began), None for now
+        
+        Returns:
+            Response text (a fun fact if nothing was heard, the error
+            message if the pipeline failed)
+        """
+        stream = None
+        features = None
         
         try:
-            # Record audio - use fixed duration instead of silence detection
-            self.logger.info("\n🎤 Listening... (speak now, 3.5 seconds)")
-            audio_data = self.audio_manager.record_audio(duration=3.5, stop_on_silence=False)
-            
-            # If no audio detected at all, share a fun fact
-            if audio_data is None or len(audio_data) == 0:
-                self.logger.info("No audio detected, sharing a fun fact...")
-                response = self.scenario_manager.get_response("fun_fact")
-                self.speak(response)
-                return
+            # Transcribe incrementally while recording when the persistent
+            # capture stream is running (its format is known up front);
+            # intent decoding replaces it when enabled
+            if (self.stt.streaming_enabled and self.stt.intent_decoder is None
+                    and self.audio_manager.is_capturing()):
+                self.partial_result = None
+                stream = self.stt.create_stream(
+                    self.audio_manager.capture_rate,
+                    channels=self.audio_manager.capture_channels,
+                    on_partial=self._on_partial_transcript
+                )
+            elif self.stt.feature_streaming and self.audio_manager.is_capturing():
+                # Otherwise compute the log-mel features while recording
+                features = self.stt.create_feature_stream(
+                    self.audio_manager.capture_rate,
+                    channels=self.audio_manager.capture_channels
+                )
             
-            # Save to temporary file
-            temp_audio = os.path.join(self.temp_dir, "input.wav")
-            self.audio_manager.save_audio(audio_data, temp_audio)
+            # Record audio - ends shortly after the user stops talking
+            self.logger.info("\n🎤 Listening... (speak now)")
+            on_chunk = stream.feed if stream else features.feed if features else None
+            audio_data = self.audio_manager.record_audio(
+                on_chunk=on_chunk, start_position=start_position,
+                on_speech_start=functools.partial(self._on_speech_start, stream))
             
-            # Process through pipeline
-            response = self.process_audio(temp_audio)
+            # If no speech was recorded (nothing, or noise the speech gate
+            # rejects), skip Whisper and share a fun fact
+            if audio_data is None or not self.audio_manager.has_speech(audio_data):
+                if stream:
+                    stream.cancel()
+                self.logger.info("No speech detected, sharing a fun fact...")
+                return self.scenario_manager.get_response("fun_fact")
             
-            # Speak response
-            self.speak(response)
+            # Process through pipeline (in memory, no WAV round-trip)
+            if stream:
+                self.logger.info("Step 1: Finishing streaming transcription...")
+                bounds = self.audio_manager.last_utterance_bounds
+                if bounds is not None:
+                    stream.set_bounds(*bounds)
+                with tracer.span('transcribe'):
+                    transcription = stream.finish()
+                
+                # The last partial already went through intent detection
+                intent = None
+                if self.partial_result and self.partial_result[0] == transcription:
+                    intent = self.partial_result[1]
+                response = self.respond_to(transcription, intent)
+            elif features:
+                self.logger.info("Step 1: Transcribing precomputed features...")
+                bounds = self.audio_manager.last_utterance_bounds
+                if bounds is not None:
+                    features.set_bounds(*bounds)
+                response = self.respond_to(*self.stt.transcribe_intent(features=features))
+            else:
+                response = self.process_audio(audio_data)
             
+            return response
+        
         except KeyboardInterrupt:
             raise
         
         except Exception as e:
             self.logger.error(f"Error during listen/respond cycle: {e}")
-            self.speak("Sorry, I encountered an error. Please try again.")
+            if stream:
+                stream.cancel()
+            return self.scenario_manager.get_error_message()
+    
+    def listen_and_respond(self):
+        """Listen to user, process, and respond (one traced turn)"""
+        with tracer.turn():
+            response = self.listen()
+            try:
+                self.speak(response)
+            except Exception as e:
+                self.logger.error(f"Error speaking response: {e}")
+    
+    def _create_duplex_controller(self) -> Optional[DuplexController]:
+        """Full-duplex loop with barge-in, if enabled and the audio setup allows it"""
+        if not self.config['audio'].get('barge_in', {}).get('enabled', False):
+            return None
         
-        finally:
-            # Clean up temp file
-            if temp_audio and os.path.exists(temp_audio):
-                try:
-                    os.remove(temp_audio)
-                except:
-                    pass
+        controller = DuplexController(self)
+        if not controller.available:
+            self.logger.warning("Barge-in needs persistent_capture and playback_engine, "
+                                "using the turn-by-turn loop")
+            return None
+        return controller
     
     def start(self):
         """Start the chatbot main loop"""
         self.running = True
         
+        # Warm the models up while the startup message plays
+        warmup_thread = None
+        if self.config.get('system', {}).get('warmup', False):
+            warmup_thread = threading.Thread(target=self._warm_up, name="warmup", daemon=True)
+            warmup_thread.start()
+        
+        # Measure the room before Pluto starts talking
+        self.audio_manager.calibrate_speech_gate()
+        
         # Say startup message
         startup_msg = self.scenario_manager.get_startup_message()
         self.speak(startup_msg)
         
+        if warmup_thread:
+            warmup_thread.join()
+        
+        # Fill the TTS cache with every static response in the background
+        if self.tts.cache and self.tts.piper_config.get('cache', {}).get('prerender', False):
+            threading.Thread(target=self._prerender_responses,
+                             name="tts-prerender", daemon=True).start()
+        
+        if self.config_watcher is not None:
+            self.config_watcher.start()
+        
         self.logger.info("\n" + "=" * 60)
-        self.logger.info("Pluto is ready! Press Ctrl+C to stop.")
+        self.logger.info(f"Pluto is ready! ({time.monotonic() - LAUNCH_TIME:.1f}s since launch) "
+                         "Press Ctrl+C to stop.")
         self.logger.info("=" * 60 + "\n")
         
         # Main loop
         try:
-            while self.running:
-                self.listen_and_respond()
+            controller = self._create_duplex_controller()
+            if controller is not None:
+                controller.run()
+            else:
+                while self.running:
+                    self.listen_and_respond()
         
         except KeyboardInterrupt:
             self.logger.info("\nShutdown signal received")
@@ -174,6 +398,9 @@ class PlutoChatbot:
         self.logger.info("Shutting down Pluto...")
         self.running = False
         
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
+        
         # Say goodbye
         try:
             shutdown_msg = self.scenario_manager.get_shutdown_message()
@@ -182,6 +409,16 @@ class PlutoChatbot:
             pass
         
         # Cleanup
+        try:
+            self.tts.close()
+        except:
+            pass
+        
+        try:
+            self.stt.close()
+        except:
+            pass
+        
         try:
             self.audio_manager.cleanup()
         except:
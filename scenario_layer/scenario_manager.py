@@ -3,10 +3,12 @@ Scenario Layer
 Generates appropriate responses based on detected intent
 """
 
-import yaml
 import random
 import logging
-from typing import Optional
+from typing import List, Optional
+
+from utils.config import load_config
+from utils.tracing import traced
 
 
 class ScenarioManager:
@@ -17,17 +19,26 @@ class ScenarioManager:
         """Initialize scenario manager"""
         self.logger = logging.getLogger(__name__)
         
-        # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Shared configuration snapshot (parsed once for all components)
+        config = load_config(config_path)
         
-        self.responses = config['responses']
+        self.reload(config)
         
         # Load fun facts
         self.fun_facts = self._load_fun_facts(fun_facts_path)
         
         self.logger.info("Scenario manager initialized")
     
+    def reload(self, config):
+        """
+        Take the response table from a config snapshot
+        
+        Args:
+            config: Configuration with a `responses` section
+        """
+        # One reference swap; a response being built keeps the table it read
+        self.responses = config['responses']
+    
     def _load_fun_facts(self, filepath: str) -> list:
         """Load fun facts from file"""
         try:
@@ -39,6 +50,7 @@ class ScenarioManager:
             self.logger.warning(f"Fun facts file not found: {filepath}")
             return ["I'd love to share a fun fact, but I seem to have misplaced my list!"]
     
+    @traced('get_response')
     def get_response(self, intent: str, context: Optional[dict] = None) -> str:
         """
         Generate response based on intent
@@ -73,11 +85,15 @@ class ScenarioManager:
             return "I don't have any fun facts available right now."
         
         fact = random.choice(self.fun_facts)
-        response = f"Here's a fun fact for you: {fact}"
+        response = self._format_fun_fact(fact)
         
         self.logger.debug(f"Fun fact response: {response}")
         return response
     
+    @staticmethod
+    def _format_fun_fact(fact: str) -> str:
+        return f"Here's a fun fact for you: {fact}"
+    
     def _handle_fallback(self, context: Optional[dict] = None) -> str:
         """Handle unknown/fallback scenario"""
         response = self.responses['fallback']
@@ -91,3 +107,23 @@ class ScenarioManager:
     def get_shutdown_message(self) -> str:
         """Get shutdown message"""
         return self.responses.get('shutdown', "Goodbye!")
+    
+    def get_error_message(self) -> str:
+        """Get message spoken when a turn fails"""
+        return self.responses.get('error', "Sorry, I encountered an error. Please try again.")
+    
+    def get_static_responses(self) -> List[str]:
+        """
+        Get every fixed response Pluto can say
+        
+        Used to pre-render TTS audio; includes each fun fact as spoken.
+        """
+        responses = [
+            self.responses['greeting'],
+            self.responses['fallback'],
+            self.get_startup_message(),
+            self.get_shutdown_message(),
+            self.get_error_message(),
+        ]
+        responses.extend(self._format_fun_fact(fact) for fact in self.fun_facts)
+        return responses
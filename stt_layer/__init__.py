@@ -1,5 +1,6 @@
 """STT Layer Package"""
 
 from .whisper_stt import WhisperSTT
+from .streaming_stt import StreamingTranscriber
 
-__all__ = ['WhisperSTT']
+__all__ = ['WhisperSTT', 'StreamingTranscriber']
@@ -0,0 +1,150 @@
+"""
+Whisper Backend Benchmark
+Compares latency, memory and transcripts of the configured STT backends
+
+Usage:
+    python -m stt_layer.benchmark samples/ --backends torch torch-int8 torch+short
+
+A "+short" suffix runs that backend in short-clip mode; without it the
+full 30 s path is used, so "torch torch+short" validates short-clip
+transcripts against the full-length ones.
+
+Each .wav in the sample directory is transcribed by every backend. A
+matching .txt next to a clip is used as its reference transcript;
+otherwise the first backend's output is the reference. Every backend
+runs in its own process so peak RSS is measured in isolation.
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import resource
+import statistics
+import multiprocessing
+from typing import Dict, List
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercase and strip punctuation, returning the words"""
+    return re.sub(r"[^a-z0-9' ]+", ' ', text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Word error rate of a hypothesis against a reference
+    
+    Args:
+        reference: Reference transcript
+        hypothesis: Transcript to score
+    
+    Returns:
+        (substitutions + deletions + insertions) / reference words
+    """
+    ref = normalize_text(reference)
+    hyp = normalize_text(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    
+    # Single-row Levenshtein distance over words
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1,
+                                       prev + (ref_word != hyp_word))
+    return row[-1] / len(ref)
+
+
+def _run_backend(config_path: str, spec: str, clips: List[str], repeats: int) -> Dict:
+    """Load one backend and transcribe every clip (runs in a child process)"""
+    from .whisper_stt import WhisperSTT
+    
+    backend, _, mode = spec.partition('+')
+    start = time.perf_counter()
+    stt = WhisperSTT(config_path, backend=backend, short_clip=(mode == 'short'), worker=False)
+    load_seconds = time.perf_counter() - start
+    stt.warmup(runs=1)
+    
+    latencies = []
+    transcripts = {}
+    for clip in clips:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            transcripts[clip] = stt.transcribe(clip)
+            latencies.append(time.perf_counter() - start)
+    
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        'backend': stt.backend + ('+short' if stt.short_clip else ''),
+        'load_seconds': load_seconds,
+        'latencies': latencies,
+        'transcripts': transcripts,
+        'peak_rss_mb': peak_rss_mb,
+    }
+
+
+def _load_references(clips: List[str]) -> Dict[str, str]:
+    references = {}
+    for clip in clips:
+        text_path = os.path.splitext(clip)[0] + '.txt'
+        if os.path.exists(text_path):
+            with open(text_path, 'r') as f:
+                references[clip] = f.read().strip()
+    return references
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Whisper backends")
+    parser.add_argument('samples', help="Directory of .wav clips (optional .txt references)")
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-int8'])
+    parser.add_argument('--config', default='config/config.yaml')
+    parser.add_argument('--repeats', type=int, default=1, help="Timed passes per clip")
+    args = parser.parse_args(argv)
+    
+    clips = sorted(glob.glob(os.path.join(args.samples, '*.wav')))
+    if not clips:
+        print(f"No .wav files found in {args.samples}")
+        return 1
+    
+    references = _load_references(clips)
+    
+    # A fresh interpreter per backend keeps model memory from overlapping
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for backend in args.backends:
+        print(f"Running {backend} on {len(clips)} clip(s)...")
+        with context.Pool(1) as pool:
+            results.append(pool.apply(_run_backend, (args.config, backend, clips, args.repeats)))
+    
+    baseline = results[0]['transcripts']
+    source = "reference transcripts" if len(references) == len(clips) else f"{args.backends[0]} output"
+    
+    print()
+    print(f"{'backend':<12} {'load s':>7} {'mean s':>7} {'p50 s':>7} {'max s':>7} "
+          f"{'RSS MB':>7} {'WER':>6} {'exact':>6}")
+    for requested, result in zip(args.backends, results):
+        latencies = result['latencies']
+        transcripts = result['transcripts']
+        errors = [word_error_rate(references.get(clip, baseline[clip]), transcripts[clip])
+                  for clip in clips]
+        exact = sum(normalize_text(references.get(clip, baseline[clip])) ==
+                    normalize_text(transcripts[clip]) for clip in clips)
+        
+        name = requested if result['backend'] == requested else f"{requested}*"
+        print(f"{name:<12} {result['load_seconds']:>7.2f} {statistics.mean(latencies):>7.2f} "
+              f"{statistics.median(latencies):>7.2f} {max(latencies):>7.2f} "
+              f"{result['peak_rss_mb']:>7.0f} {statistics.mean(errors):>6.1%} "
+              f"{exact:>3}/{len(clips):<2}")
+    
+    print(f"\nWER and exact matches are against {source}.")
+    if any(result['backend'] != requested for requested, result in zip(args.backends, results)):
+        print("* backend or mode failed to load and fell back")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Greedy Decoding
+Minimal token-by-token Whisper decoder over precomputed audio features
+"""
+
+from typing import Callable, List, Optional
+
+# whisper and torch are imported lazily, like in whisper_stt
+
+
+class GreedyDecoder:
+    """
+    Greedy Whisper text decoder with a key/value cache
+    
+    whisper.decode() expects full 30 s encoder output and does extra work
+    (language detection, fallbacks) that a command-length turn does not
+    need. This decoder takes whatever audio features it is given, reuses
+    the self- and cross-attention cache between steps through whisper's
+    kv-cache hooks, and suppresses the same non-speech tokens.
+    """
+    
+    def __init__(self, model, language: str = "en", max_tokens: Optional[int] = None):
+        """
+        Initialize decoder
+        
+        Args:
+            model: Loaded whisper model (fp32 or quantized)
+            language: Language code
+            max_tokens: Cap on generated tokens (default: half the context)
+        """
+        import torch
+        from whisper.tokenizer import get_tokenizer
+        
+        self.model = model
+        self.tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                       language=language, task='transcribe')
+        self.sot_sequence = list(self.tokenizer.sot_sequence_including_notimestamps)
+        self.eot = self.tokenizer.eot
+        self.max_tokens = max_tokens or model.dims.n_text_ctx // 2
+        
+        # Timestamps and other special tokens are never wanted here
+        self.suppress = torch.zeros(model.dims.n_vocab)
+        self.suppress[self.eot + 1:] = float('-inf')
+        self.suppress[list(self.tokenizer.non_speech_tokens)] = float('-inf')
+        self.blank_tokens = self.tokenizer.encode(" ") + [self.eot]
+    
+    def decode(self, audio_features, prefix: Optional[List[int]] = None,
+               prompt: Optional[List[int]] = None,
+               max_tokens: Optional[int] = None,
+               logit_filter: Optional[Callable] = None,
+               should_stop: Optional[Callable[[List[int]], bool]] = None) -> List[int]:
+        """
+        Decode text tokens for one clip
+        
+        Args:
+            audio_features: Encoder output, shape (1, frames, n_audio_state)
+            prefix: Text tokens forced after the start sequence
+            prompt: Context tokens placed before the start sequence, like
+                    whisper's initial_prompt
+            max_tokens: Token cap for this call (default: the decoder's)
+            logit_filter: Called as logit_filter(logits, tokens) before each
+                          pick; returns the logits to pick from
+            should_stop: Called with the tokens after each pick; returning
+                         True ends decoding early
+        
+        Returns:
+            Generated tokens (without the prefix or end token)
+        """
+        import torch
+        
+        prefix = list(prefix or [])
+        max_tokens = max_tokens or self.max_tokens
+        step = self.sot_sequence + prefix
+        if prompt:
+            limit = self.model.dims.n_text_ctx // 2 - 1
+            step = [self.tokenizer.sot_prev] + list(prompt)[-limit:] + step
+        output: List[int] = []
+        cache, hooks = self.model.install_kv_cache_hooks()
+        
+        try:
+            with torch.no_grad():
+                while len(output) < max_tokens:
+                    tokens = torch.tensor([step], device=audio_features.device)
+                    logits = self.model.decoder(tokens, audio_features, kv_cache=cache)[0, -1]
+                    logits = logits.float().cpu() + self.suppress
+                    if not output and not prefix:
+                        logits[self.blank_tokens] = float('-inf')
+                    if logit_filter is not None:
+                        logits = logit_filter(logits, output)
+                    
+                    token = int(logits.argmax())
+                    if token == self.eot:
+                        break
+                    output.append(token)
+                    if should_stop is not None and should_stop(output):
+                        break
+                    step = [token]
+        finally:
+            for hook in hooks:
+                hook.remove()
+        
+        return output
+    
+    def detokenize(self, tokens: List[int]) -> str:
+        """Convert text tokens to a string"""
+        return self.tokenizer.decode([t for t in tokens if t < self.eot]).strip()
@@ -0,0 +1,158 @@
+"""
+Intent-Biased Decoding
+Decodes just far enough to recognise a configured intent keyword
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .decoding import GreedyDecoder
+
+
+class IntentBiasedDecoder:
+    """
+    Greedy Whisper decoding steered towards the configured intent keywords
+    
+    The intent keywords are given to the decoder as a prompt, and their
+    tokens get a logit bonus (the first token of each keyword anywhere,
+    the next token of a keyword already under way). Decoding stops once
+    a whole keyword has been emitted with enough probability and the
+    following token starts a new word, so "hi" is not cut out of "hiking".
+    Stopping early means the earliest spoken keyword wins, where
+    IntentDetector picks by intent order on the full text.
+    """
+    
+    def __init__(self, stt, intents: Dict, max_tokens: int = 24,
+                 keyword_bias: float = 2.0, min_keyword_prob: float = 0.5,
+                 use_prompt: bool = True):
+        """
+        Initialize decoder
+        
+        Args:
+            stt: Loaded WhisperSTT instance (torch backend)
+            intents: The config `intents` section
+            max_tokens: Token cap, sized for short commands
+            keyword_bias: Logit bonus for keyword tokens
+            min_keyword_prob: Mean unbiased probability a keyword's tokens
+                              need before decoding may stop on it
+            use_prompt: Put the keywords in the decoder prompt
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.stt = stt
+        self.keyword_bias = keyword_bias
+        self.min_keyword_prob = min_keyword_prob
+        self.use_prompt = use_prompt
+        
+        if stt.short_clip is not None:
+            self.decoder = stt.short_clip.decoder
+        else:
+            self.decoder = GreedyDecoder(stt.model, stt.language)
+        self.max_tokens = max_tokens
+        self.set_intents(intents)
+    
+    def set_intents(self, intents: Dict):
+        """
+        Tokenize the intent keywords (on start and on a config hot reload)
+        
+        Everything derived from the keywords is built first and swapped in
+        as one tuple, so a decode in progress keeps the set it started with.
+        
+        Args:
+            intents: The config `intents` section
+        """
+        tokenizer = self.decoder.tokenizer
+        
+        # (tokens, intent, keyword, word-initial only); Whisper tokens carry
+        # their leading space, so " hello" and "Hello" tokenize differently
+        sequences: List[Tuple[List[int], str, str, bool]] = []
+        keywords = []
+        for intent_name, intent_data in intents.items():
+            for keyword in intent_data.get('keywords', []):
+                keywords.append(keyword)
+                for variant in {keyword.lower(), keyword.capitalize()}:
+                    sequences.append((tokenizer.encode(" " + variant), intent_name, keyword, False))
+                    sequences.append((tokenizer.encode(variant), intent_name, keyword, True))
+        
+        prompt = tokenizer.encode(" " + ", ".join(keywords) + ".") if self.use_prompt and keywords else None
+        first_tokens = sorted({seq[0] for seq, _, _, initial in sequences if not initial})
+        initial_tokens = sorted({seq[0] for seq, _, _, _ in sequences})
+        
+        self._keywords = (sequences, prompt, first_tokens, initial_tokens)
+    
+    def _tail_matches(self, output: List[int], sequence: List[int], initial: bool) -> bool:
+        """Whether output ends with sequence (at the very start, if initial)"""
+        if len(output) < len(sequence):
+            return False
+        if initial and len(output) != len(sequence):
+            return False
+        return output[len(output) - len(sequence):] == sequence
+    
+    def transcribe(self, audio_features) -> Tuple[str, Optional[str]]:
+        """
+        Decode a clip, stopping early on a confident keyword
+        
+        Args:
+            audio_features: Encoder output, from WhisperSTT._encode()
+        
+        Returns:
+            (text, intent); intent is None when no keyword was matched
+            during decoding
+        """
+        import torch
+        
+        sequences, prompt, first_tokens, initial_tokens = self._keywords
+        probs: List[float] = []
+        pending: Optional[Tuple[str, str]] = None
+        matched: Optional[Tuple[str, str]] = None
+        
+        def bias_keywords(logits, output):
+            # Confidence is judged on the unbiased distribution
+            probs.append(0.0)
+            distribution = torch.softmax(logits, dim=-1)
+            
+            bonus = torch.zeros_like(logits)
+            bonus[initial_tokens if not output else first_tokens] = self.keyword_bias
+            for sequence, _, _, initial in sequences:
+                for k in range(1, len(sequence)):
+                    if self._tail_matches(output, sequence[:k], initial):
+                        bonus[sequence[k]] = self.keyword_bias
+            
+            biased = logits + bonus
+            probs[-1] = float(distribution[int(biased.argmax())])
+            return biased
+        
+        def keyword_done(output):
+            nonlocal pending, matched
+            if pending is not None:
+                # Confirmed only if the keyword is followed by a new word
+                text = self.decoder.tokenizer.decode([output[-1]])
+                if not text[:1].isalnum():
+                    matched = pending
+                    return True
+                pending = None
+            
+            for sequence, intent_name, keyword, initial in sequences:
+                if self._tail_matches(output, sequence, initial):
+                    confidence = sum(probs[-len(sequence):]) / len(sequence)
+                    if confidence >= self.min_keyword_prob:
+                        pending = (intent_name, keyword)
+                        break
+            return False
+        
+        tokens = self.decoder.decode(audio_features, prompt=prompt,
+                                     max_tokens=self.max_tokens,
+                                     logit_filter=bias_keywords, should_stop=keyword_done)
+        
+        # A keyword at the very end is confirmed by the end-of-text token
+        if matched is None and pending is not None and len(tokens) < self.max_tokens:
+            matched = pending
+        
+        text = self.decoder.detokenize(tokens)
+        if matched is None:
+            return text, None
+        
+        intent_name, keyword = matched
+        self.logger.info(f"Intent decoding stopped after {len(tokens)} tokens: "
+                         f"{intent_name} (matched: '{keyword}')")
+        return text, intent_name
@@ -0,0 +1,159 @@
+"""
+Streaming Log-Mel Front End
+Computes Whisper's input features chunk by chunk while audio is captured
+"""
+
+import os
+import importlib.util
+import numpy as np
+from typing import Optional
+
+from .whisper_stt import WHISPER_SAMPLE_RATE, WhisperSTT
+
+# Whisper's front end: 25 ms FFT, 10 ms hop, 30 s windows
+N_FFT = 400
+HOP_LENGTH = 160
+N_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+N_FRAMES = N_SAMPLES // HOP_LENGTH
+
+# log10 of the power floor, i.e. the value of a frame of pure silence
+LOG_FLOOR = -10.0
+
+
+def load_mel_filters(n_mels: int = 80) -> np.ndarray:
+    """
+    Load Whisper's mel filterbank without importing whisper (or torch)
+    
+    Args:
+        n_mels: 80, or 128 for large-v3
+    
+    Returns:
+        (n_mels, N_FFT // 2 + 1) float32 filterbank
+    """
+    spec = importlib.util.find_spec('whisper')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError("whisper is not installed")
+    path = os.path.join(list(spec.submodule_search_locations)[0], 'assets', 'mel_filters.npz')
+    with np.load(path) as filters:
+        return filters[f'mel_{n_mels}'].astype(np.float32)
+
+
+class StreamingLogMel:
+    """
+    Incremental Whisper log-mel spectrogram
+    
+    Each fed chunk is resampled to 16 kHz mono and appended to a
+    preallocated 30 s buffer. Every STFT frame whose window is complete
+    is transformed right away, in one vectorized batch per chunk, with
+    the Hann window and mel filterbank computed once. Only the final
+    normalization depends on the whole clip, so finish() has a handful of
+    frames left to do when the endpoint fires. Frames match
+    whisper.log_mel_spectrogram() on the same audio followed by silence.
+    """
+    
+    def __init__(self, mel_filters: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE,
+                 channels: int = 1):
+        """
+        Initialize a feature stream for one utterance
+        
+        Args:
+            mel_filters: (n_mels, 201) filterbank, see load_mel_filters()
+            sample_rate: Sample rate of the fed chunks
+            channels: Channel count of the fed chunks
+        """
+        self.mel_filters = mel_filters
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)  # periodic Hann
+        
+        # Samples sit after N_FFT // 2 slots for the reflected start padding
+        self._pad = N_FFT // 2
+        self._samples = np.zeros(self._pad + N_SAMPLES + N_FFT, dtype=np.float32)
+        self._log_mel = np.full((mel_filters.shape[0], N_FRAMES), LOG_FLOOR, dtype=np.float32)
+        self.num_samples = 0
+        self.frames_done = 0
+        
+        self._start = 0
+        self._end: Optional[int] = None
+    
+    def feed(self, chunk: np.ndarray):
+        """Add a chunk of int16 (or float32) audio from the recorder"""
+        audio = WhisperSTT._prepare_audio(chunk, self.sample_rate, self.channels)
+        room = N_SAMPLES - self.num_samples
+        if room <= 0 or audio.size == 0:
+            return
+        audio = audio[:room]
+        
+        offset = self._pad + self.num_samples
+        self._samples[offset:offset + audio.size] = audio
+        self.num_samples += audio.size
+        
+        # Reflect padding needs the first N_FFT // 2 + 1 samples
+        if self.num_samples <= self._pad:
+            return
+        if self.frames_done == 0:
+            self._samples[:self._pad] = self._samples[2 * self._pad:self._pad:-1]
+        
+        # Frame t spans padded samples [t * hop, t * hop + N_FFT)
+        ready = min(N_FRAMES, (self._pad + self.num_samples - N_FFT) // HOP_LENGTH + 1)
+        self._compute(self.frames_done, ready)
+    
+    def _compute(self, first: int, last: int):
+        """Transform frames [first, last) into log-mel values"""
+        if last <= first:
+            return
+        stride = self._samples.strides[0]
+        frames = np.lib.stride_tricks.as_strided(
+            self._samples[first * HOP_LENGTH:],
+            shape=(last - first, N_FFT),
+            strides=(stride * HOP_LENGTH, stride)
+        )
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        mel = self.mel_filters @ power.T.astype(np.float32)
+        self._log_mel[:, first:last] = np.log10(np.maximum(mel, 1e-10))
+        self.frames_done = max(self.frames_done, last)
+    
+    def set_bounds(self, start: int, end: int):
+        """
+        Restrict the features to the detected utterance
+        
+        Args:
+            start: Utterance start, in fed samples per channel
+            end: Utterance end, in fed samples per channel
+        """
+        scale = WHISPER_SAMPLE_RATE / self.sample_rate
+        self._start = min(self.num_samples, int(start * scale))
+        self._end = min(self.num_samples, int(end * scale))
+    
+    @property
+    def utterance_samples(self) -> int:
+        """16 kHz samples covered by the utterance"""
+        end = self.num_samples if self._end is None else self._end
+        return max(0, end - self._start)
+    
+    def finish(self, num_frames: int = N_FRAMES) -> np.ndarray:
+        """
+        Produce normalized features
+        
+        Args:
+            num_frames: Frames wanted (3000 for the full 30 s window, fewer
+                        for short-clip mode); silence fills past the audio
+        
+        Returns:
+            (n_mels, num_frames) float32 features
+        """
+        first = self._start // HOP_LENGTH
+        available = max(0, min(num_frames, N_FRAMES - first))
+        
+        if self.frames_done == 0 and self.num_samples:
+            self._samples[:self._pad] = self._samples[2 * self._pad:self._pad:-1]
+        
+        # Frames overlapping audio still need a transform (their tail is
+        # silence); frames entirely past the audio stay at the floor
+        audio_frames = min(N_FRAMES, (self.num_samples + self._pad) // HOP_LENGTH + 1)
+        self._compute(self.frames_done, min(audio_frames, first + available))
+        
+        log_spec = np.full((self._log_mel.shape[0], num_frames), LOG_FLOOR, dtype=np.float32)
+        log_spec[:, :available] = self._log_mel[:, first:first + available]
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
@@ -0,0 +1,364 @@
+"""
+ONNX Whisper Engine
+Runs Whisper on onnxruntime's CPU provider, without torch at runtime
+"""
+
+import os
+import json
+import wave
+import base64
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+from .whisper_stt import WHISPER_SAMPLE_RATE, WhisperSTT
+
+# Whisper's fixed front end: 30 s windows, 25 ms FFT, 10 ms hop
+CHUNK_SECONDS = 30
+N_SAMPLES = CHUNK_SECONDS * WHISPER_SAMPLE_RATE
+N_FFT = 400
+HOP_LENGTH = 160
+
+# Bump when the exported graphs change so stale exports are rebuilt
+EXPORT_VERSION = 1
+
+
+class OnnxWhisper:
+    """
+    Greedy Whisper decoder on onnxruntime
+    
+    The encoder graph returns each decoder layer's cross-attention keys
+    and values, so they are computed once per window. The decoder graph
+    takes and returns the self-attention cache, so every step only runs
+    the newest token. transcribe() mirrors whisper's model.transcribe()
+    closely enough for WhisperSTT to call either one; decoding is greedy
+    without temperature fallback.
+    """
+    
+    def __init__(self, model_dir: str, language: str = "en", threads: int = 0):
+        """
+        Initialize engine from an exported model directory
+        
+        Args:
+            model_dir: Directory written by export_onnx()
+            language: Language code the tokenizer file was exported for
+            threads: onnxruntime intra-op threads (0 for its default)
+        """
+        import onnxruntime as ort
+        
+        self.logger = logging.getLogger(__name__)
+        
+        with open(os.path.join(model_dir, 'meta.json'), 'r') as f:
+            self.dims = json.load(f)['dims']
+        with open(os.path.join(model_dir, f'tokenizer-{language}.json'), 'r') as f:
+            tokenizer = json.load(f)
+        
+        self.token_bytes = [base64.b64decode(t) for t in tokenizer['tokens']]
+        self.eot = tokenizer['eot']
+        self.sot_sequence = tokenizer['sot_sequence']
+        self.max_tokens = self.dims['n_text_ctx'] // 2
+        
+        # Timestamps and other special tokens are never wanted here
+        self.suppress = np.zeros(self.dims['n_vocab'], dtype=np.float32)
+        self.suppress[self.eot + 1:] = -np.inf
+        self.suppress[tokenizer['suppress_tokens']] = -np.inf
+        self.blank_tokens = tokenizer['blank_tokens']
+        
+        self.mel_filters = np.load(os.path.join(model_dir, 'mel_filters.npy'))
+        self.window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)  # periodic Hann
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        providers = ['CPUExecutionProvider']
+        self.encoder = ort.InferenceSession(os.path.join(model_dir, 'encoder.onnx'),
+                                            options, providers=providers)
+        self.decoder = ort.InferenceSession(os.path.join(model_dir, 'decoder.onnx'),
+                                            options, providers=providers)
+    
+    @classmethod
+    def load(cls, model_size: str, language: str = "en",
+             cache_dir: str = "cache/whisper/onnx", threads: int = 0) -> 'OnnxWhisper':
+        """
+        Load an exported model, exporting it first if needed
+        
+        Args:
+            model_size: Whisper model name (tiny, base, small, ...)
+            language: Language code
+            cache_dir: Directory holding one subdirectory per exported model
+            threads: onnxruntime intra-op threads (0 for its default)
+        
+        Returns:
+            Ready OnnxWhisper engine
+        """
+        model_dir = os.path.join(cache_dir, f"{model_size}-v{EXPORT_VERSION}")
+        if not is_exported(model_dir, language):
+            export_onnx(model_size, language, model_dir)
+        return cls(model_dir, language, threads)
+    
+    def log_mel(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Compute Whisper's log-mel spectrogram for one 30 s window
+        
+        Args:
+            audio: 16 kHz mono float32 audio (padded or trimmed to 30 s)
+        
+        Returns:
+            (n_mels, 3000) float32 features
+        """
+        audio = np.pad(audio[:N_SAMPLES], (0, max(0, N_SAMPLES - audio.size)))
+        
+        # Centered STFT with reflect padding, as torch.stft(center=True)
+        padded = np.pad(audio, N_FFT // 2, mode='reflect')
+        num_frames = 1 + (padded.size - N_FFT) // HOP_LENGTH
+        frames = np.lib.stride_tricks.as_strided(
+            padded, shape=(num_frames, N_FFT),
+            strides=(padded.strides[0] * HOP_LENGTH, padded.strides[0])
+        )
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = (np.abs(spectrum[:-1]) ** 2).T  # drop the last frame, like Whisper
+        
+        log_spec = np.log10(np.maximum(self.mel_filters @ power, 1e-10))
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return ((log_spec + 4.0) / 4.0).astype(np.float32)
+    
+    def decode(self, mel: np.ndarray) -> List[int]:
+        """
+        Greedy-decode one window of features
+        
+        Args:
+            mel: (n_mels, 3000) features from log_mel()
+        
+        Returns:
+            Text token ids (without the start sequence or end token)
+        """
+        cross_k, cross_v = self.encoder.run(None, {'mel': mel[np.newaxis]})
+        
+        layers = self.dims['n_text_layer']
+        state = self.dims['n_text_state']
+        self_k = np.zeros((layers, 1, 0, state), dtype=np.float32)
+        self_v = np.zeros((layers, 1, 0, state), dtype=np.float32)
+        
+        step_tokens = list(self.sot_sequence)
+        output: List[int] = []
+        
+        while len(output) < self.max_tokens:
+            logits, self_k, self_v = self.decoder.run(None, {
+                'tokens': np.array([step_tokens], dtype=np.int64),
+                'self_k': self_k,
+                'self_v': self_v,
+                'cross_k': cross_k,
+                'cross_v': cross_v,
+            })
+            
+            logits = logits[0] + self.suppress
+            if not output:
+                logits[self.blank_tokens] = -np.inf
+            
+            token = int(np.argmax(logits))
+            if token == self.eot:
+                break
+            output.append(token)
+            step_tokens = [token]
+        
+        return output
+    
+    def decode_text(self, tokens: List[int]) -> str:
+        """Convert token ids to text"""
+        data = b''.join(self.token_bytes[t] for t in tokens if t < self.eot)
+        return data.decode('utf-8', errors='replace')
+    
+    def transcribe(self, audio: Union[str, np.ndarray], **kwargs) -> Dict:
+        """
+        Transcribe a WAV file or 16 kHz mono float32 audio
+        
+        Accepts and ignores whisper's decoding keyword arguments (language,
+        fp16, ...), since the language is fixed at export time.
+        
+        Returns:
+            {'text': transcription}, like whisper's model.transcribe()
+        """
+        if isinstance(audio, str):
+            audio = load_wav(audio)
+        
+        texts = []
+        for start in range(0, max(1, audio.size), N_SAMPLES):
+            tokens = self.decode(self.log_mel(audio[start:start + N_SAMPLES]))
+            texts.append(self.decode_text(tokens))
+        
+        return {'text': ''.join(texts)}
+
+
+def load_wav(path: str) -> np.ndarray:
+    """Read a 16-bit WAV file as 16 kHz mono float32 (no ffmpeg needed)"""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit WAV is supported: {path}")
+        frames = wf.readframes(wf.getnframes())
+        return WhisperSTT._prepare_audio(frames, wf.getframerate(), wf.getnchannels())
+
+
+def is_exported(model_dir: str, language: str) -> bool:
+    """Check that every file the runtime needs is present"""
+    names = ['meta.json', 'encoder.onnx', 'decoder.onnx', 'mel_filters.npy',
+             f'tokenizer-{language}.json']
+    return all(os.path.exists(os.path.join(model_dir, name)) for name in names)
+
+
+def export_onnx(model_size: str, language: str, model_dir: str):
+    """
+    Export a Whisper model to ONNX (one-time, needs torch and whisper)
+    
+    Writes encoder.onnx, decoder.onnx, the mel filterbank, the tokenizer
+    table for the language and a meta.json with the model dimensions.
+    Graphs already present are kept, so adding a language is cheap.
+    
+    Args:
+        model_size: Whisper model name (tiny, base, small, ...)
+        language: Language code for the start-of-transcript sequence
+        model_dir: Output directory
+    """
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+    
+    logger = logging.getLogger(__name__)
+    logger.info(f"Exporting Whisper '{model_size}' to ONNX (one-time)...")
+    
+    model = whisper.load_model(model_size, device='cpu').eval()
+    dims = model.dims
+    os.makedirs(model_dir, exist_ok=True)
+    
+    encoder, decoder = _build_export_modules(model)
+    layers, state = dims.n_text_layer, dims.n_text_state
+    
+    with torch.no_grad():
+        encoder_path = os.path.join(model_dir, 'encoder.onnx')
+        if not os.path.exists(encoder_path):
+            mel = torch.zeros(1, dims.n_mels, 2 * dims.n_audio_ctx)
+            torch.onnx.export(encoder, (mel,), f"{encoder_path}.tmp",
+                              input_names=['mel'], output_names=['cross_k', 'cross_v'],
+                              opset_version=17)
+            os.replace(f"{encoder_path}.tmp", encoder_path)
+        
+        decoder_path = os.path.join(model_dir, 'decoder.onnx')
+        if not os.path.exists(decoder_path):
+            inputs = (
+                torch.zeros(1, 3, dtype=torch.long),
+                torch.zeros(layers, 1, 2, state),
+                torch.zeros(layers, 1, 2, state),
+                torch.zeros(layers, 1, dims.n_audio_ctx, state),
+                torch.zeros(layers, 1, dims.n_audio_ctx, state),
+            )
+            torch.onnx.export(
+                decoder, inputs, f"{decoder_path}.tmp",
+                input_names=['tokens', 'self_k', 'self_v', 'cross_k', 'cross_v'],
+                output_names=['logits', 'new_self_k', 'new_self_v'],
+                dynamic_axes={
+                    'tokens': {1: 'new_tokens'},
+                    'self_k': {2: 'past'},
+                    'self_v': {2: 'past'},
+                    'new_self_k': {2: 'total'},
+                    'new_self_v': {2: 'total'},
+                },
+                opset_version=17
+            )
+            os.replace(f"{decoder_path}.tmp", decoder_path)
+    
+    filters = whisper.audio.mel_filters('cpu', dims.n_mels).numpy()
+    np.save(os.path.join(model_dir, 'mel_filters.npy'), filters.astype(np.float32))
+    
+    tokenizer = get_tokenizer(model.is_multilingual, language=language, task='transcribe')
+    encoding = tokenizer.encoding
+    table = {
+        'tokens': [base64.b64encode(encoding.decode_single_token_bytes(i)).decode('ascii')
+                   if i < tokenizer.eot else ''
+                   for i in range(dims.n_vocab)],
+        'eot': tokenizer.eot,
+        'sot_sequence': list(tokenizer.sot_sequence_including_notimestamps),
+        'suppress_tokens': sorted(tokenizer.non_speech_tokens),
+        'blank_tokens': tokenizer.encode(" ") + [tokenizer.eot],
+    }
+    with open(os.path.join(model_dir, f'tokenizer-{language}.json'), 'w') as f:
+        json.dump(table, f)
+    
+    # Written last: its presence marks a complete export
+    with open(os.path.join(model_dir, 'meta.json'), 'w') as f:
+        json.dump({'model_size': model_size, 'export_version': EXPORT_VERSION,
+                   'dims': vars(dims)}, f, indent=2)
+    
+    logger.info(f"✓ ONNX export written to {model_dir}")
+
+
+def _build_export_modules(model):
+    """Wrap a Whisper model in export-friendly encoder/decoder modules"""
+    import torch
+    import torch.nn.functional as F
+    
+    def attention(q, k, v, n_head: int, mask: Optional[torch.Tensor] = None):
+        batch, length, width = q.shape
+        scale = (width // n_head) ** -0.25
+        q = q.view(batch, length, n_head, -1).permute(0, 2, 1, 3) * scale
+        k = k.view(batch, k.shape[1], n_head, -1).permute(0, 2, 3, 1) * scale
+        v = v.view(batch, v.shape[1], n_head, -1).permute(0, 2, 1, 3)
+        weights = q @ k
+        if mask is not None:
+            weights = weights + mask
+        out = F.softmax(weights, dim=-1) @ v
+        return out.permute(0, 2, 1, 3).flatten(start_dim=2)
+    
+    class Encoder(torch.nn.Module):
+        """Audio encoder plus per-layer cross-attention keys/values"""
+        
+        def __init__(self):
+            super().__init__()
+            self.encoder = model.encoder
+            self.blocks = model.decoder.blocks
+        
+        def forward(self, mel):
+            features = self.encoder(mel)
+            cross_k = torch.stack([block.cross_attn.key(features) for block in self.blocks])
+            cross_v = torch.stack([block.cross_attn.value(features) for block in self.blocks])
+            return cross_k, cross_v
+    
+    class Decoder(torch.nn.Module):
+        """Text decoder step with an explicit self-attention cache"""
+        
+        def __init__(self):
+            super().__init__()
+            self.decoder = model.decoder
+        
+        def forward(self, tokens, self_k, self_v, cross_k, cross_v):
+            decoder = self.decoder
+            past = self_k.shape[2]
+            count = tokens.shape[1]
+            
+            x = decoder.token_embedding(tokens) + decoder.positional_embedding[past:past + count]
+            
+            # New token i sits at position past + i and sees everything up to it
+            rows = torch.arange(count) + past
+            cols = torch.arange(past + count)
+            mask = (cols[None, :] > rows[:, None]).to(x.dtype) * -1e9
+            
+            new_k, new_v = [], []
+            for i, block in enumerate(decoder.blocks):
+                h = block.attn_ln(x)
+                k = torch.cat([self_k[i], block.attn.key(h)], dim=1)
+                v = torch.cat([self_v[i], block.attn.value(h)], dim=1)
+                new_k.append(k)
+                new_v.append(v)
+                x = x + block.attn.out(attention(block.attn.query(h), k, v,
+                                                 block.attn.n_head, mask))
+                
+                h = block.cross_attn_ln(x)
+                x = x + block.cross_attn.out(attention(block.cross_attn.query(h),
+                                                       cross_k[i], cross_v[i],
+                                                       block.cross_attn.n_head))
+                x = x + block.mlp(block.mlp_ln(x))
+            
+            x = decoder.ln(x[:, -1])
+            logits = x @ decoder.token_embedding.weight.T
+            return logits, torch.stack(new_k), torch.stack(new_v)
+    
+    return Encoder().eval(), Decoder().eval()
@@ -0,0 +1,88 @@
+"""
+Whisper Quantization
+Dynamic int8 quantization of Whisper's linear layers, cached on disk
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the quantization recipe changes so stale caches are rebuilt
+QUANTIZATION_VERSION = 1
+
+
+def quantize_model(model):
+    """
+    Apply dynamic int8 quantization to every linear layer
+    
+    Weights are stored as int8 and activations are quantized on the fly,
+    which cuts memory traffic for the attention and MLP projections that
+    dominate Whisper's CPU time. Convolutions and the token embedding
+    (also used for the output projection) stay in float32.
+    
+    Args:
+        model: Loaded float32 Whisper model on the CPU
+    
+    Returns:
+        Quantized model in eval mode
+    """
+    import torch
+    import whisper.model
+    
+    # Whisper's Linear subclass only adds dtype casting for fp16; the
+    # quantizer matches exact nn.Linear types, so present them as such
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _cache_path(cache_dir: str, model_size: str) -> str:
+    import torch
+    return os.path.join(cache_dir, f"{model_size}-int8-v{QUANTIZATION_VERSION}"
+                                   f"-torch{torch.__version__.split('+')[0]}.pt")
+
+
+def load_quantized_model(model_size: str, cache_dir: str = "cache/whisper"):
+    """
+    Load an int8 Whisper model, quantizing and caching it on first use
+    
+    The whole quantized module is cached, so later boots skip both the
+    float32 checkpoint load and the quantization pass.
+    
+    Args:
+        model_size: Whisper model name (tiny, base, small, ...)
+        cache_dir: Directory for quantized models
+    
+    Returns:
+        Quantized Whisper model (CPU only)
+    """
+    import torch
+    import whisper
+    
+    path = _cache_path(cache_dir, model_size)
+    
+    if os.path.exists(path):
+        try:
+            model = torch.load(path, map_location='cpu', weights_only=False)
+            logger.info(f"Loaded quantized Whisper model from {path}")
+            return model
+        except Exception as e:
+            logger.warning(f"Quantized model cache unusable, rebuilding: {e}")
+    
+    logger.info(f"Quantizing Whisper model '{model_size}' to int8 (one-time)...")
+    model = quantize_model(whisper.load_model(model_size, device='cpu'))
+    
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        torch.save(model, temp_path)
+        os.replace(temp_path, path)
+        logger.info(f"Cached quantized model at {path}")
+    except Exception as e:
+        logger.warning(f"Could not cache quantized model: {e}")
+    
+    return model
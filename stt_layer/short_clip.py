@@ -0,0 +1,111 @@
+"""
+Short-Clip Transcription
+Encodes only the mel frames that cover the audio instead of a full 30 s window
+"""
+
+import math
+import logging
+import numpy as np
+from typing import List, Optional
+
+from .decoding import GreedyDecoder
+from .whisper_stt import WHISPER_SAMPLE_RATE
+
+# Mel hop in samples; the encoder's second convolution halves the frame rate
+HOP_LENGTH = 160
+MAX_FRAMES = 3000
+
+
+class ShortClipTranscriber:
+    """
+    Whisper transcription with a truncated encoder input
+    
+    Whisper pads every input to 3000 mel frames (30 s) and encodes all
+    1500 positions, although a 4 s command only occupies about 200 of
+    them. Here the mel is cut after the audio plus a margin of silence,
+    and the encoder runs with its positional embedding sliced to that
+    length. The margin keeps the decoder seeing a stretch of silence at
+    the end, which is what lets it stop cleanly. Accuracy should be
+    checked against the full path with
+    `python -m stt_layer.benchmark samples/ --backends torch torch+short`.
+    """
+    
+    def __init__(self, model, language: str = "en", margin_seconds: float = 1.0):
+        """
+        Initialize transcriber
+        
+        Args:
+            model: Loaded whisper model (fp32 or quantized)
+            language: Language code
+            margin_seconds: Silence appended after the audio
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.model = model
+        self.margin_samples = int(margin_seconds * WHISPER_SAMPLE_RATE)
+        self.decoder = GreedyDecoder(model, language)
+    
+    def num_frames(self, num_samples: int) -> int:
+        """Mel frames encoded for a clip (even, so the conv stride divides it)"""
+        frames = math.ceil((num_samples + self.margin_samples) / HOP_LENGTH)
+        return min(MAX_FRAMES, frames + frames % 2)
+    
+    def log_mel(self, audio: np.ndarray):
+        """
+        Log-mel features for the clip plus margin
+        
+        Silence is appended before the STFT, so the frames are the same
+        as the first frames of the full 30 s path.
+        """
+        import torch
+        import whisper
+        
+        frames = self.num_frames(audio.size)
+        padding = frames * HOP_LENGTH - audio.size
+        mel = whisper.log_mel_spectrogram(torch.from_numpy(audio), n_mels=self.model.dims.n_mels,
+                                          padding=max(0, padding))
+        return mel[:, :frames]
+    
+    def encode(self, mel):
+        """
+        Run the audio encoder over a truncated mel
+        
+        Args:
+            mel: (n_mels, frames) features
+        
+        Returns:
+            Audio features, shape (1, frames // 2, n_audio_state)
+        """
+        import torch
+        import torch.nn.functional as F
+        
+        encoder = self.model.encoder
+        with torch.no_grad():
+            x = mel.unsqueeze(0).to(self.model.device)
+            x = F.gelu(encoder.conv1(x))
+            x = F.gelu(encoder.conv2(x))
+            x = x.permute(0, 2, 1)
+            
+            # Same as AudioEncoder.forward, minus its full-length shape check
+            x = (x + encoder.positional_embedding[:x.shape[1]]).to(x.dtype)
+            for block in encoder.blocks:
+                x = block(x)
+            return encoder.ln_post(x)
+    
+    def decode_tokens(self, audio: np.ndarray, prefix: Optional[List[int]] = None) -> List[int]:
+        """
+        Encode a clip and greedy-decode it
+        
+        Args:
+            audio: 16 kHz mono float32 audio
+            prefix: Text tokens forced after the start sequence
+        
+        Returns:
+            Generated tokens (without the prefix)
+        """
+        features = self.encode(self.log_mel(audio))
+        return self.decoder.decode(features, prefix=prefix)
+    
+    def transcribe(self, audio: np.ndarray) -> str:
+        """Transcribe a clip of 16 kHz mono float32 audio"""
+        return self.decoder.detokenize(self.decode_tokens(audio))
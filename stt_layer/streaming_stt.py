@@ -0,0 +1,214 @@
+"""
+Streaming Speech-to-Text
+Incrementally transcribes an utterance while it is still being recorded
+"""
+
+import logging
+import threading
+import numpy as np
+from typing import Callable, List, Optional
+
+from .whisper_stt import WHISPER_SAMPLE_RATE
+
+
+class StreamingTranscriber:
+    """
+    Incremental Whisper transcription over growing, overlapping windows
+    
+    Audio is fed chunk by chunk while capture runs. Nothing is decoded
+    until set_start() marks where the endpointer found speech, so the
+    silence before the user talks cannot produce (and commit) a Whisper
+    hallucination. From then on a background thread re-decodes the
+    utterance every `step_seconds`; tokens on which two consecutive
+    hypotheses agree are committed and forced as the decoder prefix on
+    later passes, so earlier words stay stable and each pass only has to
+    decode the tail. finish() runs one last pass over the endpointed
+    utterance (see set_bounds()), which is short because most of the text
+    is already committed.
+    """
+    
+    def __init__(self, stt, sample_rate: int, channels: int = 1,
+                 step_seconds: float = 1.0, min_audio_seconds: float = 0.5,
+                 on_partial: Optional[Callable[[str], None]] = None):
+        """
+        Initialize a streaming session for one utterance
+        
+        Args:
+            stt: Loaded WhisperSTT instance
+            sample_rate: Sample rate of the fed chunks
+            channels: Channel count of the fed chunks
+            step_seconds: Interval between incremental decodes
+            min_audio_seconds: Audio needed before the first decode
+            on_partial: Called with each new partial hypothesis
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.stt = stt
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.step_seconds = step_seconds
+        self.min_samples = int(min_audio_seconds * WHISPER_SAMPLE_RATE)
+        self.on_partial = on_partial
+        
+        self._options = dict(language=stt.language, fp16=False,
+                             without_timestamps=True)
+        
+        self._chunks: List[np.ndarray] = []
+        self._num_samples = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._lock = threading.Lock()
+        self._new_audio = threading.Event()
+        self._stopped = threading.Event()
+        
+        self.committed_tokens: List[int] = []
+        self._previous_tokens: List[int] = []
+        self.partial_text = ""
+        self.decode_passes = 0
+        
+        self._thread = threading.Thread(target=self._run, name="stt-stream", daemon=True)
+        self._thread.start()
+    
+    def feed(self, chunk: np.ndarray):
+        """Add a chunk of int16 (or float32) audio from the recorder"""
+        audio = self.stt._prepare_audio(chunk, self.sample_rate, self.channels)
+        with self._lock:
+            self._chunks.append(audio)
+            self._num_samples += audio.size
+        self._new_audio.set()
+    
+    def set_start(self, start: int):
+        """
+        Start decoding from the utterance onset
+        
+        Args:
+            start: Utterance start (pre-roll included), in fed samples
+                   per channel
+        """
+        self._start = int(start * WHISPER_SAMPLE_RATE / self.sample_rate)
+        self._new_audio.set()
+    
+    def set_bounds(self, start: int, end: int):
+        """
+        Restrict the final decode to the endpointed utterance
+        
+        Args:
+            start: Utterance start, in fed samples per channel
+            end: Utterance end, in fed samples per channel
+        """
+        self.set_start(start)
+        self._end = int(end * WHISPER_SAMPLE_RATE / self.sample_rate)
+    
+    def _audio(self) -> np.ndarray:
+        """Fed audio from the utterance start (to its end once known)"""
+        with self._lock:
+            if len(self._chunks) > 1:
+                self._chunks = [np.concatenate(self._chunks)]
+            audio = self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+        return audio[self._start or 0:self._end]
+    
+    def _run(self):
+        """Background loop: decode the growing window every step"""
+        decoded_samples = 0
+        step_samples = int(self.step_seconds * WHISPER_SAMPLE_RATE)
+        
+        while not self._stopped.is_set():
+            self._new_audio.wait(timeout=self.step_seconds)
+            self._new_audio.clear()
+            
+            # Wait for speech; until then the window is only silence
+            if self._start is None:
+                continue
+            available = self._num_samples - self._start
+            if available < self.min_samples or available - decoded_samples < step_samples:
+                continue
+            
+            try:
+                tokens = self._decode(self._audio())
+            except Exception as e:
+                self.logger.error(f"Streaming decode error: {e}")
+                continue
+            
+            decoded_samples = available
+            self._update_hypothesis(tokens)
+    
+    def _decode(self, audio: np.ndarray) -> List[int]:
+        """Decode the window with the committed tokens forced as prefix"""
+        import whisper
+        
+        prefix = list(self.committed_tokens)
+        if self.stt.short_clip is not None and audio.size <= self.stt.short_clip_max_samples:
+            tokens = self.stt.short_clip.decode_tokens(audio, prefix=prefix)
+            self.decode_passes += 1
+            return prefix + tokens
+        
+        model = self.stt.model
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio),
+                                          n_mels=model.dims.n_mels).to(model.device)
+        options = whisper.DecodingOptions(prefix=prefix or None, **self._options)
+        result = whisper.decode(model, mel, options)
+        self.decode_passes += 1
+        # Decoded tokens exclude the forced prefix
+        return prefix + list(result.tokens)
+    
+    def _update_hypothesis(self, tokens: List[int]):
+        """Commit the prefix two consecutive hypotheses agree on"""
+        stable = 0
+        for new, old in zip(tokens, self._previous_tokens):
+            if new != old:
+                break
+            stable += 1
+        
+        if stable > len(self.committed_tokens):
+            self.committed_tokens = tokens[:stable]
+        self._previous_tokens = tokens
+        
+        text = self._detokenize(tokens)
+        if text and text != self.partial_text:
+            self.partial_text = text
+            self.logger.debug(f"Partial transcription: '{text}' "
+                              f"({len(self.committed_tokens)} tokens committed)")
+            if self.on_partial:
+                try:
+                    self.on_partial(text)
+                except Exception as e:
+                    self.logger.warning(f"Partial hypothesis callback failed: {e}")
+    
+    def _detokenize(self, tokens: List[int]) -> str:
+        import whisper
+        
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            self.stt.model.is_multilingual, language=self.stt.language, task='transcribe')
+        return tokenizer.decode([t for t in tokens if t < tokenizer.eot]).strip()
+    
+    def finish(self) -> str:
+        """
+        Stop streaming and produce the final transcript
+        
+        Returns:
+            Transcribed text
+        """
+        self._stopped.set()
+        self._new_audio.set()
+        self._thread.join()
+        
+        audio = self._audio()
+        if audio.size == 0:
+            return ""
+        
+        try:
+            tokens = self._decode(audio)
+        except Exception as e:
+            self.logger.error(f"Transcription error: {e}")
+            return self.partial_text
+        
+        text = self._detokenize(tokens)
+        self.logger.info(f"Transcription: '{text}' ({self.decode_passes} passes, "
+                         f"{len(self.committed_tokens)} tokens pre-committed)")
+        return text
+    
+    def cancel(self):
+        """Stop streaming without a final decode"""
+        self._stopped.set()
+        self._new_audio.set()
+        self._thread.join()
@@ -0,0 +1,230 @@
+"""
+Out-of-Process STT Worker
+Runs Whisper in its own process, with audio handed over through shared memory
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from .whisper_stt import WHISPER_SAMPLE_RATE
+
+
+def _worker_main(config_path: str, shm_name: str, conn, threads: int,
+                 cpus: List[int], nice: int, log_level: int):
+    """Worker process: load Whisper, then serve requests until told to stop"""
+    logging.basicConfig(level=log_level,
+                        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    logger = logging.getLogger(__name__)
+    
+    # Set before torch is imported so its OpenMP pool is sized to match
+    if threads:
+        for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+            os.environ[name] = str(threads)
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    if nice:
+        os.nice(nice)
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    audio_buffer = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+    
+    try:
+        from .whisper_stt import WhisperSTT
+        stt = WhisperSTT(config_path, worker=False)
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    
+    conn.send(('ready', stt.backend))
+    logger.info(f"STT worker ready (pid {os.getpid()}, threads {threads or 'default'}, "
+                f"cpus {cpus or 'any'})")
+    
+    while True:
+        try:
+            kind, argument = conn.recv()
+        except EOFError:
+            break
+        if kind == 'stop':
+            break
+        
+        try:
+            if kind == 'audio':
+                # Copied out so the parent may reuse the buffer right away
+                result = stt.transcribe_intent(audio_buffer[:argument].copy())
+            elif kind == 'file':
+                result = (stt.transcribe(argument), None)
+            else:
+                raise ValueError(f"unknown request '{kind}'")
+            conn.send(('ok', result))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+    
+    del audio_buffer
+    shm.close()
+
+
+class STTWorker:
+    """
+    Whisper in a dedicated process
+    
+    Inference no longer competes with audio capture and playback for the
+    GIL, and the worker's torch thread count, CPU affinity and priority
+    can be set so it leaves a core to the real-time audio threads.
+    
+    Audio is converted to 16 kHz mono float32 in the caller and copied
+    into a shared-memory block the parent owns; only the sample count
+    goes over the pipe. One request is in flight at a time (requests
+    queue on a single dispatcher thread) and each returns a Future. A
+    worker that dies is restarted on the next request.
+    """
+    
+    def __init__(self, config_path: str, threads: int = 0,
+                 cpus: Optional[List[int]] = None, nice: int = 0,
+                 max_seconds: float = 30.0, start_timeout: float = 600.0):
+        """
+        Initialize the worker (the process starts with start())
+        
+        Args:
+            config_path: Configuration the worker's WhisperSTT loads
+            threads: torch threads in the worker (0 keeps torch's default)
+            cpus: CPUs the worker may run on (None or empty for any)
+            nice: Niceness added to the worker process
+            max_seconds: Longest clip that can be handed over; sizes the
+                         shared-memory block
+            start_timeout: Seconds to wait for the model to load
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.config_path = config_path
+        self.threads = threads
+        self.cpus = list(cpus or [])
+        self.nice = nice
+        self.start_timeout = start_timeout
+        
+        self.shm = shared_memory.SharedMemory(create=True,
+                                              size=int(max_seconds * WHISPER_SAMPLE_RATE) * 4)
+        self.audio_buffer = np.ndarray((self.shm.size // 4,), dtype=np.float32, buffer=self.shm.buf)
+        
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn = None
+        self.backend: Optional[str] = None
+        self.restarts = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt-worker")
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config_path: str, worker_config: dict) -> 'STTWorker':
+        """Build a worker from the `whisper.worker` config section"""
+        return cls(config_path,
+                   threads=worker_config.get('threads', 0),
+                   cpus=worker_config.get('cpus'),
+                   nice=worker_config.get('nice', 0),
+                   max_seconds=worker_config.get('max_seconds', 30.0))
+    
+    def start(self):
+        """Spawn the worker and wait until its model is loaded"""
+        context = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, name="stt-worker", daemon=True,
+            args=(self.config_path, self.shm.name, child_conn, self.threads,
+                  self.cpus, self.nice, logging.getLogger().getEffectiveLevel())
+        )
+        self.process.start()
+        child_conn.close()
+        
+        if not parent_conn.poll(self.start_timeout):
+            self._terminate()
+            raise TimeoutError("STT worker did not load its model in time")
+        try:
+            status, detail = parent_conn.recv()
+        except EOFError:
+            status, detail = 'error', f"exited with code {self.process.exitcode}"
+        if status != 'ready':
+            self._terminate()
+            raise RuntimeError(f"STT worker failed to start: {detail}")
+        
+        self.conn = parent_conn
+        self.backend = detail
+        self.logger.info(f"✓ STT worker started (pid {self.process.pid}, {self.backend})")
+    
+    def transcribe_async(self, audio: Union[str, np.ndarray]) -> Future:
+        """
+        Queue a transcription
+        
+        Args:
+            audio: 16 kHz mono float32 audio, or a path to an audio file
+        
+        Returns:
+            Future of (text, intent); intent is None unless intent
+            decoding matched a keyword
+        """
+        return self._executor.submit(self._transcribe, audio)
+    
+    def _transcribe(self, audio: Union[str, np.ndarray]) -> Tuple[str, Optional[str]]:
+        if isinstance(audio, str):
+            return tuple(self._request('file', os.path.abspath(audio)))
+        
+        count = min(audio.size, self.audio_buffer.size)
+        if count < audio.size:
+            self.logger.warning(f"Clip longer than the worker buffer, keeping the first "
+                                f"{count / WHISPER_SAMPLE_RATE:.0f}s")
+        self.audio_buffer[:count] = audio[:count]
+        return tuple(self._request('audio', count))
+    
+    def _request(self, kind: str, argument):
+        """Send one request and wait for its reply (dispatcher thread only)"""
+        with self._lock:
+            if self.process is None or not self.process.is_alive():
+                self.restarts += 1
+                self.logger.warning(f"STT worker not running, restarting (restart {self.restarts})")
+                self._terminate()
+                self.start()
+            
+            try:
+                self.conn.send((kind, argument))
+                status, result = self.conn.recv()
+            except (EOFError, OSError) as e:
+                self._terminate()
+                raise RuntimeError(f"STT worker died: {e}") from e
+        
+        if status != 'ok':
+            raise RuntimeError(f"STT worker error: {result}")
+        return result
+    
+    def _terminate(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join(timeout=5)
+            self.process = None
+    
+    def close(self):
+        """Stop the worker and free the shared memory"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self.conn is not None and self.process is not None and self.process.is_alive():
+                try:
+                    self.conn.send(('stop', None))
+                    self.process.join(timeout=5)
+                except OSError:
+                    pass
+            self._terminate()
+        
+        del self.audio_buffer
+        self.shm.close()
+        self.shm.unlink()
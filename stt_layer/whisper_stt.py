@@ -3,33 +3,163 @@ Speech-to-Text Layer (Whisper)
 Converts audio to text using OpenAI Whisper
 """
 
-import whisper
 import logging
-import yaml
 import os
+import time
+import multiprocessing
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from utils.config import load_config
+from utils.tracing import traced
+
+# whisper (and torch behind it) is imported when the model is loaded, so
+# importing this package stays cheap and can overlap other startup work
+
+# Whisper models are trained on 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
 
 
 class WhisperSTT:
     """Speech-to-Text using Whisper"""
     
-    def __init__(self, config_path: str = "config/config.yaml"):
-        """Initialize Whisper STT"""
+    def __init__(self, config_path: str = "config/config.yaml",
+                 backend: Optional[str] = None, short_clip: Optional[bool] = None,
+                 worker: Optional[bool] = None):
+        """
+        Initialize Whisper STT
+        
+        Args:
+            config_path: Path to configuration file
+            backend: Override for whisper.backend ("torch", "torch-int8"
+                     or "onnx")
+            short_clip: Override for whisper.short_clip.enabled
+            worker: Override for whisper.worker.enabled
+        """
         self.logger = logging.getLogger(__name__)
         
-        # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Shared configuration snapshot (parsed once for all components)
+        config = load_config(config_path)
         
         self.whisper_config = config['whisper']
         self.model_size = self.whisper_config['model_size']
         self.language = self.whisper_config['language']
         self.device = self.whisper_config['device']
+        self.backend = backend or self.whisper_config.get('backend', 'torch')
+        self.streaming_config = self.whisper_config.get('streaming', {}) or {}
+        self.streaming_enabled = self.streaming_config.get('enabled', False)
+        self.feature_streaming = self.whisper_config.get('streaming_features', False)
+        self._mel_filters = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        self.short_clip = None
+        self.intent_decoder = None
+        short_clip_config = self.whisper_config.get('short_clip', {}) or {}
+        if short_clip is None:
+            short_clip = short_clip_config.get('enabled', False)
+        self.short_clip_max_samples = int(short_clip_config.get('max_seconds', 10.0) *
+                                          WHISPER_SAMPLE_RATE)
+        
+        # Optionally run the model in a dedicated process instead
+        self.worker = None
+        worker_config = self.whisper_config.get('worker', {}) or {}
+        if worker is None:
+            worker = worker_config.get('enabled', False)
+        if worker and multiprocessing.current_process().daemon:
+            self.logger.info("STT worker unavailable in a daemonic process, loading in-process")
+            worker = False
+        if worker:
+            from .stt_worker import STTWorker
+            self.worker = STTWorker.from_config(config_path, worker_config)
+            try:
+                self.worker.start()
+            except Exception as e:
+                self.logger.error(f"STT worker unavailable, loading in-process: {e}")
+                self.worker.close()
+                self.worker = None
+        
+        if self.worker is not None:
+            self.backend = self.worker.backend
+            self.model = None
+            # Streaming and precomputed features need the model in this process
+            self.streaming_enabled = False
+            self.feature_streaming = False
+            return
         
         # Load Whisper model
-        self.logger.info(f"Loading Whisper model: {self.model_size}")
-        self.model = whisper.load_model(self.model_size, device=self.device)
+        self.logger.info(f"Loading Whisper model: {self.model_size} ({self.backend})")
+        self.model = self._load_model()
         self.logger.info("Whisper model loaded successfully")
+        
+        if short_clip:
+            if self.backend == 'onnx':
+                self.logger.info("Short-clip mode needs a torch backend, disabling")
+            else:
+                from .short_clip import ShortClipTranscriber
+                self.short_clip = ShortClipTranscriber(
+                    self.model, self.language,
+                    margin_seconds=short_clip_config.get('margin_seconds', 1.0)
+                )
+        
+        intent_config = self.whisper_config.get('intent_decoding', {}) or {}
+        if intent_config.get('enabled', False):
+            if self.backend == 'onnx':
+                self.logger.info("Intent decoding needs a torch backend, disabling")
+            else:
+                from .intent_decoding import IntentBiasedDecoder
+                self.intent_decoder = IntentBiasedDecoder(
+                    self, config.get('intents', {}),
+                    max_tokens=intent_config.get('max_tokens', 24),
+                    keyword_bias=intent_config.get('keyword_bias', 2.0),
+                    min_keyword_prob=intent_config.get('min_keyword_prob', 0.5),
+                    use_prompt=intent_config.get('prompt', True)
+                )
+        
+        if self.feature_streaming and self.streaming_enabled and self.intent_decoder is None:
+            self.logger.info("streaming_features has no effect while streaming transcription is on")
+    
+    def _load_model(self):
+        """Load the model for the configured backend"""
+        if self.backend == 'onnx':
+            try:
+                from .onnx_whisper import OnnxWhisper
+                model = OnnxWhisper.load(
+                    self.model_size, self.language,
+                    self.whisper_config.get('onnx_dir', 'cache/whisper/onnx'),
+                    threads=self.whisper_config.get('onnx_threads', 0)
+                )
+                # Incremental decoding drives whisper's torch decoder directly
+                if self.streaming_enabled:
+                    self.logger.info("Streaming transcription is not available with onnx, disabling")
+                    self.streaming_enabled = False
+                return model
+            except Exception as e:
+                self.logger.error(f"ONNX model unavailable, using torch: {e}")
+                self.backend = 'torch'
+        
+        import whisper
+        
+        if self.backend == 'torch-int8':
+            if self.device != 'cpu':
+                self.logger.warning("int8 quantization is CPU only, ignoring device setting")
+                self.device = 'cpu'
+            try:
+                from .quantization import load_quantized_model
+                return load_quantized_model(
+                    self.model_size,
+                    self.whisper_config.get('quantized_cache_dir', 'cache/whisper')
+                )
+            except Exception as e:
+                self.logger.error(f"Quantized model unavailable, using full precision: {e}")
+                self.backend = 'torch'
+        elif self.backend != 'torch':
+            self.logger.warning(f"Unknown Whisper backend '{self.backend}', using torch")
+            self.backend = 'torch'
+        
+        return whisper.load_model(self.model_size, device=self.device)
     
+    @traced('transcribe')
     def transcribe(self, audio_path: str) -> str:
         """
         Transcribe audio file to text
@@ -48,13 +178,46 @@ class WhisperSTT:
         
         try:
             # Transcribe using Whisper
-            result = self.model.transcribe(
-                audio_path,
-                language=self.language,
-                fp16=False  # Use FP32 for CPU
-            )
+            text = self._run_model(audio_path)
+            self.logger.info(f"Transcription: '{text}'")
             
-            text = result['text'].strip()
+            return text
+        
+        except Exception as e:
+            self.logger.error(f"Transcription error: {e}")
+            return ""
+    
+    @traced('transcribe')
+    def transcribe_raw(self, audio_data: Union[bytes, np.ndarray],
+                       sample_rate: int = WHISPER_SAMPLE_RATE,
+                       channels: int = 1) -> str:
+        """
+        Transcribe in-memory audio without a WAV round-trip
+        
+        Args:
+            audio_data: Raw int16 PCM bytes, or a NumPy array (int16 or
+                        float32 in [-1, 1])
+            sample_rate: Sample rate of audio_data
+            channels: Number of interleaved channels in audio_data
+        
+        Returns:
+            Transcribed text
+        """
+        try:
+            audio = self._prepare_audio(audio_data, sample_rate, channels)
+        except Exception as e:
+            self.logger.error(f"Invalid audio buffer: {e}")
+            return ""
+        
+        if audio.size == 0:
+            self.logger.warning("Empty audio buffer, nothing to transcribe")
+            return ""
+        
+        self.logger.info(f"Transcribing {audio.size / WHISPER_SAMPLE_RATE:.2f}s of in-memory audio")
+        
+        try:
+            # Whisper accepts a float32 array directly, skipping ffmpeg
+            text = self._run_model(audio)
             self.logger.info(f"Transcription: '{text}'")
             
             return text
@@ -63,17 +226,307 @@ class WhisperSTT:
             self.logger.error(f"Transcription error: {e}")
             return ""
     
-    def transcribe_raw(self, audio_data: bytes, sample_rate: int = 16000) -> str:
+    @traced('transcribe')
+    def transcribe_features(self, features) -> str:
         """
-        Transcribe raw audio data (not yet implemented - requires temp file)
+        Transcribe from log-mel features computed during capture
         
         Args:
-            audio_data: Raw audio bytes
-            sample_rate: Audio sample rate
+            features: StreamingLogMel fed with the recording
         
         Returns:
             Transcribed text
         """
-        # This would require saving to temp file first
-        # For now, use transcribe() with saved file
-        raise NotImplementedError("Use transcribe() with audio file path")
+        if features.utterance_samples == 0:
+            self.logger.warning("Empty audio buffer, nothing to transcribe")
+            return ""
+        
+        self.logger.info(f"Transcribing {features.utterance_samples / WHISPER_SAMPLE_RATE:.2f}s "
+                         f"from precomputed features")
+        
+        try:
+            if self.backend == 'onnx':
+                text = self.model.decode_text(self.model.decode(features.finish()))
+            elif self.short_clip is not None and features.utterance_samples <= self.short_clip_max_samples:
+                decoder = self.short_clip.decoder
+                text = decoder.detokenize(decoder.decode(self._encode(features=features)))
+            else:
+                import torch
+                import whisper
+                mel = torch.from_numpy(features.finish()).to(self.model.device)
+                options = whisper.DecodingOptions(language=self.language, fp16=False,
+                                                  without_timestamps=True)
+                text = whisper.decode(self.model, mel, options).text
+            
+            text = text.strip()
+            self.logger.info(f"Transcription: '{text}'")
+            return text
+        
+        except Exception as e:
+            self.logger.error(f"Transcription error: {e}")
+            return ""
+    
+    @traced('transcribe')
+    def transcribe_intent(self, audio_data: Union[bytes, np.ndarray, None] = None,
+                          sample_rate: int = WHISPER_SAMPLE_RATE,
+                          channels: int = 1, features=None) -> Tuple[str, Optional[str]]:
+        """
+        Transcribe in-memory audio with intent-biased decoding
+        
+        Falls back to transcribe_raw() (or transcribe_features()) when
+        intent decoding is disabled.
+        
+        Args:
+            audio_data: Raw int16 PCM bytes, or a NumPy array
+            sample_rate: Sample rate of audio_data
+            channels: Number of interleaved channels in audio_data
+            features: StreamingLogMel to use instead of audio_data
+        
+        Returns:
+            (text, intent); intent is None if no keyword was matched while
+            decoding, in which case the caller should detect it from text
+        """
+        if self.worker is not None and features is None:
+            try:
+                text, intent = self.transcribe_async(audio_data, sample_rate, channels).result()
+            except Exception as e:
+                self.logger.error(f"Transcription error: {e}")
+                return "", None
+            self.logger.info(f"Transcription: '{text}'")
+            return text, intent
+        
+        if self.intent_decoder is None:
+            if features is not None:
+                return self.transcribe_features(features), None
+            return self.transcribe_raw(audio_data, sample_rate, channels), None
+        
+        audio = None
+        if features is not None:
+            num_samples = features.utterance_samples
+        else:
+            try:
+                audio = self._prepare_audio(audio_data, sample_rate, channels)
+            except Exception as e:
+                self.logger.error(f"Invalid audio buffer: {e}")
+                return "", None
+            num_samples = audio.size
+        
+        if num_samples == 0:
+            self.logger.warning("Empty audio buffer, nothing to transcribe")
+            return "", None
+        
+        self.logger.info(f"Transcribing {num_samples / WHISPER_SAMPLE_RATE:.2f}s with intent decoding")
+        
+        try:
+            text, intent = self.intent_decoder.transcribe(self._encode(audio, features))
+            self.logger.info(f"Transcription: '{text}'")
+            return text, intent
+        
+        except Exception as e:
+            self.logger.error(f"Transcription error: {e}")
+            return "", None
+    
+    def transcribe_async(self, audio_data: Union[bytes, np.ndarray],
+                         sample_rate: int = WHISPER_SAMPLE_RATE,
+                         channels: int = 1) -> Future:
+        """
+        Start transcribing in-memory audio and return immediately
+        
+        With the worker process the caller's process stays free (capture
+        keeps running at full speed); otherwise the transcription runs
+        on a background thread here.
+        
+        Args:
+            audio_data: Raw int16 PCM bytes, or a NumPy array
+            sample_rate: Sample rate of audio_data
+            channels: Number of interleaved channels in audio_data
+        
+        Returns:
+            Future of (text, intent), as returned by transcribe_intent()
+        """
+        if self.worker is not None:
+            return self.worker.transcribe_async(self._prepare_audio(audio_data, sample_rate, channels))
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt")
+        return self._executor.submit(self.transcribe_intent, audio_data, sample_rate, channels)
+    
+    def warmup(self, runs: int = 2, seconds: float = 1.0) -> Dict[str, float]:
+        """
+        Run a short synthetic clip through the model
+        
+        The first call pays for lazy kernel setup and allocator growth, so
+        doing it at startup keeps that cost out of the first real turn.
+        
+        Args:
+            runs: Number of passes (the first is the cold one)
+            seconds: Length of the synthetic clip
+        
+        Returns:
+            {'cold': first pass seconds, 'warm': last pass seconds}
+        """
+        # Quiet noise plus a voiced-like tone, so the decoder does real work
+        rng = np.random.default_rng(0)
+        t = np.arange(int(seconds * WHISPER_SAMPLE_RATE)) / WHISPER_SAMPLE_RATE
+        clip = (0.05 * np.sin(2 * np.pi * 180 * t) +
+                0.005 * rng.standard_normal(t.size)).astype(np.float32)
+        
+        timings = []
+        for _ in range(max(1, runs)):
+            start = time.perf_counter()
+            self._run_model(clip)
+            timings.append(time.perf_counter() - start)
+        
+        report = {'cold': timings[0], 'warm': timings[-1]}
+        self.logger.info(f"Whisper warm-up: cold {report['cold']:.2f}s, warm {report['warm']:.2f}s")
+        return report
+    
+    def _run_model(self, audio: Union[str, np.ndarray]) -> str:
+        """Transcribe a file path or 16 kHz mono float32 array"""
+        if self.worker is not None:
+            return self.worker.transcribe_async(audio).result()[0]
+        
+        if self.short_clip is not None:
+            if isinstance(audio, str):
+                import whisper
+                audio = whisper.load_audio(audio)
+            if audio.size <= self.short_clip_max_samples:
+                return self.short_clip.transcribe(audio)
+        
+        result = self.model.transcribe(
+            audio,
+            language=self.language,
+            fp16=False  # Use FP32 for CPU
+        )
+        return result['text'].strip()
+    
+    def _encode(self, audio: Optional[np.ndarray] = None, features=None):
+        """
+        Run the encoder (torch backends) on audio or precomputed features
+        
+        Clips that fit short-clip mode get a truncated encoder input.
+        
+        Args:
+            audio: 16 kHz mono float32 audio
+            features: StreamingLogMel to use instead of audio
+        
+        Returns:
+            Encoder output, shape (1, frames, n_audio_state)
+        """
+        import torch
+        import whisper
+        
+        num_samples = features.utterance_samples if features is not None else audio.size
+        short = self.short_clip is not None and num_samples <= self.short_clip_max_samples
+        
+        if features is not None:
+            frames = self.short_clip.num_frames(num_samples) if short else whisper.audio.N_FRAMES
+            mel = torch.from_numpy(features.finish(frames))
+        elif short:
+            mel = self.short_clip.log_mel(audio)
+        else:
+            mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio),
+                                              n_mels=self.model.dims.n_mels)
+        
+        if short:
+            return self.short_clip.encode(mel)
+        with torch.no_grad():
+            return self.model.embed_audio(mel.unsqueeze(0).to(self.model.device))
+    
+    def create_feature_stream(self, sample_rate: int = WHISPER_SAMPLE_RATE, channels: int = 1):
+        """
+        Start computing log-mel features for one utterance during capture
+        
+        Args:
+            sample_rate: Sample rate of the chunks that will be fed
+            channels: Channel count of the chunks that will be fed
+        
+        Returns:
+            StreamingLogMel; feed() it chunks, then pass it to
+            transcribe_features() or transcribe_intent()
+        """
+        from .mel_frontend import StreamingLogMel, load_mel_filters
+        
+        if self._mel_filters is None:
+            if self.backend == 'onnx':
+                self._mel_filters = self.model.mel_filters
+            else:
+                self._mel_filters = load_mel_filters(self.model.dims.n_mels)
+        
+        return StreamingLogMel(self._mel_filters, sample_rate, channels)
+    
+    def create_stream(self, sample_rate: int = WHISPER_SAMPLE_RATE, channels: int = 1,
+                      on_partial: Optional[Callable[[str], None]] = None):
+        """
+        Start an incremental transcription session for one utterance
+        
+        Args:
+            sample_rate: Sample rate of the chunks that will be fed
+            channels: Channel count of the chunks that will be fed
+            on_partial: Called with each partial hypothesis
+        
+        Returns:
+            StreamingTranscriber; feed() it chunks, then call finish()
+        """
+        from .streaming_stt import StreamingTranscriber
+        
+        return StreamingTranscriber(
+            self, sample_rate, channels=channels,
+            step_seconds=self.streaming_config.get('step_seconds', 1.0),
+            min_audio_seconds=self.streaming_config.get('min_audio_seconds', 0.5),
+            on_partial=on_partial
+        )
+    
+    @property
+    def intent_keywords_fixed(self) -> bool:
+        """Whether intent decoding runs in the STT worker, which cannot reload its keywords"""
+        intent_config = self.whisper_config.get('intent_decoding', {}) or {}
+        return (self.worker is not None and self.backend != 'onnx'
+                and intent_config.get('enabled', False))
+    
+    def reload_intents(self, config):
+        """
+        Retokenize intent decoding's keywords from a config snapshot
+        
+        Only text state is rebuilt; the model stays loaded. Without
+        in-process intent decoding there is nothing to do.
+        
+        Args:
+            config: Configuration with an `intents` section
+        """
+        if self.intent_decoder is not None:
+            self.intent_decoder.set_intents(config.get('intents', {}))
+    
+    def close(self):
+        """Stop the worker process and background thread, if any"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self.worker is not None:
+            self.worker.close()
+    
+    @staticmethod
+    def _prepare_audio(audio_data: Union[bytes, np.ndarray],
+                       sample_rate: int, channels: int) -> np.ndarray:
+        """Convert a PCM buffer to 16 kHz mono float32 in [-1, 1]"""
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            audio = np.frombuffer(audio_data, dtype=np.int16)
+        else:
+            audio = np.asarray(audio_data)
+        
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        elif audio.dtype != np.float32:
+            audio = audio.astype(np.float32)
+        
+        # Downmix interleaved channels
+        if channels > 1:
+            usable = audio.size - audio.size % channels
+            audio = audio[:usable].reshape(-1, channels).mean(axis=1)
+        
+        # Linear resampling is adequate for speech at these rates
+        if sample_rate != WHISPER_SAMPLE_RATE and audio.size > 0:
+            num_samples = int(round(audio.size * WHISPER_SAMPLE_RATE / sample_rate))
+            positions = np.linspace(0, audio.size - 1, num_samples)
+            audio = np.interp(positions, np.arange(audio.size), audio).astype(np.float32)
+        
+        return np.ascontiguousarray(audio, dtype=np.float32)
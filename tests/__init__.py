@@ -0,0 +1 @@
+"""Unit tests for Pluto's pure-Python building blocks"""
@@ -0,0 +1,147 @@
+"""Tests for the shared config snapshot and its hot reload"""
+
+import os
+from types import MappingProxyType
+
+import pytest
+import yaml
+
+from utils.config import Config, ConfigWatcher, freeze, load_config
+
+BASE = {
+    'system': {'log_level': 'INFO', 'hot_reload': {'enabled': True, 'interval': 0.5}},
+    'intents': {'greeting': {'keywords': ["hi", "hello"]}},
+    'responses': {'greeting': "Hey!"},
+    'whisper': {'model_size': 'tiny'},
+}
+
+
+def write(path, config):
+    """Write a config and move its mtime forward (coarse filesystem clocks)"""
+    previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    mtime = max(os.stat(path).st_mtime_ns, previous + 1_000_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = str(tmp_path / 'config.yaml')
+    write(path, BASE)
+    return path
+
+
+def updated(**sections):
+    config = {key: dict(value) for key, value in BASE.items()}
+    config.update(sections)
+    return config
+
+
+def test_freeze_makes_nested_data_read_only():
+    frozen = freeze({'a': {'b': [1, {'c': 2}]}})
+    assert isinstance(frozen, MappingProxyType)
+    assert frozen['a']['b'] == (1, MappingProxyType({'c': 2}))
+    with pytest.raises(TypeError):
+        frozen['a']['x'] = 1
+
+
+def test_snapshot_is_read_only(config_path):
+    config = load_config(config_path)
+    with pytest.raises(TypeError):
+        config['system']['log_level'] = 'DEBUG'
+    with pytest.raises(TypeError):
+        config['intents']['greeting']['keywords'][0] = 'yo'
+    assert config.get('missing', 'default') == 'default'
+
+
+def test_parsed_once_per_file(config_path):
+    assert load_config(config_path) is load_config(os.path.join(os.path.dirname(config_path),
+                                                                '.', 'config.yaml'))
+
+
+def test_changed_sections():
+    old = Config(BASE)
+    new = Config(updated(responses={'greeting': "Hello!"}, extra={}))
+    assert old.changed_sections(new) == {'responses', 'extra'}
+
+
+def test_watcher_from_config(config_path):
+    watcher = ConfigWatcher.from_config(load_config(config_path))
+    assert watcher is not None and watcher.interval == 0.5
+    assert ConfigWatcher.from_config(Config({'system': {}})) is None
+
+
+def test_reload_calls_subscribers_of_changed_sections(config_path):
+    watcher = ConfigWatcher(config_path, settle=0)
+    calls = []
+    watcher.subscribe(lambda config: calls.append(('responses', config['responses']['greeting'])),
+                      ['responses'])
+    watcher.subscribe(lambda config: calls.append(('intents', None)), ['intents'])
+    old = load_config(config_path)
+    
+    assert not watcher.check()  # unchanged
+    write(config_path, updated(responses={'greeting': "Hello!"}))
+    assert watcher.check()
+    
+    assert calls == [('responses', "Hello!")]
+    new = load_config(config_path)
+    assert new is not old and new.version == old.version + 1
+    assert old['responses']['greeting'] == "Hey!"  # holders of the old snapshot unaffected
+
+
+def test_unparsable_file_keeps_running_config(config_path):
+    watcher = ConfigWatcher(config_path, settle=0)
+    old = load_config(config_path)
+    with open(config_path, 'w') as f:
+        f.write("responses: [unclosed\n")
+    os.utime(config_path, ns=(old.mtime_ns + 10**9,) * 2)
+    
+    assert not watcher.check()
+    assert load_config(config_path) is old
+
+
+def test_failed_subscriber_does_not_swap(config_path):
+    watcher = ConfigWatcher(config_path, settle=0)
+    applied = []
+    
+    def reject(config):
+        raise ValueError("bad intents")
+    
+    watcher.subscribe(reject, ['intents'])
+    watcher.subscribe(lambda config: applied.append(config.version), ['responses'])
+    old = load_config(config_path)
+    
+    write(config_path, updated(intents={'greeting': {'keywords': ["yo"]}},
+                               responses={'greeting': "Yo!"}))
+    assert not watcher.check()
+    assert applied == [old.version + 1, old.version]  # taken, then rolled back
+    assert load_config(config_path) is old
+    assert not watcher.check()  # not retried until the file changes again
+
+
+def test_failed_subscriber_rolls_back_earlier_ones(config_path):
+    watcher = ConfigWatcher(config_path, settle=0)
+    responses = []
+    
+    def reject(config):
+        raise ValueError("bad intents")
+    
+    watcher.subscribe(lambda config: responses.append(config['responses']['greeting']),
+                      ['responses'])
+    watcher.subscribe(reject, ['intents'])
+    old = load_config(config_path)
+    
+    write(config_path, updated(intents={'greeting': {'keywords': ["yo"]}},
+                               responses={'greeting': "Yo!"}))
+    assert not watcher.check()
+    assert responses == ["Yo!", old['responses']['greeting']]
+    assert watcher.reloads == 0
+
+
+def test_restart_only_sections_still_swap(config_path):
+    watcher = ConfigWatcher(config_path, settle=0)
+    load_config(config_path)
+    write(config_path, updated(whisper={'model_size': 'base'}))
+    assert watcher.check()
+    assert load_config(config_path)['whisper']['model_size'] == 'base'
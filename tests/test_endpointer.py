@@ -0,0 +1,98 @@
+"""Tests for the energy-based endpointer"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyaudio')  # audio_layer's package imports it
+
+from audio_layer.endpointer import Endpointer
+
+RATE = 16000
+FRAME = 320  # 20 ms
+
+
+def quiet(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 10, frames * FRAME).astype(np.int16)
+
+
+def loud(frames):
+    t = np.arange(frames * FRAME) / RATE
+    return (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def make(**options):
+    settings = dict(onset_ms=60, hangover_ms=400, preroll_ms=300,
+                    min_utterance_ms=300, calibration_ms=200, max_wait_s=6.0)
+    settings.update(options)
+    return Endpointer(RATE, **settings)
+
+
+def feed(endpointer, audio, chunk=FRAME):
+    for start in range(0, len(audio), chunk):
+        endpointer.process(audio[start:start + chunk])
+    return endpointer.state
+
+
+def test_onset_needs_consecutive_speech():
+    endpointer = make()
+    # Two loud frames (40 ms) are shorter than the 60 ms onset
+    audio = np.concatenate([quiet(30), loud(2), quiet(10)])
+    assert feed(endpointer, audio) == Endpointer.WAITING
+    assert not endpointer.speech_detected
+
+
+def test_utterance_bounds_include_preroll_and_hangover():
+    endpointer = make()
+    audio = np.concatenate([quiet(30), loud(50), quiet(40)])
+    assert feed(endpointer, audio) == Endpointer.DONE
+    assert endpointer.end_reason == 'silence'
+    
+    start, end = endpointer.utterance_bounds()
+    assert start == 30 * FRAME - RATE * 300 // 1000
+    # Ends on the 20th silent frame after the speech (400 ms hangover)
+    assert end == (30 + 50 + 20) * FRAME
+
+
+def test_pause_shorter_than_hangover_continues():
+    endpointer = make()
+    audio = np.concatenate([quiet(30), loud(20), quiet(10), loud(20)])
+    assert feed(endpointer, audio) == Endpointer.SPEECH
+
+
+def test_too_short_utterance_keeps_listening():
+    endpointer = make()
+    # 100 ms of speech is under min_utterance_ms
+    audio = np.concatenate([quiet(30), loud(5), quiet(40)])
+    assert feed(endpointer, audio) == Endpointer.SPEECH
+
+
+def test_no_speech_times_out():
+    endpointer = make(max_wait_s=1.0)
+    assert feed(endpointer, quiet(60)) == Endpointer.DONE
+    assert endpointer.end_reason == 'no_speech'
+    assert endpointer.utterance_bounds() is None
+
+
+def test_max_length():
+    endpointer = make(max_utterance_s=1.0)
+    audio = np.concatenate([quiet(30), loud(80)])
+    assert feed(endpointer, audio) == Endpointer.DONE
+    assert endpointer.end_reason == 'max_length'
+
+
+def test_chunking_does_not_matter():
+    audio = np.concatenate([quiet(30), loud(50), quiet(40)])
+    by_frame, odd = make(), make()
+    feed(by_frame, audio)
+    feed(odd, audio, chunk=777)
+    assert odd.state == by_frame.state == Endpointer.DONE
+    assert odd.utterance_bounds() == by_frame.utterance_bounds()
+
+
+def test_stereo_is_downmixed():
+    mono = np.concatenate([quiet(30), loud(50), quiet(40)])
+    endpointer = Endpointer(RATE, channels=2, onset_ms=60, hangover_ms=400,
+                            preroll_ms=300, min_utterance_ms=300, calibration_ms=200)
+    assert feed(endpointer, np.repeat(mono, 2), chunk=2 * FRAME) == Endpointer.DONE
+    assert endpointer.utterance_bounds() == (30 * FRAME - 4800, 100 * FRAME)
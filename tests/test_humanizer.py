@@ -0,0 +1,94 @@
+"""Tests for the compiled humanizer against the original per-call rules"""
+
+import os
+
+import pytest
+
+from utils.config import Config
+from utils.humanizer import Humanizer, RulePass
+from utils.humanizer_benchmark import legacy_humanize, load_texts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT, 'config', 'config.yaml')
+FACTS_PATH = os.path.join(ROOT, 'data', 'fun_facts.txt')
+
+CASES = [
+    "Well I am here",
+    "so it is what it is",
+    "By the way you are great",
+    "As a matter of fact That is true",
+    "I would like to say hi",
+    "CANNOT stop, will not stop",
+    "Do not   panic",
+    "Hello ,world!How are you ?",
+    "tabs\tand\nnewlines",
+    "Honestly",
+    "Already done!",
+    "Numbers 3.14 stay",
+    "",
+]
+
+
+@pytest.fixture(scope='module')
+def humanizer():
+    humanizer = Humanizer(CONFIG_PATH)
+    humanizer.enabled = True
+    return humanizer
+
+
+@pytest.mark.parametrize('text', CASES)
+def test_matches_legacy_rules(humanizer, text):
+    assert humanizer.humanize(text) == legacy_humanize(text)
+
+
+def test_matches_legacy_on_shipped_texts(humanizer):
+    texts = load_texts(CONFIG_PATH, FACTS_PATH)
+    assert texts
+    for text in texts:
+        assert humanizer.humanize(text) == legacy_humanize(text), text
+
+
+def test_trailing_whitespace_no_longer_strands_the_period(humanizer):
+    # The old rules appended '.' before stripping: "Hi there ."
+    assert legacy_humanize("Hi there ") == "Hi there ."
+    assert humanizer.humanize("Hi there ") == "Hi there."
+
+
+def test_memo_hits(humanizer):
+    humanizer.humanize("A memo test")
+    before = humanizer.cache_info().hits
+    assert humanizer.humanize("A memo test") == "A memo test."
+    assert humanizer.cache_info().hits == before + 1
+
+
+def test_reload_replaces_rules_and_memo(humanizer):
+    config = Config({
+        'system': {'enable_humanization': True},
+        'humanizer': {'memo_size': 8, 'passes': [
+            {'name': 'planets', 'rules': {'pluto': 'Pluto the dwarf planet'}},
+        ]},
+    })
+    humanizer.humanize("hi pluto")
+    humanizer.reload(config)
+    try:
+        assert humanizer.humanize("hi pluto") == "hi Pluto the dwarf planet."
+        assert humanizer.cache_info().maxsize == 8
+    finally:
+        humanizer.reload(Config.load(CONFIG_PATH))
+
+
+def test_bad_rule_keeps_old_rules(humanizer):
+    bad = Config({'system': {}, 'humanizer': {'passes': [{'rules': [('(unclosed', 'x')]}]}})
+    with pytest.raises(ValueError):
+        humanizer.reload(bad)
+    assert humanizer.humanize("I am here") == "I'm here."
+
+
+def test_rule_pass_renumbers_group_references():
+    rule_pass = RulePass('swap', [(r'(a)(b)', r'\2\1'), (r'(c)(d)', r'\g<2>\g<1>')])
+    assert rule_pass.apply("ab cd") == "ba dc"
+
+
+def test_earlier_rule_wins_at_same_position():
+    rule_pass = RulePass('order', [('hello', 'first'), ('hello world', 'second')])
+    assert rule_pass.apply("hello world") == "first world"
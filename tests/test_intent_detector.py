@@ -0,0 +1,91 @@
+"""Tests for keyword intent detection and its ranking"""
+
+import pytest
+import yaml
+
+from intent_layer.intent_detector import IntentDetector
+from utils.config import Config
+
+INTENTS = {
+    'greeting': {'keywords': ["hi", "hello", "good morning"]},
+    'fun_fact': {'keywords': ["fun fact", "tell me something"]},
+    'goodbye': {'keywords': ["bye", "good night"], 'priority': 1},
+    'weather': {'keywords': ["good"]},
+}
+
+
+def write_config(tmp_path, config) -> str:
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config, sort_keys=False))  # intent order matters
+    return str(path)
+
+
+@pytest.fixture
+def detector(tmp_path):
+    return IntentDetector(write_config(tmp_path, {'intents': INTENTS,
+                                                  'intent_classifier': {'enabled': False}}))
+
+
+@pytest.mark.parametrize('text, intent', [
+    ("Hello there", 'greeting'),
+    ("HI", 'greeting'),
+    ("could you tell me   something", 'fun_fact'),
+    ("a fun fact please", 'fun_fact'),
+    ("nothing relevant", 'unknown'),
+    ("", 'unknown'),
+])
+def test_detect(detector, text, intent):
+    assert detector.detect(text) == intent
+
+
+def test_whole_words_only(detector):
+    assert detector.detect("this is shiny") == 'unknown'
+    assert detector.detect("goodness") == 'unknown'
+
+
+def test_priority_beats_config_order(detector):
+    # greeting comes first in the file, but goodbye has priority 1
+    assert detector.match("hello and bye") == ('goodbye', 'bye')
+
+
+def test_config_order_breaks_priority_ties(detector):
+    assert detector.match("fun fact, hi") == ('greeting', 'hi')
+
+
+def test_longer_keyword_wins_within_an_intent(tmp_path):
+    path = write_config(tmp_path, {'intents': {
+        'greeting': {'keywords': ["hi", "hi there"]},
+    }})
+    assert IntentDetector(path).match("oh hi there") == ('greeting', 'hi there')
+
+
+def test_longest_alternative_matches_at_a_position(detector):
+    # "good morning" is tried before "good" (weather)
+    assert detector.match("good morning") == ('greeting', 'good morning')
+    assert detector.match("good day") == ('weather', 'good')
+
+
+def test_earliest_keyword_wins_otherwise(detector):
+    assert detector.match("tell me something, a fun fact") == ('fun_fact', 'tell me something')
+
+
+def test_shared_keyword_goes_to_higher_rank(tmp_path):
+    path = write_config(tmp_path, {'intents': {
+        'a': {'keywords': ["pluto"]},
+        'b': {'keywords': ["pluto"], 'priority': 2},
+    }})
+    assert IntentDetector(path).detect("pluto") == 'b'
+
+
+def test_classifier_fallback(tmp_path):
+    detector = IntentDetector(write_config(tmp_path, {'intents': INTENTS,
+                                                      'intent_classifier': {'enabled': True}}))
+    assert detector.detect("helo") == 'greeting'
+    assert detector.detect("they") == 'unknown'
+
+
+def test_reload_swaps_intents(detector):
+    detector.reload(Config({'intents': {'music': {'keywords': ["play a song"]}}}))
+    assert detector.detect("play a song") == 'music'
+    assert detector.detect("hello") == 'unknown'
+    assert detector.get_all_intents() == ['music']
@@ -0,0 +1,61 @@
+"""Tests for the persistent Piper worker, run against tts_layer/fake_piper.py"""
+
+from pathlib import Path
+
+import pytest
+
+from tts_layer.piper_worker import PiperWorker
+
+FAKE_PIPER = Path(__file__).resolve().parent.parent / 'tts_layer' / 'fake_piper.py'
+
+
+def pcm_bytes(text):
+    """Bytes fake_piper renders for one line"""
+    return int(22050 * 0.05 * len(text)) * 2
+
+
+@pytest.fixture
+def worker():
+    worker = PiperWorker(executable=str(FAKE_PIPER), model_path='fake.onnx',
+                         request_timeout=1.0)
+    yield worker
+    worker.stop()
+
+
+def test_request_returns_whole_utterance(worker):
+    assert len(worker.synthesize("Hello there")) == pcm_bytes("Hello there")
+    assert len(worker.synthesize("Hi")) == pcm_bytes("Hi")
+    assert worker.restarts == 0
+
+
+def test_chunks_hold_whole_samples(worker):
+    chunks = list(worker.stream("An utterance long enough for several pipe reads"))
+    assert all(len(chunk) % 2 == 0 for chunk in chunks)
+
+
+def test_crash_restarts_on_next_request(worker):
+    worker.synthesize("warm up")
+    with pytest.raises(RuntimeError):
+        worker.synthesize("__crash__")
+    
+    assert len(worker.synthesize("after")) == pcm_bytes("after")
+    assert worker.restarts == 1
+
+
+def test_hang_times_out_and_recovers(worker):
+    worker.synthesize("warm up")
+    with pytest.raises(TimeoutError):
+        worker.synthesize("__hang__")
+    assert not worker.is_alive()
+    
+    assert len(worker.synthesize("after")) == pcm_bytes("after")
+    assert worker.restarts == 1
+
+
+def test_abandoned_request_does_not_leak_into_the_next(worker):
+    stream = worker.stream("a long utterance that gets interrupted " * 3)
+    next(stream)
+    stream.close()
+    
+    assert len(worker.synthesize("next")) == pcm_bytes("next")
+    assert worker.restarts == 0
@@ -0,0 +1,56 @@
+"""Tests for the playback engine's streaming resampler"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyaudio')  # audio_layer's package imports it
+
+from audio_layer.playback import LinearResampler
+
+
+def column(values):
+    return np.asarray(values, dtype=np.float32).reshape(-1, 1)
+
+
+def test_same_rate_passes_through():
+    samples = column(np.arange(10))
+    assert LinearResampler(22050, 22050).process(samples) is samples
+
+
+def test_downsampling_halves_length():
+    out = LinearResampler(44100, 22050).process(column(np.arange(100)))
+    assert abs(len(out) - 50) <= 1
+
+
+def test_linear_ramp_is_interpolated_exactly():
+    resampler = LinearResampler(22050, 44100)
+    out = resampler.process(column(np.arange(0, 100, 2)))
+    steps = np.diff(out[:, 0])
+    assert np.allclose(steps, 1.0)
+
+
+@pytest.mark.parametrize('in_rate, out_rate', [(22050, 48000), (48000, 16000), (16000, 44100)])
+def test_chunked_matches_one_shot(in_rate, out_rate):
+    rng = np.random.default_rng(1)
+    signal = column(rng.normal(0, 1000, 5000))
+    
+    whole = LinearResampler(in_rate, out_rate).process(signal)
+    resampler = LinearResampler(in_rate, out_rate)
+    pieces = [resampler.process(signal[start:start + size])
+              for start, size in zip(range(0, 5000, 333), [333] * 16)]
+    chunked = np.concatenate(pieces)
+    
+    assert len(chunked) == len(whole)
+    assert np.allclose(chunked, whole, atol=1e-2)
+
+
+def test_channels_are_resampled_independently():
+    left, right = np.arange(50), -np.arange(50)
+    out = LinearResampler(16000, 32000).process(np.stack([left, right], axis=1).astype(np.float32))
+    assert out.shape[1] == 2
+    assert np.allclose(out[:, 0], -out[:, 1])
+
+
+def test_empty_chunk():
+    resampler = LinearResampler(16000, 48000)
+    assert len(resampler.process(np.zeros((0, 1), np.float32))) == 0
@@ -0,0 +1,72 @@
+"""Tests for the capture ring buffer"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyaudio')  # audio_layer's package imports it
+
+from audio_layer.ring_buffer import RingBuffer
+
+
+def ramp(start, count):
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def test_latest_before_full():
+    ring = RingBuffer(8)
+    ring.write(ramp(0, 5))
+    assert ring.latest(3).tolist() == [2, 3, 4]
+    assert ring.latest(100).tolist() == [0, 1, 2, 3, 4]
+    assert ring.total_written == 5
+
+
+def test_wraparound_keeps_latest_contiguous():
+    ring = RingBuffer(8)
+    for start in range(0, 30, 3):
+        ring.write(ramp(start, 3))
+    assert ring.total_written == 30
+    assert ring.latest(8).tolist() == list(range(22, 30))
+
+
+def test_oversized_write_keeps_tail():
+    ring = RingBuffer(4)
+    ring.write(ramp(0, 10))
+    assert ring.latest(4).tolist() == [6, 7, 8, 9]
+    assert ring.total_written == 10
+
+
+def test_views_are_read_only():
+    ring = RingBuffer(4)
+    ring.write(ramp(0, 4))
+    with pytest.raises(ValueError):
+        ring.latest(2)[0] = 1
+
+
+def test_segment_uses_absolute_positions():
+    ring = RingBuffer(8)
+    ring.write(ramp(0, 20))
+    assert ring.segment(14, 17).tolist() == [14, 15, 16]
+    # Overwritten samples are dropped from the front, unwritten ones left out
+    assert ring.segment(5, 14).tolist() == list(range(12, 14))
+    assert ring.segment(18, 25).tolist() == [18, 19]
+    assert ring.segment(21, 25).tolist() == []
+
+
+def test_since():
+    ring = RingBuffer(8)
+    ring.write(ramp(0, 6))
+    position = ring.total_written
+    ring.write(ramp(6, 4))
+    assert ring.since(position).tolist() == [6, 7, 8, 9]
+
+
+def test_wait_for():
+    ring = RingBuffer(4)
+    ring.write(ramp(0, 2))
+    assert ring.wait_for(2, timeout=0)
+    assert not ring.wait_for(3, timeout=0.01)
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
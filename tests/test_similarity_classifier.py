@@ -0,0 +1,81 @@
+"""Tests for the fuzzy second-stage intent classifier"""
+
+import pytest
+
+from intent_layer.similarity_classifier import SimilarityClassifier
+
+INTENTS = {
+    'greeting': {
+        'keywords': ["hey", "hi", "hello", "greetings",
+                     "good morning", "good afternoon", "good evening"],
+    },
+    'fun_fact': {
+        'keywords': ["fun fact", "tell me something", "give me a fact",
+                     "something interesting", "tell me a fact",
+                     "interesting fact", "random fact"],
+    },
+}
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return SimilarityClassifier(INTENTS)
+
+
+@pytest.mark.parametrize('text, intent', [
+    ("helo", 'greeting'),
+    ("hallo", 'greeting'),
+    ("hellow there", 'greeting'),
+    ("greetins", 'greeting'),
+    ("good mornin", 'greeting'),
+    ("fun fakt", 'fun_fact'),
+    ("tel me something", 'fun_fact'),
+    ("could you tell me somethin interesting", 'fun_fact'),
+])
+def test_asr_variants_match(classifier, text, intent):
+    assert classifier.classify(text)[0] == intent
+
+
+@pytest.mark.parametrize('text', [
+    "they",            # contains "hey"
+    "they said so",
+    "heyday",          # starts with "hey"
+    "good",            # half of "good morning"
+    "help me",         # close to "hello" and to "tell me"
+    "what's the weather",
+    "the fact is",     # one word of "fun fact"
+    "",
+])
+def test_near_misses_are_unknown(classifier, text):
+    assert classifier.classify(text)[0] == 'unknown'
+
+
+def test_short_keywords_only_match_exactly(classifier):
+    assert classifier.score("hey")['greeting'] == pytest.approx(1.0)
+    assert classifier.score("hay")['greeting'] == 0.0
+
+
+def test_scores_are_per_intent_and_bounded(classifier):
+    scores = classifier.score("tell me a fun fact")
+    assert set(scores) == {'greeting', 'fun_fact'}
+    assert scores['fun_fact'] == pytest.approx(1.0)
+    assert all(0.0 <= value <= 1.0 + 1e-6 for value in scores.values())
+
+
+def test_margin_rejects_ties():
+    intents = {'a': {'keywords': ["planet"]}, 'b': {'keywords': ["planets"]}}
+    classifier = SimilarityClassifier(intents, margin=0.15)
+    assert classifier.classify("planett")[0] == 'unknown'
+    assert SimilarityClassifier(intents, margin=0.0).classify("planet")[0] == 'a'
+
+
+def test_examples_extend_an_intent():
+    intents = {'greeting': {'keywords': ["hello"], 'examples': ["nice to meet you"]}}
+    classifier = SimilarityClassifier(intents)
+    assert classifier.classify("nice to meat you")[0] == 'greeting'
+
+
+def test_no_intents():
+    classifier = SimilarityClassifier({})
+    assert classifier.score("hello") == {}
+    assert classifier.classify("hello") == ('unknown', 0.0)
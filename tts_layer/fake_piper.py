@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Fake Piper
+Stand-in for the piper binary so the TTS layer can be exercised without
+a voice model. Point `piper.executable` at this script.
+
+Supports --version, --output_file (one WAV for all of stdin) and
+--output_raw (one utterance per stdin line, streamed as raw PCM with
+Piper's "Real-time factor" log line after each). The special inputs
+"__crash__" and "__hang__" exit or stall, to exercise restarts and
+timeouts.
+"""
+
+import sys
+import math
+import time
+import wave
+import struct
+import argparse
+
+SAMPLE_RATE = 22050
+SECONDS_PER_CHAR = 0.05
+
+
+def render(text: str) -> bytes:
+    """Render a short tone whose length follows the text length"""
+    num_samples = int(SAMPLE_RATE * SECONDS_PER_CHAR * max(1, len(text)))
+    samples = (int(8000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE))
+               for i in range(num_samples))
+    return struct.pack(f'<{num_samples}h', *samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version', action='store_true')
+    parser.add_argument('--model')
+    parser.add_argument('--config')
+    parser.add_argument('--output_file')
+    parser.add_argument('--output_raw', action='store_true')
+    parser.add_argument('--speaker')
+    parser.add_argument('--noise_scale')
+    parser.add_argument('--length_scale')
+    args = parser.parse_args()
+    
+    if args.version:
+        print("1.2.0-fake")
+        return 0
+    
+    print("[piper] [info] Loaded voice in 0.01 second(s)", file=sys.stderr, flush=True)
+    
+    if args.output_file:
+        audio = render(sys.stdin.read().strip())
+        with wave.open(args.output_file, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(audio)
+        return 0
+    
+    out = sys.stdout.buffer
+    for line in sys.stdin:
+        text = line.strip()
+        if text == '__crash__':
+            return 1
+        if text == '__hang__':
+            time.sleep(3600)
+        
+        start = time.monotonic()
+        audio = render(text)
+        # Stream in pieces, like Piper does sentence by sentence
+        for i in range(0, len(audio), 8191):
+            out.write(audio[i:i + 8191])
+            out.flush()
+        
+        infer = time.monotonic() - start
+        seconds = len(audio) / 2 / SAMPLE_RATE
+        print(f"[piper] [info] Real-time factor: {infer / seconds:.3f} "
+              f"(infer={infer:.3f} sec, audio={seconds:.3f} sec)",
+              file=sys.stderr, flush=True)
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,25 @@ Converts text to natural speech using Piper TTS
 
 import subprocess
 import logging
-import yaml
 import os
+import re
+import queue
+import tempfile
+import json
+import time
+import shutil
+import wave
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from .piper_worker import PiperWorker
+from .tts_cache import TTSCache
+from utils.boot_cache import BootCache
+from utils.config import load_config
+from utils.tracing import span, traced, tracer
+
+# Split after sentence-ending punctuation followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
 
 
 class PiperTTS:
@@ -16,9 +33,8 @@ class PiperTTS:
         """Initialize Piper TTS"""
         self.logger = logging.getLogger(__name__)
         
-        # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Shared configuration snapshot (parsed once for all components)
+        config = load_config(config_path)
         
         self.piper_config = config['piper']
         self.model_path = self.piper_config['model_path']
@@ -26,14 +42,68 @@ class PiperTTS:
         self.speaker_id = self.piper_config.get('speaker_id', 0)
         self.noise_scale = self.piper_config.get('noise_scale', 0.667)
         self.length_scale = self.piper_config.get('length_scale', 1.0)
+        self.sample_rate = self._read_voice_sample_rate()
         
         # Check if Piper is installed
+        self.boot_cache = BootCache.from_config(config)
         self._check_piper_installation()
         
+        # Keep one Piper process (and its loaded voice) alive between turns
+        self.worker: Optional[PiperWorker] = None
+        if self.piper_config.get('persistent_worker', False):
+            self.worker = PiperWorker(
+                self.piper_executable,
+                self.model_path,
+                config_path=self.config_path,
+                speaker_id=self.speaker_id,
+                noise_scale=self.noise_scale,
+                length_scale=self.length_scale,
+                sample_rate=self.sample_rate,
+                request_timeout=self.piper_config.get('request_timeout', 30)
+            )
+        
+        # Synthesized audio cache (see prerender)
+        self.cache: Optional[TTSCache] = None
+        cache_config = self.piper_config.get('cache', {}) or {}
+        if cache_config.get('enabled', False):
+            self.cache = TTSCache(
+                cache_dir=cache_config.get('dir', 'cache/tts'),
+                max_memory_bytes=int(cache_config.get('max_memory_mb', 16) * 1024 * 1024),
+                max_disk_bytes=int(cache_config.get('max_disk_mb', 100) * 1024 * 1024)
+            )
+        
+        # Live speech in progress or about to start (see hold_background);
+        # background pre-rendering waits while it is non-zero
+        self._foreground = 0
+        self._idle = threading.Condition()
+        
         self.logger.info("Piper TTS initialized")
     
+    def _read_voice_sample_rate(self) -> int:
+        """Read the voice's output sample rate from its .onnx.json config"""
+        try:
+            with open(self.config_path, 'r') as f:
+                return int(json.load(f)['audio']['sample_rate'])
+        except Exception:
+            return 22050  # Piper's default for medium-quality voices
+    
     def _check_piper_installation(self):
         """Check if Piper is installed and accessible"""
+        # An explicitly configured executable is used as-is
+        configured = self.piper_config.get('executable')
+        if configured:
+            self.piper_executable = os.path.expanduser(configured)
+            self.logger.info(f"Using configured Piper: {self.piper_executable}")
+            return
+        
+        # Reuse the last boot's result if it is still installed, skipping
+        # the --version probes
+        cached = self.boot_cache.get('piper_executable')
+        if cached and (shutil.which(cached) or os.access(cached, os.X_OK)):
+            self.piper_executable = cached
+            self.logger.info(f"Piper found at: {cached} (cached)")
+            return
+        
         # Check multiple possible locations
         possible_paths = [
             'piper',
@@ -54,6 +124,7 @@ class PiperTTS:
                 )
                 if result.returncode == 0:
                     self.piper_executable = path
+                    self.boot_cache.set('piper_executable', path)
                     self.logger.info(f"Piper found at: {path}")
                     return
             except (FileNotFoundError, PermissionError):
@@ -64,6 +135,7 @@ class PiperTTS:
         self.logger.warning("Piper not found in standard locations. Will try default 'piper' command.")
         self.piper_executable = 'piper'
     
+    @traced('synthesize')
     def synthesize(self, text: str, output_path: str) -> bool:
         """
         Convert text to speech and save to file
@@ -126,33 +198,328 @@ class PiperTTS:
             self.logger.error(f"Synthesis error: {e}")
             return False
     
-    def speak(self, text: str, audio_player) -> bool:
+    @staticmethod
+    def split_sentences(text: str, min_chars: int = 12) -> List[str]:
+        """
+        Split text into sentences for pipelined synthesis
+        
+        Fragments shorter than min_chars are merged into the next sentence
+        so Piper isn't invoked for a lone "Hi!".
+        """
+        parts = [p.strip() for p in SENTENCE_BOUNDARY.split(text.strip()) if p.strip()]
+        
+        sentences = []
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}" if pending else part
+            if len(pending) >= min_chars:
+                sentences.append(pending)
+                pending = ""
+        
+        if pending:
+            if sentences:
+                sentences[-1] = f"{sentences[-1]} {pending}"
+            else:
+                sentences.append(pending)
+        
+        return sentences
+    
+    def speak(self, text: str, audio_player,
+              cancel: Optional[threading.Event] = None) -> bool:
         """
         Synthesize and play speech
         
+        The text is split into sentences and synthesized on a producer
+        thread, so sentence N+1 is rendered while sentence N plays.
+        
         Args:
             text: Text to speak
-            audio_player: Audio player instance with play_audio() method
+            audio_player: Audio player with play_pcm_stream() (streamed,
+                          gapless) or play_audio() (one WAV per sentence)
+            cancel: Set to stop synthesis and hand no more audio to the
+                    player (audio already queued is stopped by the player)
         
         Returns:
             True if successful, False otherwise
         """
-        import tempfile
+        sentences = self.split_sentences(text)
+        if not sentences:
+            self.logger.warning("Empty text provided for synthesis")
+            return False
         
-        # Create temporary output file
-        temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-        temp_path = temp_file.name
-        temp_file.close()
+        cancel = cancel or threading.Event()
+        self.hold_background()
+        try:
+            if hasattr(audio_player, 'play_pcm_stream'):
+                return self._speak_streaming(sentences, audio_player, cancel)
+            return self._speak_files(sentences, audio_player, cancel)
+        finally:
+            self.release_background()
+    
+    def hold_background(self):
+        """
+        Pause background pre-rendering until release_background()
+        
+        speak() holds it while it runs. A caller that knows a reply is on
+        its way (the user started talking) can hold it earlier, so the
+        reply does not queue behind a pre-rendered sentence for Piper.
+        """
+        with self._idle:
+            self._foreground += 1
+    
+    def release_background(self):
+        """Undo one hold_background()"""
+        with self._idle:
+            self._foreground = max(0, self._foreground - 1)
+            if not self._foreground:
+                self._idle.notify_all()
+    
+    def _wait_for_idle(self):
+        """Block until no live speech holds the synthesizer"""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._foreground)
+    
+    def _speak_files(self, sentences: List[str], audio_player,
+                     cancel: threading.Event) -> bool:
+        """Synthesize one WAV per sentence and play them in turn"""
+        # Bounded so the producer stays at most a couple of sentences ahead
+        rendered = queue.Queue(maxsize=2)
+        stop = threading.Event()
+        
+        def produce():
+            try:
+                for sentence in sentences:
+                    if stop.is_set() or cancel.is_set():
+                        break
+                    path = self._temp_wav_path()
+                    if self.synthesize(sentence, path):
+                        rendered.put(path)
+                    elif os.path.exists(path):
+                        os.remove(path)
+            finally:
+                rendered.put(None)
+        
+        producer = threading.Thread(target=tracer.bind(produce), name="tts-producer",
+                                    daemon=True)
+        producer.start()
         
+        played = 0
         try:
-            # Synthesize
-            if self.synthesize(text, temp_path):
-                # Play audio
-                audio_player.play_audio(temp_path)
-                return True
-            return False
+            while True:
+                path = rendered.get()
+                if path is None:
+                    break
+                try:
+                    if cancel.is_set():
+                        break
+                    audio_player.play_audio(path)
+                    played += 1
+                finally:
+                    if os.path.exists(path):
+                        os.remove(path)
+        
+        finally:
+            # Drain anything rendered after an error or interrupt
+            stop.set()
+            while producer.is_alive() or not rendered.empty():
+                try:
+                    path = rendered.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if path and os.path.exists(path):
+                    os.remove(path)
+        
+        return played > 0
+    
+    def _speak_streaming(self, sentences: List[str], audio_player,
+                         cancel: threading.Event) -> bool:
+        """Stream raw PCM (cached or freshly synthesized) into playback"""
+        pcm = queue.Queue()
+        stop = threading.Event()
+        failed = threading.Event()
+        played = 0
         
+        def produce():
+            try:
+                for sentence in sentences:
+                    with span('synthesize'):
+                        for chunk in self.stream_pcm(sentence):
+                            if stop.is_set() or cancel.is_set():
+                                return
+                            pcm.put(chunk)
+            except Exception:
+                failed.set()  # already logged by stream_pcm
+            finally:
+                pcm.put(None)
+        
+        def chunks():
+            nonlocal played
+            for chunk in iter(pcm.get, None):
+                if cancel.is_set():
+                    return
+                played += 1
+                yield chunk
+        
+        producer = threading.Thread(target=tracer.bind(produce), name="tts-producer",
+                                    daemon=True)
+        producer.start()
+        
+        try:
+            completed = audio_player.play_pcm_stream(chunks(), self.sample_rate)
         finally:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            stop.set()
+        
+        # The player reports success even when it was handed no audio
+        return completed and played > 0 and not failed.is_set()
+    
+    def cache_key(self, text: str) -> str:
+        """Content address of text spoken with the current voice settings"""
+        return TTSCache.make_key(text, self.model_path, self.speaker_id,
+                                 self.noise_scale, self.length_scale)
+    
+    def stream_pcm(self, text: str) -> Iterator[bytes]:
+        """
+        Synthesize text, yielding raw PCM
+        
+        Cache hits are returned without synthesis. Otherwise the persistent
+        worker streams audio as it is produced (or, without a worker, a
+        one-shot Piper run renders a WAV), and the result is cached.
+        
+        Args:
+            text: Text to speak
+        
+        Yields:
+            Raw int16 mono PCM chunks at self.sample_rate
+        
+        Raises:
+            RuntimeError: Synthesis failed (logged first)
+            TimeoutError: The worker produced no end marker in time
+            FileNotFoundError: The Piper executable is missing
+        """
+        key = self.cache_key(text) if self.cache else None
+        if key:
+            pcm = self.cache.get(key)
+            if pcm is not None:
+                self.logger.info(f"TTS cache hit: '{text[:50]}...'")
+                yield pcm
+                return
+        
+        if not self.worker:
+            pcm = self._synthesize_file_pcm(text)
+            if not pcm:
+                raise RuntimeError(f"Piper produced no audio for '{text[:50]}'")
+            if key:
+                self.cache.put(key, pcm)
+            yield pcm
+            return
+        
+        self.logger.info(f"Synthesizing speech: '{text[:50]}...'")
+        chunks = []
+        try:
+            for chunk in self.worker.stream(text):
+                if key:
+                    chunks.append(chunk)
+                yield chunk
+        except FileNotFoundError:
+            self.logger.error("Piper executable not found. Please install Piper TTS.")
+            raise
+        except TimeoutError:
+            self.logger.error("Piper synthesis timeout")
+            raise
+        except Exception as e:
+            self.logger.error(f"Synthesis error: {e}")
+            raise
+        
+        if key and chunks:
+            self.cache.put(key, b''.join(chunks))
+    
+    @traced('synthesize')
+    def synthesize_pcm(self, text: str) -> bytes:
+        """Synthesize text and return the complete raw PCM"""
+        return b''.join(self.stream_pcm(text))
+    
+    def _synthesize_file_pcm(self, text: str) -> Optional[bytes]:
+        """Render text with a one-shot Piper run and read back its PCM"""
+        path = self._temp_wav_path()
+        try:
+            if not self.synthesize(text, path):
+                return None
+            with wave.open(path, 'rb') as wf:
+                if wf.getframerate() != self.sample_rate:
+                    self.logger.warning(f"Piper output is {wf.getframerate()} Hz, "
+                                        f"expected {self.sample_rate} Hz")
+                return wf.readframes(wf.getnframes())
+        except (wave.Error, EOFError) as e:
+            self.logger.error(f"Could not read synthesized audio: {e}")
+            return None
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def prerender(self, texts: List[str]) -> int:
+        """
+        Render texts into the cache ahead of time
+        
+        Meant for a background thread: it renders a sentence at a time and
+        waits whenever live speech holds the synthesizer, so it only uses
+        Piper while Pluto is otherwise idle.
+        
+        Args:
+            texts: Texts exactly as they will be passed to speak()
+                   (i.e. already humanized)
+        
+        Returns:
+            Number of sentences newly synthesized
+        """
+        if not self.cache:
+            return 0
+        
+        rendered = 0
+        for text in texts:
+            for sentence in self.split_sentences(text):
+                if self.cache_key(sentence) in self.cache:
+                    continue
+                self._wait_for_idle()
+                try:
+                    self.synthesize_pcm(sentence)
+                except Exception:
+                    continue  # logged by stream_pcm; spoken live instead
+                rendered += 1
+        
+        self.logger.info(f"Pre-rendered {rendered} sentences into the TTS cache")
+        return rendered
+    
+    def warmup(self, text: str = "Warming up.", runs: int = 2) -> Dict[str, float]:
+        """
+        Synthesize a dummy sentence so the first real reply is not the cold one
+        
+        Bypasses the cache. With the persistent worker this also starts the
+        Piper process and loads the voice.
+        
+        Returns:
+            {'cold': first pass seconds, 'warm': last pass seconds}
+        """
+        timings = []
+        for _ in range(max(1, runs)):
+            start = time.perf_counter()
+            if self.worker:
+                self.worker.synthesize(text)
+            else:
+                self._synthesize_file_pcm(text)
+            timings.append(time.perf_counter() - start)
+        
+        report = {'cold': timings[0], 'warm': timings[-1]}
+        self.logger.info(f"Piper warm-up: cold {report['cold']:.2f}s, warm {report['warm']:.2f}s")
+        return report
+    
+    def close(self):
+        """Stop the persistent Piper worker"""
+        if self.worker:
+            self.worker.stop()
+    
+    @staticmethod
+    def _temp_wav_path() -> str:
+        """Create an empty temporary WAV path"""
+        temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+        temp_file.close()
+        return temp_file.name
@@ -0,0 +1,266 @@
+"""
+Persistent Piper Worker
+Keeps one Piper process (and its loaded voice) alive between utterances
+"""
+
+import os
+import time
+import fcntl
+import queue
+import select
+import struct
+import termios
+import logging
+import threading
+import subprocess
+from typing import Iterator, List, Optional
+
+
+class PiperWorker:
+    """
+    Long-lived `piper --output_raw` process
+    
+    Text is written to Piper's stdin one line per request and raw 16-bit
+    mono PCM is read back from stdout as it is produced, so playback can
+    start on the first samples. Piper logs a "Real-time factor" line on
+    stderr after every utterance, once all of its audio has been written;
+    whatever is in the stdout pipe when that line arrives is the rest of
+    the request, so requests are framed without waiting on a timer.
+    
+    A request abandoned part way (barge-in closes the generator) is left
+    to finish: its remaining audio is read and discarded before the next
+    request is written, so the voice stays loaded. A crashed process is
+    restarted on the next request, and a request that produces no end
+    marker within `request_timeout` kills the process.
+    """
+    
+    # Logged by Piper on stderr once an utterance has been fully written
+    DONE_MARKER = 'Real-time factor'
+    
+    def __init__(self, executable: str, model_path: str,
+                 config_path: Optional[str] = None, speaker_id: int = 0,
+                 noise_scale: float = 0.667, length_scale: float = 1.0,
+                 sample_rate: int = 22050, request_timeout: float = 30.0,
+                 poll_interval: float = 0.02):
+        """
+        Initialize the worker (the process starts on first use)
+        
+        Args:
+            executable: Piper executable
+            model_path: Voice model (.onnx)
+            config_path: Voice config (.onnx.json), used if it exists
+            speaker_id: Speaker ID for multi-speaker voices
+            noise_scale: Piper noise scale
+            length_scale: Piper length scale
+            sample_rate: Sample rate of the voice's raw output
+            request_timeout: Max seconds for one utterance
+            poll_interval: Seconds between end-marker checks while
+                           stdout is quiet
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.executable = executable
+        self.model_path = model_path
+        self.config_path = config_path
+        self.speaker_id = speaker_id
+        self.noise_scale = noise_scale
+        self.length_scale = length_scale
+        self.sample_rate = sample_rate
+        self.request_timeout = request_timeout
+        self.poll_interval = poll_interval
+        
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self._started = False
+        self._abandoned = False
+        self._done: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+    
+    def _command(self) -> List[str]:
+        cmd = [
+            self.executable,
+            '--model', self.model_path,
+            '--output_raw',
+            '--speaker', str(self.speaker_id),
+            '--noise_scale', str(self.noise_scale),
+            '--length_scale', str(self.length_scale),
+        ]
+        if self.config_path and os.path.exists(self.config_path):
+            cmd.extend(['--config', self.config_path])
+        return cmd
+    
+    def start(self):
+        """Start the Piper process if it isn't running"""
+        if self.is_alive():
+            return
+        
+        cmd = self._command()
+        self.logger.info(f"Starting Piper worker: {' '.join(cmd)}")
+        
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+        self._started = True
+        self._abandoned = False
+        
+        # Fresh queue per process so a dead reader can't leak into a new one.
+        # Audio is read by the requester itself (see _collect).
+        self._done = queue.Queue()
+        threading.Thread(target=self._read_stderr, args=(self.process, self._done),
+                         name="piper-stderr", daemon=True).start()
+    
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+    
+    def _read_stderr(self, process: subprocess.Popen, done: queue.Queue):
+        for raw_line in iter(process.stderr.readline, b''):
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            if self.DONE_MARKER in line:
+                done.put(True)
+            elif line:
+                self.logger.debug(f"piper: {line}")
+        done.put(False)
+    
+    def stream(self, text: str) -> Iterator[bytes]:
+        """
+        Synthesize text, yielding raw int16 PCM chunks as they arrive
+        
+        Args:
+            text: Text to speak (newlines are flattened)
+        
+        Yields:
+            PCM chunks with an even number of bytes
+        """
+        line = ' '.join(text.split())
+        if not line:
+            return
+        
+        with self._lock:
+            for attempt in range(2):
+                if not self.is_alive():
+                    if self._started:
+                        self.restarts += 1
+                        self.logger.warning("Piper worker not running, restarting")
+                    self.start()
+                
+                if self._abandoned:
+                    self._discard_abandoned()
+                    if not self.is_alive():
+                        continue
+                
+                try:
+                    self.process.stdin.write((line + '\n').encode('utf-8'))
+                    self.process.stdin.flush()
+                except (BrokenPipeError, OSError) as e:
+                    self.logger.warning(f"Piper worker write failed: {e}")
+                    self.stop()
+                    continue
+                
+                yield from self._collect(self.process, self._done)
+                return
+            
+            raise RuntimeError("Piper worker could not be started")
+    
+    def _discard_abandoned(self):
+        """Read what is left of an abandoned request, up to its end marker"""
+        self._abandoned = False
+        discarded = 0
+        try:
+            for data in self._collect(self.process, self._done):
+                discarded += len(data)
+        except (RuntimeError, TimeoutError) as e:
+            self.logger.warning(f"Could not finish the interrupted Piper request: {e}")
+            return
+        self.logger.debug(f"Discarded {discarded} bytes of an interrupted Piper request")
+    
+    def _collect(self, process: subprocess.Popen, done: queue.Queue) -> Iterator[bytes]:
+        """Yield audio for the current request until Piper marks it done"""
+        fd = process.stdout.fileno()
+        deadline = time.monotonic() + self.request_timeout
+        carry = b''
+        completed = False
+        
+        try:
+            while True:
+                try:
+                    result = done.get_nowait()
+                except queue.Empty:
+                    pass
+                else:
+                    if not result:
+                        raise RuntimeError("Piper worker exited during synthesis")
+                    # Piper writes the whole utterance before logging the marker
+                    data = carry + self._read_pending(fd)
+                    if len(data) % 2:
+                        self.logger.warning("Piper output ended on half a sample")
+                        data = data[:-1]
+                    if data:
+                        yield data
+                    break
+                
+                ready, _, _ = select.select([fd], [], [], self.poll_interval)
+                if not ready:
+                    if time.monotonic() > deadline:
+                        self.logger.error("Piper worker timed out, killing it")
+                        raise TimeoutError("Piper synthesis timeout")
+                    continue
+                
+                data = os.read(fd, 4096)
+                if not data:
+                    # stdout closed: the process died
+                    raise RuntimeError("Piper worker exited during synthesis")
+                
+                data = carry + data
+                if len(data) % 2:
+                    carry, data = data[-1:], data[:-1]
+                else:
+                    carry = b''
+                if data:
+                    yield data
+            
+            completed = True
+        
+        except GeneratorExit:
+            # Abandoned by the consumer: Piper finishes the utterance anyway,
+            # and the next request discards the rest before it starts
+            self._abandoned = True
+            raise
+        
+        finally:
+            # A failed request leaves the process in an unknown state
+            if not completed and not self._abandoned:
+                self.stop()
+    
+    @staticmethod
+    def _read_pending(fd: int) -> bytes:
+        """Read everything already in a pipe without waiting for more"""
+        chunks = []
+        while True:
+            pending = struct.unpack('i', fcntl.ioctl(fd, termios.FIONREAD, b'\0' * 4))[0]
+            if not pending:
+                return b''.join(chunks)
+            chunks.append(os.read(fd, pending))
+    
+    def synthesize(self, text: str) -> bytes:
+        """Synthesize text and return the complete raw PCM"""
+        return b''.join(self.stream(text))
+    
+    def stop(self):
+        """Terminate the Piper process"""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        
+        try:
+            process.stdin.close()
+        except Exception:
+            pass
+        try:
+            process.terminate()
+            process.wait(timeout=2)
+        except Exception:
+            process.kill()
@@ -0,0 +1,173 @@
+"""
+TTS Audio Cache
+Content-addressed LRU cache of synthesized PCM, in memory and on disk
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class TTSCache:
+    """
+    Two-level LRU cache of raw PCM keyed by text and voice settings
+    
+    Entries live in a size-bounded in-memory OrderedDict backed by a
+    size-bounded directory of .pcm files. Disk recency is kept in file
+    mtimes, so the LRU order survives restarts.
+    """
+    
+    def __init__(self, cache_dir: str = "cache/tts",
+                 max_memory_bytes: int = 16 * 1024 * 1024,
+                 max_disk_bytes: int = 100 * 1024 * 1024):
+        """
+        Initialize cache
+        
+        Args:
+            cache_dir: Directory for cached PCM files (None for memory only)
+            max_memory_bytes: Size bound of the in-memory level
+            max_disk_bytes: Size bound of the on-disk level
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        
+        self._memory: OrderedDict = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict = OrderedDict()  # key -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan_disk()
+    
+    @staticmethod
+    def make_key(text: str, model_path: str, speaker_id: int,
+                 noise_scale: float, length_scale: float) -> str:
+        """Build the content address for an utterance"""
+        material = '\x1f'.join([text, model_path, str(speaker_id),
+                                repr(float(noise_scale)), repr(float(length_scale))])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+    
+    def _scan_disk(self):
+        """Rebuild the disk index, least recently used first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pcm'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        
+        self._evict_disk()
+        self.logger.info(f"TTS cache: {len(self._disk)} entries on disk "
+                         f"({self._disk_bytes / 1e6:.1f} MB)")
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached PCM, or None on a miss"""
+        with self._lock:
+            pcm = self._memory.get(key)
+            if pcm is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return pcm
+            
+            if key not in self._disk:
+                self.misses += 1
+                return None
+        
+        try:
+            with open(self._path(key), 'rb') as f:
+                pcm = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._forget_disk(key)
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, pcm)
+            self.hits += 1
+        return pcm
+    
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+    
+    def put(self, key: str, pcm: bytes):
+        """Store PCM in both levels"""
+        if not pcm:
+            return
+        
+        with self._lock:
+            self._remember(key, pcm)
+        
+        if not self.cache_dir or len(pcm) > self.max_disk_bytes:
+            return
+        
+        # Write atomically so a crash never leaves a truncated entry
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(pcm)
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write TTS cache entry: {e}")
+            return
+        
+        with self._lock:
+            self._forget_disk(key)
+            self._disk[key] = len(pcm)
+            self._disk_bytes += len(pcm)
+            self._evict_disk()
+    
+    def _remember(self, key: str, pcm: bytes):
+        """Insert into the memory level (lock held)"""
+        if len(pcm) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = pcm
+        self._memory_bytes += len(pcm)
+        
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+    
+    def _forget_disk(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+    
+    def _evict_disk(self):
+        """Delete least recently used files until under the bound (lock held)"""
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
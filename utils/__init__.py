@@ -1,6 +1,11 @@
 """Utils Package"""
 
+from .config import Config, ConfigWatcher, load_config
 from .logger import setup_logger
 from .humanizer import Humanizer
+from .boot_cache import BootCache
+from .tracing import setup_tracing, span, traced, tracer
 
-__all__ = ['setup_logger', 'Humanizer']
+__all__ = ['Config', 'ConfigWatcher', 'load_config',
+           'setup_logger', 'Humanizer', 'BootCache',
+           'setup_tracing', 'span', 'traced', 'tracer']
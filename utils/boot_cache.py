@@ -0,0 +1,71 @@
+"""
+Boot Cache
+Remembers values that are slow to rediscover on every start
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict
+
+
+class BootCache:
+    """
+    Small JSON key/value store shared by components at startup
+    
+    Used for things like the resolved audio device index and the Piper
+    executable path. Callers must validate cached values before trusting
+    them, since hardware and installs can change between boots.
+    """
+    
+    _instances: Dict[str, 'BootCache'] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, path: str):
+        """Initialize boot cache backed by a JSON file"""
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self._lock = threading.Lock()
+        
+        try:
+            with open(path, 'r') as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+    
+    @classmethod
+    def load(cls, path: str) -> 'BootCache':
+        """Get the shared cache for a path (components load concurrently)"""
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+    
+    @classmethod
+    def from_config(cls, config: dict) -> 'BootCache':
+        """Get the cache configured under system.boot_cache"""
+        return cls.load(config.get('system', {}).get('boot_cache', 'cache/boot.json'))
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+    
+    def set(self, key: str, value: Any):
+        """Store a value and write the file through"""
+        with self._lock:
+            if self._data.get(key) == value:
+                return
+            self._data[key] = value
+            snapshot = json.dumps(self._data, indent=2)
+            
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w') as f:
+                    f.write(snapshot)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                self.logger.warning(f"Could not write boot cache: {e}")
@@ -0,0 +1,250 @@
+"""
+Configuration
+One parsed, read-only snapshot of config.yaml shared by every component
+"""
+
+import os
+import time
+import logging
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of parsed YAML (mappings become proxies, lists tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class Config(Mapping):
+    """
+    Immutable snapshot of a config file
+    
+    Components used to open and parse config.yaml one by one; load()
+    parses a file once and hands the same snapshot to every caller (the
+    components load concurrently). Nested sections are read-only too, so
+    no component can change what another one sees. A hot reload makes a
+    new snapshot and swaps it in; holders of the old one are unaffected.
+    """
+    
+    _current: Dict[str, 'Config'] = {}
+    _current_lock = threading.Lock()
+    
+    def __init__(self, data: dict, path: Optional[str] = None,
+                 mtime_ns: int = 0, version: int = 1):
+        self._data = freeze(data or {})
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.version = version
+    
+    def __getitem__(self, key):
+        return self._data[key]
+    
+    def __iter__(self):
+        return iter(self._data)
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __repr__(self):
+        return f"Config({self.path!r}, version {self.version})"
+    
+    @classmethod
+    def parse(cls, path: str, version: int = 1) -> 'Config':
+        """Read and parse a config file into a new snapshot"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f)
+        return cls(data, path=path, mtime_ns=mtime_ns, version=version)
+    
+    @classmethod
+    def load(cls, path: str) -> 'Config':
+        """Get the current snapshot of a config file, parsing it on first use"""
+        key = os.path.abspath(path)
+        with cls._current_lock:
+            if key not in cls._current:
+                cls._current[key] = cls.parse(path)
+            return cls._current[key]
+    
+    @classmethod
+    def swap(cls, snapshot: 'Config'):
+        """Make a snapshot the one load() returns for its file"""
+        with cls._current_lock:
+            cls._current[os.path.abspath(snapshot.path)] = snapshot
+    
+    def changed_sections(self, other: 'Config') -> Set[str]:
+        """Top-level sections that differ between two snapshots"""
+        return {key for key in set(self) | set(other) if self.get(key) != other.get(key)}
+
+
+def load_config(config_path: str = "config/config.yaml") -> Config:
+    """
+    Get the shared configuration snapshot
+    
+    Args:
+        config_path: Path to configuration file
+    
+    Returns:
+        Read-only config, parsed once per file
+    """
+    return Config.load(config_path)
+
+
+class ConfigWatcher:
+    """
+    Hot-reloads a config file when it changes
+    
+    A daemon thread polls the file's modification time (a stat every
+    couple of seconds costs nothing, and needs no inotify binding). A
+    changed file is parsed into a new snapshot once it has stopped
+    changing; if it does not parse, the old snapshot stays. Subscribers
+    are called with the new snapshot when one of their sections changed,
+    and each builds its new state before swapping it in, so a turn in
+    progress sees either the old rules or the new ones. The snapshot
+    becomes the one load() returns only once every subscriber has taken
+    it; if one fails, those that already took it are called again with
+    the old snapshot, so no section runs ahead of the others. Sections
+    nobody subscribed to (audio, whisper, piper) only take effect on
+    restart.
+    """
+    
+    def __init__(self, config_path: str, interval: float = 2.0, settle: float = 0.2):
+        """
+        Initialize watcher
+        
+        Args:
+            config_path: Config file to watch
+            interval: Seconds between checks
+            settle: Seconds the file must stay unchanged before it is read
+                    (editors save in several writes)
+        """
+        self.logger = logging.getLogger(__name__)
+        
+        self.config_path = config_path
+        self.interval = interval
+        self.settle = settle
+        self.reloads = 0
+        
+        self._subscribers: List[Tuple[Callable[[Config], None], Set[str]]] = []
+        self._failed_mtime_ns: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @classmethod
+    def from_config(cls, config: Config) -> Optional['ConfigWatcher']:
+        """Build a watcher from `system.hot_reload` (None when disabled)"""
+        reload_config = config.get('system', {}).get('hot_reload', {}) or {}
+        if not reload_config.get('enabled', False):
+            return None
+        return cls(config.path, interval=reload_config.get('interval', 2.0))
+    
+    def subscribe(self, callback: Callable[[Config], None], sections: Iterable[str]):
+        """
+        Call back with each new snapshot in which one of the sections changed
+        
+        Args:
+            callback: Takes the new Config; exceptions are logged and the
+                      other subscribers still run. Also called with the
+                      previous Config to roll back when another
+                      subscriber fails
+            sections: Top-level config sections the callback depends on
+        """
+        self._subscribers.append((callback, set(sections)))
+    
+    def start(self):
+        """Start watching in the background"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Watching {self.config_path} for changes")
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Config reload failed: {e}")
+    
+    def check(self) -> bool:
+        """
+        Reload the file if it changed since the current snapshot
+        
+        Returns:
+            True if changed settings were applied
+        """
+        current = Config.load(self.config_path)
+        try:
+            mtime_ns = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime_ns in (current.mtime_ns, self._failed_mtime_ns):
+            return False
+        
+        # Wait for the writer to finish
+        time.sleep(self.settle)
+        if os.stat(self.config_path).st_mtime_ns != mtime_ns:
+            return False
+        
+        try:
+            snapshot = Config.parse(self.config_path, version=current.version + 1)
+        except (OSError, yaml.YAMLError) as e:
+            self._failed_mtime_ns = mtime_ns
+            self.logger.error(f"Not reloading {self.config_path}, keeping the running config: {e}")
+            return False
+        
+        changed = current.changed_sections(snapshot)
+        if not changed:
+            Config.swap(snapshot)
+            self._failed_mtime_ns = None
+            return False
+        
+        handled, failed = set(), set()
+        taken = []
+        for callback, sections in self._subscribers:
+            if not sections & changed:
+                continue
+            handled |= sections
+            try:
+                callback(snapshot)
+            except Exception as e:
+                failed |= sections & changed
+                self.logger.error(f"Config reload of {', '.join(sorted(sections & changed))} "
+                                  f"failed, keeping the previous settings: {e}")
+            else:
+                taken.append(callback)
+        
+        if failed:
+            # All or nothing: hand the old snapshot back to those that took
+            # the new one, and don't retry until the file changes again
+            for callback in taken:
+                try:
+                    callback(current)
+                except Exception as e:
+                    self.logger.error(f"Could not roll back a config subscriber: {e}")
+            self._failed_mtime_ns = mtime_ns
+            return False
+        
+        Config.swap(snapshot)
+        self._failed_mtime_ns = None
+        self.reloads += 1
+        
+        applied = changed & handled
+        self.logger.info(f"✓ Config reloaded (version {snapshot.version}): "
+                         f"{', '.join(sorted(applied)) or 'nothing hot-reloadable'} changed")
+        if changed - handled:
+            self.logger.warning(f"Changes to {', '.join(sorted(changed - handled))} "
+                                "take effect after a restart")
+        return True
@@ -3,9 +3,140 @@ Humanization Layer
 Post-processes responses to make them more natural and human-like
 """
 
-import logging
-import yaml
 import re
+import logging
+import functools
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Tuple
+
+from .config import load_config
+from .tracing import traced
+
+# Used when config.yaml has no `humanizer.passes` section. Each pass is a
+# list of (pattern, replacement) rules; replacements may refer to the
+# rule's own groups (\1, \g<1>).
+DEFAULT_PASSES = [
+    {
+        # Add a comma after an introductory phrase
+        'name': 'pauses',
+        'rules': [
+            (r'^(Well|So|Actually|Basically|Honestly|By the way|As a matter of fact)\s+', r'\1, '),
+        ],
+    },
+    {
+        # Replace formal phrases with casual ones
+        'name': 'casual',
+        'rules': [
+            ('I would like to', "I'd like to"),
+            ('I am', "I'm"),
+            ('You are', "You're"),
+            ('It is', "It's"),
+            ('That is', "That's"),
+            ('Cannot', "Can't"),
+            ('Do not', "Don't"),
+            ('Will not', "Won't"),
+        ],
+    },
+    {
+        # Single spaces, a space after punctuation and none before it
+        'name': 'punctuation',
+        'ignore_case': False,
+        'rules': [
+            (r'\s+(?=[.,!?])', ''),
+            (r'\s{2,}|[^\S ]', ' '),  # a lone space is left alone
+            (r'([.,!?])(?=\w)', r'\1 '),
+        ],
+    },
+]
+
+# Group references in a replacement template (or an escaped backslash)
+_GROUP_REFERENCE = re.compile(r'\\(\\|g<(\d+)>|([1-9][0-9]?))')
+
+
+class RulePass:
+    """
+    One humanization pass compiled into a single regex
+    
+    The rules are joined into one alternation, each wrapped in its own
+    group, so the text is scanned once however many rules there are. The
+    wrapping group that matched (Match.lastindex) indexes a dispatch
+    table of replacements, with the rule's group references renumbered
+    to their place in the combined pattern.
+    
+    Rules are alternatives at each position rather than successive
+    substitutions: the leftmost match wins, earlier rules win ties, and
+    replaced text is not scanned again by the same pass.
+    """
+    
+    def __init__(self, name: str, rules: List[Tuple[str, str]], ignore_case: bool = True):
+        """
+        Compile a pass
+        
+        Args:
+            name: Pass name, for error messages
+            rules: (pattern, replacement) pairs in priority order
+            ignore_case: Match the patterns case-insensitively
+        
+        Raises:
+            ValueError: A pattern does not compile
+        """
+        self.name = name
+        self.rule_count = len(rules)
+        self._dispatch: Dict[int, Tuple[str, bool]] = {}
+        
+        flags = re.IGNORECASE if ignore_case else 0
+        alternatives = []
+        group = 0
+        for pattern, replacement in rules:
+            try:
+                inner_groups = re.compile(pattern, flags).groups
+            except re.error as e:
+                raise ValueError(f"Bad humanizer rule {pattern!r} in pass '{name}': {e}") from e
+            
+            group += 1
+            alternatives.append(f"({pattern})")
+            template = self._renumber(replacement, group)
+            self._dispatch[group] = (template, '\\' in template)
+            group += inner_groups
+        
+        combined = '|'.join(alternatives)
+        first_chars = self._first_chars([pattern for pattern, _ in rules], ignore_case)
+        if first_chars:
+            # re cannot use its literal-prefix scan on a case-insensitive
+            # alternation of groups; a lookahead rules out most positions
+            combined = f"(?=[{re.escape(first_chars)}])(?:{combined})"
+        self.regex = re.compile(combined, flags) if alternatives else None
+    
+    @staticmethod
+    def _first_chars(patterns: List[str], ignore_case: bool) -> str:
+        """Characters every match starts with, or '' if a pattern may start otherwise"""
+        chars = set()
+        for pattern in patterns:
+            if len(pattern) < 2 or not pattern[0].isalnum() or pattern[1] in '*?{' or '|' in pattern:
+                return ''
+            chars.add(pattern[0])
+        if ignore_case:
+            chars |= {c.swapcase() for c in chars}
+        return ''.join(sorted(chars))
+    
+    @staticmethod
+    def _renumber(template: str, offset: int) -> str:
+        """Point a rule's group references at its groups in the combined pattern"""
+        def shift(match):
+            if match.group(1) == '\\':
+                return r'\\'
+            number = int(match.group(2) or match.group(3))
+            return f'\\g<{offset + number}>'
+        return _GROUP_REFERENCE.sub(shift, template)
+    
+    def _replace(self, match) -> str:
+        template, expand = self._dispatch[match.lastindex]
+        return match.expand(template) if expand else template
+    
+    def apply(self, text: str) -> str:
+        if self.regex is None:
+            return text
+        return self.regex.sub(self._replace, text)
 
 
 class Humanizer:
@@ -15,14 +146,67 @@ class Humanizer:
         """Initialize humanizer"""
         self.logger = logging.getLogger(__name__)
         
-        # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # Shared configuration snapshot (parsed once for all components)
+        config = load_config(config_path)
+        
+        self.reload(config)
+        
+        rule_count = sum(p.rule_count for p in self.passes)
+        self.logger.info(f"Humanizer initialized (enabled: {self.enabled}, "
+                         f"{rule_count} rules in {len(self.passes)} passes, memo {self.memo_size})")
+    
+    def reload(self, config):
+        """
+        Compile the rules from a config snapshot
+        
+        The passes and a fresh memo are built first and swapped in as one
+        callable, so a humanize() running meanwhile uses either the old
+        rules or the new ones, and no stale memoized output survives.
         
+        Args:
+            config: Configuration with `system` and `humanizer` sections
+        
+        Raises:
+            ValueError: A rule does not compile (the old rules stay)
+        """
+        humanizer_config = config.get('humanizer', {}) or {}
+        passes = self.compile_passes(humanizer_config.get('passes') or DEFAULT_PASSES)
+        
+        # Responses mostly come from the fixed response set and fun facts,
+        # so the same few texts are humanized over and over
+        memo_size = humanizer_config.get('memo_size', 256)
+        humanize = functools.partial(self._apply, tuple(passes))
+        if memo_size:
+            humanize = functools.lru_cache(maxsize=memo_size)(humanize)
+        
+        self.passes = passes
+        self.memo_size = memo_size
+        self._humanize = humanize
         self.enabled = config['system'].get('enable_humanization', True)
+    
+    @staticmethod
+    def compile_passes(passes: List[dict]) -> List[RulePass]:
+        """
+        Compile pass definitions from config
+        
+        Args:
+            passes: Dicts with a `name`, `rules` (a pattern-to-replacement
+                    mapping or a list of pairs) and optional `ignore_case`
         
-        self.logger.info(f"Humanizer initialized (enabled: {self.enabled})")
+        Returns:
+            Compiled passes, in order
+        """
+        compiled = []
+        for definition in passes:
+            rules = definition.get('rules') or []
+            if isinstance(rules, Mapping):
+                rules = list(rules.items())
+            compiled.append(RulePass(definition.get('name', f"pass {len(compiled) + 1}"),
+                                     [(str(p), str(r)) for p, r in rules],
+                                     definition.get('ignore_case', True)))
+        return compiled
     
+    @traced('humanize')
     def humanize(self, text: str) -> str:
         """
         Make text more natural and human-like
@@ -36,68 +220,24 @@ class Humanizer:
         if not self.enabled or not text:
             return text
         
-        self.logger.debug(f"Humanizing: '{text}'")
-        
-        # Apply humanization techniques
-        humanized = text
-        
-        # 1. Add natural pauses (commas for breathing)
-        humanized = self._add_natural_pauses(humanized)
-        
-        # 2. Remove overly formal language
-        humanized = self._casual_language(humanized)
-        
-        # 3. Fix punctuation
-        humanized = self._fix_punctuation(humanized)
-        
-        self.logger.debug(f"Humanized: '{humanized}'")
+        humanized = self._humanize(text)
+        self.logger.debug(f"Humanized: '{text}' -> '{humanized}'")
         
         return humanized
     
-    def _add_natural_pauses(self, text: str) -> str:
-        """Add natural pauses for better speech flow"""
-        # Add comma after introductory phrases if missing
-        patterns = [
-            (r'^(Well|So|Actually|Basically|Honestly)\s+', r'\1, '),
-            (r'^(By the way|As a matter of fact)\s+', r'\1, '),
-        ]
-        
-        for pattern, replacement in patterns:
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        
-        return text
-    
-    def _casual_language(self, text: str) -> str:
-        """Replace formal phrases with casual ones"""
-        replacements = {
-            'I would like to': "I'd like to",
-            'I am': "I'm",
-            'You are': "You're",
-            'It is': "It's",
-            'That is': "That's",
-            'Cannot': "Can't",
-            'Do not': "Don't",
-            'Will not': "Won't",
-        }
-        
-        for formal, casual in replacements.items():
-            text = re.sub(formal, casual, text, flags=re.IGNORECASE)
-        
-        return text
+    def cache_info(self) -> Optional[tuple]:
+        """Hit/miss statistics of the memo (None when memoization is off)"""
+        cache_info = getattr(self._humanize, 'cache_info', None)
+        return cache_info() if cache_info else None
     
-    def _fix_punctuation(self, text: str) -> str:
-        """Ensure proper punctuation"""
-        # Remove multiple spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Ensure space after punctuation
-        text = re.sub(r'([.,!?])(\w)', r'\1 \2', text)
-        
-        # Remove space before punctuation
-        text = re.sub(r'\s+([.,!?])', r'\1', text)
-        
-        # Ensure sentence ends with punctuation
-        if text and not text[-1] in '.!?':
+    @staticmethod
+    def _apply(passes: Tuple[RulePass, ...], text: str) -> str:
+        """Run every pass, then make sure the text ends a sentence"""
+        for rule_pass in passes:
+            text = rule_pass.apply(text)
+        
+        text = text.strip()
+        if text and text[-1] not in '.!?':
             text += '.'
         
-        return text.strip()
+        return text
@@ -0,0 +1,119 @@
+"""
+Humanizer Micro-Benchmark
+Times the compiled, memoized humanizer against the old per-call re.sub rules
+
+Usage:
+    python -m utils.humanizer_benchmark --rounds 2000
+
+The texts are the static responses from the config plus the fun facts,
+which is what Pluto actually humanizes. Each variant humanizes the whole
+set once per round; the memoized variant is warmed first, as it is after
+the startup pre-render.
+"""
+
+import re
+import sys
+import time
+import argparse
+import statistics
+from typing import Callable, List
+
+from .config import load_config
+from .humanizer import Humanizer
+
+
+def legacy_humanize(text: str) -> str:
+    """The humanizer before rule compilation: one re.sub per rule, every call"""
+    patterns = [
+        (r'^(Well|So|Actually|Basically|Honestly)\s+', r'\1, '),
+        (r'^(By the way|As a matter of fact)\s+', r'\1, '),
+    ]
+    for pattern, replacement in patterns:
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    
+    replacements = {
+        'I would like to': "I'd like to",
+        'I am': "I'm",
+        'You are': "You're",
+        'It is': "It's",
+        'That is': "That's",
+        'Cannot': "Can't",
+        'Do not': "Don't",
+        'Will not': "Won't",
+    }
+    for formal, casual in replacements.items():
+        text = re.sub(formal, casual, text, flags=re.IGNORECASE)
+    
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'([.,!?])(\w)', r'\1 \2', text)
+    text = re.sub(r'\s+([.,!?])', r'\1', text)
+    if text and not text[-1] in '.!?':
+        text += '.'
+    return text.strip()
+
+
+def load_texts(config_path: str, facts_path: str) -> List[str]:
+    """Static responses plus fun facts"""
+    config = load_config(config_path)
+    texts = [text for text in config.get('responses', {}).values() if isinstance(text, str)]
+    
+    try:
+        with open(facts_path, 'r', encoding='utf-8') as f:
+            texts += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    except FileNotFoundError:
+        print(f"Fun facts file not found: {facts_path}", file=sys.stderr)
+    return texts
+
+
+def time_variant(humanize: Callable[[str], str], texts: List[str], rounds: int) -> float:
+    """Median microseconds per text over the rounds"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        for text in texts:
+            humanize(text)
+        samples.append((time.perf_counter_ns() - start) / len(texts) / 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the response humanizer")
+    parser.add_argument('--config', default="config/config.yaml", help="Configuration file")
+    parser.add_argument('--facts', default="data/fun_facts.txt", help="Fun facts file")
+    parser.add_argument('--rounds', type=int, default=2000, help="Passes over the text set")
+    args = parser.parse_args(argv)
+    
+    texts = load_texts(args.config, args.facts)
+    if not texts:
+        print("No texts to humanize", file=sys.stderr)
+        return 1
+    
+    compiled = Humanizer(args.config)
+    compiled.enabled = True
+    compiled._humanize = compiled._humanize.__wrapped__  # memo off: every call runs the passes
+    memoized = Humanizer(args.config)
+    memoized.enabled = True
+    for text in texts:
+        memoized.humanize(text)
+    
+    differences = [text for text in texts if compiled.humanize(text) != legacy_humanize(text)]
+    for text in differences:
+        print(f"Output differs from legacy rules: {text!r}")
+    
+    legacy_us = time_variant(legacy_humanize, texts, args.rounds)
+    compiled_us = time_variant(compiled.humanize, texts, args.rounds)
+    memoized_us = time_variant(memoized.humanize, texts, args.rounds)
+    
+    print(f"{len(texts)} texts, {args.rounds} rounds (median per text)")
+    print(f"{'variant':<10} {'us/text':>9} {'speedup':>8}")
+    for name, micros in (('legacy', legacy_us), ('compiled', compiled_us), ('memoized', memoized_us)):
+        print(f"{name:<10} {micros:>9.2f} {legacy_us / micros:>7.1f}x")
+    
+    info = memoized.cache_info()
+    if info is not None:
+        print(f"memo: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,26 +3,141 @@ Logger Configuration
 Sets up logging for the entire application
 """
 
-import logging
 import os
-import yaml
-from logging.handlers import RotatingFileHandler
+import copy
+import json
+import queue
+import time
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from .config import load_config
+from .tracing import tracer
+
+# Listener writing queued records to the console and file (see setup_logger)
+_listener: Optional[QueueListener] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record, with the turn ID during a turn"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        turn = getattr(record, 'turn', None)
+        if turn is not None:
+            entry['turn'] = turn
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue and never blocks the caller
+    
+    Console and SD-card writes happen on the listener thread, so a slow
+    write no longer stalls the thread that logged. When the queue is full
+    a record is dropped: with the "newest" policy the incoming one, with
+    "oldest" the longest-queued one makes room. Warnings and errors always
+    make room. Drops are counted and reported once the queue has space
+    again.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, drop_policy: str = 'newest'):
+        super().__init__(log_queue)
+        if drop_policy not in ('newest', 'oldest'):
+            raise ValueError(f"Unknown log drop policy '{drop_policy}'")
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._reported = 0
+        self._drop_lock = threading.Lock()
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copy the record with its arguments merged and the turn ID attached
+        
+        QueueHandler.prepare formats the record on the calling thread and
+        drops the exception, leaving the listener's formatters only the
+        text. Here only the message arguments are merged (they may be
+        mutated later); exc_info stays for the file and console
+        formatters to render.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.turn = tracer.turn_id
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.drop_policy == 'newest' and record.levelno < logging.WARNING:
+                self._count_drop()
+                return
+            self._make_room(record)
+            return
+        
+        if self.dropped != self._reported:
+            self._report_drops()
+    
+    def _make_room(self, record: logging.LogRecord):
+        """Drop the oldest queued record to fit this one"""
+        try:
+            self.queue.get_nowait()
+            self._count_drop()
+            self.queue.put_nowait(record)
+        except (queue.Empty, queue.Full):
+            self._count_drop()
+    
+    def _count_drop(self):
+        with self._drop_lock:
+            self.dropped += 1
+    
+    def _report_drops(self):
+        with self._drop_lock:
+            count = self.dropped - self._reported
+            self._reported = self.dropped
+        if count <= 0:
+            return
+        
+        notice = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                   f"Log queue full, dropped {count} records "
+                                   f"({self.dropped} in total)", None, None)
+        try:
+            self.queue.put_nowait(self.prepare(notice))
+        except queue.Full:
+            pass
 
 
 def setup_logger(config_path: str = "config/config.yaml"):
     """
     Configure logging for the application
     
+    Loggers only put records on a bounded in-memory queue; a listener
+    thread formats them and does the console and file I/O.
+    
     Args:
         config_path: Path to configuration file
     """
+    global _listener
+    
     # Load configuration
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(config_path)
     
     system_config = config['system']
     log_level = system_config.get('log_level', 'INFO')
     log_file = system_config.get('log_file', 'logs/pluto.log')
+    queue_config = system_config.get('log_queue', {}) or {}
     
     # Create logs directory if it doesn't exist
     log_dir = os.path.dirname(log_file)
@@ -33,8 +148,9 @@ def setup_logger(config_path: str = "config/config.yaml"):
     logger = logging.getLogger()
     logger.setLevel(getattr(logging, log_level))
     
-    # Clear existing handlers
+    # Clear existing handlers (and flush a listener from an earlier setup)
     logger.handlers.clear()
+    shutdown_logging()
     
     # Console handler (stdout)
     console_handler = logging.StreamHandler()
@@ -44,7 +160,6 @@ def setup_logger(config_path: str = "config/config.yaml"):
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
     
     # File handler (rotating)
     file_handler = RotatingFileHandler(
@@ -53,11 +168,47 @@ def setup_logger(config_path: str = "config/config.yaml"):
         backupCount=5
     )
     file_handler.setLevel(getattr(logging, log_level))
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if system_config.get('log_json', False):
+        file_formatter = JsonLinesFormatter()
+    else:
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
     
-    logger.info(f"Logging configured - Level: {log_level}, File: {log_file}")
+    if not queue_config.get('enabled', True):
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        logger.info(f"Logging configured - Level: {log_level}, File: {log_file}")
+        return
+    
+    # Loggers only enqueue; the listener thread does the writes
+    log_queue = queue.Queue(maxsize=queue_config.get('max_records', 1000))
+    drop_policy = queue_config.get('drop_policy', 'newest')
+    logger.addHandler(DroppingQueueHandler(log_queue, drop_policy))
+    _listener = QueueListener(log_queue, console_handler, file_handler,
+                              respect_handler_level=True)
+    _listener.start()
+    
+    logger.info(f"Logging configured - Level: {log_level}, File: {log_file} "
+                f"(queued, {log_queue.maxsize} records, drop {drop_policy})")
+
+
+def shutdown_logging():
+    """Write out everything still queued and stop the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    
+    # stop() queues a sentinel, which needs a free slot
+    while True:
+        try:
+            _listener.stop()
+            break
+        except queue.Full:
+            time.sleep(0.01)
+    _listener = None
+
+
+atexit.register(shutdown_logging)
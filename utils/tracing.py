@@ -0,0 +1,294 @@
+"""
+Latency Tracing
+Per-turn spans for the pipeline stages, exported in Prometheus text format
+"""
+
+import os
+import time
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import load_config
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Quantiles reported over each stage's rolling window
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class StageStats:
+    """Cumulative histogram plus a rolling window of one stage's durations"""
+    
+    def __init__(self, window: int):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum_ns = 0
+        self.recent: Deque[int] = deque(maxlen=window)
+    
+    def observe(self, duration_ns: int):
+        seconds = duration_ns / 1e9
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum_ns += duration_ns
+        self.recent.append(duration_ns)
+    
+    def quantiles(self) -> List[Tuple[float, float]]:
+        """(quantile, seconds) over the rolling window (nearest rank)"""
+        ordered = sorted(self.recent)
+        if not ordered:
+            return []
+        return [(q, ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1e9)
+                for q in QUANTILES]
+
+
+class Tracer:
+    """
+    Collects stage spans and groups them by turn
+    
+    A turn is one listen_and_respond() cycle. The turn ID lives in a
+    context variable set by begin_turn(), so only code running for the
+    turn is charged to it: a new thread starts outside any turn, and
+    work handed to one (TTS synthesis on its producer thread) is wrapped
+    with bind() to carry the turn along. Spans outside a turn, such as
+    warm-up and pre-rendering, are not recorded even while a turn is in
+    progress on another thread. Durations come from time.monotonic_ns().
+    
+    Each stage keeps a cumulative Prometheus histogram and a rolling
+    window of its latest durations for p50/p90/p99; both are written to
+    the metrics file after every turn.
+    """
+    
+    def __init__(self, enabled: bool = True, metrics_file: Optional[str] = None,
+                 window: int = 200):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.metrics_file = metrics_file
+        self.window = window
+        
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, StageStats] = {}
+        self._turns = 0
+        self._turn_id: contextvars.ContextVar[Optional[int]] = \
+            contextvars.ContextVar('pluto_turn', default=None)
+        self._turn_spans: Dict[int, List[Tuple[str, int]]] = {}
+    
+    @property
+    def turn_id(self) -> Optional[int]:
+        """ID of the turn the calling code runs in, or None outside a turn"""
+        return self._turn_id.get()
+    
+    def begin_turn(self) -> int:
+        """Start a new turn in the current context and return its ID"""
+        with self._lock:
+            self._turns += 1
+            turn_id = self._turns
+            self._turn_spans[turn_id] = []
+        self._turn_id.set(turn_id)
+        return turn_id
+    
+    def end_turn(self):
+        """Close the current turn, log its breakdown and export the metrics"""
+        turn_id = self._turn_id.get()
+        self._turn_id.set(None)
+        if turn_id is None:
+            return
+        with self._lock:
+            spans = self._turn_spans.pop(turn_id, None)
+        
+        if not spans:
+            return
+        
+        totals: Dict[str, int] = {}
+        for name, duration_ns in spans:
+            totals[name] = totals.get(name, 0) + duration_ns
+        self.logger.info(f"Turn {turn_id} latency: " +
+                         ", ".join(f"{name} {ns / 1e6:.1f} ms" for name, ns in totals.items()))
+        
+        if self.metrics_file:
+            try:
+                self.export(self.metrics_file)
+            except OSError as e:
+                self.logger.warning(f"Could not write metrics file: {e}")
+    
+    def record(self, name: str, duration_ns: int, turn_id: Optional[int] = None):
+        """
+        Add a finished span to a turn
+        
+        Args:
+            name: Stage name
+            duration_ns: Span duration
+            turn_id: Turn the span belongs to (default: the current one);
+                     spans of a turn that has already ended are dropped
+        """
+        if turn_id is None:
+            turn_id = self._turn_id.get()
+        with self._lock:
+            spans = self._turn_spans.get(turn_id)
+            if spans is None:
+                return
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = StageStats(self.window)
+            stats.observe(duration_ns)
+            spans.append((name, duration_ns))
+        
+        self.logger.debug(f"Turn {turn_id} span {name}: {duration_ns / 1e6:.2f} ms")
+    
+    @contextmanager
+    def span(self, name: str):
+        """
+        Time a block as a stage
+        
+        A span nested in an open span of the same name on the same thread
+        (e.g. transcribe_intent() calling transcribe_raw()) is not counted
+        twice.
+        """
+        active = getattr(self._local, 'active', None)
+        if active is None:
+            active = self._local.active = set()
+        
+        turn_id = self._turn_id.get()
+        if not self.enabled or turn_id is None or name in active:
+            yield
+            return
+        
+        active.add(name)
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            active.discard(name)
+            self.record(name, time.monotonic_ns() - start, turn_id)
+    
+    def bind(self, func: Callable) -> Callable:
+        """
+        Carry the current turn into another thread
+        
+        Args:
+            func: Callable to run on a producer or executor thread
+        
+        Returns:
+            Wrapper that runs func in the caller's turn (or outside any
+            turn, if called outside one)
+        """
+        turn_id = self._turn_id.get()
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = self._turn_id.set(turn_id)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._turn_id.reset(token)
+        return wrapper
+    
+    @contextmanager
+    def turn(self):
+        """Run a block as one turn, timed as the listen_and_respond stage"""
+        self.begin_turn()
+        try:
+            with self.span('listen_and_respond'):
+                yield
+        finally:
+            self.end_turn()
+    
+    def render(self) -> str:
+        """Metrics in Prometheus text exposition format"""
+        with self._lock:
+            stats = {name: (list(s.buckets), s.count, s.sum_ns, s.quantiles())
+                     for name, s in self._stats.items()}
+            turns = self._turns
+        
+        lines = [
+            "# HELP pluto_turns_total Conversation turns started",
+            "# TYPE pluto_turns_total counter",
+            f"pluto_turns_total {turns}",
+            "# HELP pluto_stage_duration_seconds Pipeline stage latency",
+            "# TYPE pluto_stage_duration_seconds histogram",
+        ]
+        for name, (buckets, count, sum_ns, _) in sorted(stats.items()):
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'pluto_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'pluto_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'pluto_stage_duration_seconds_sum{{stage="{name}"}} {sum_ns / 1e9:.6f}')
+            lines.append(f'pluto_stage_duration_seconds_count{{stage="{name}"}} {count}')
+        
+        lines += [
+            f"# HELP pluto_stage_recent_seconds Stage latency quantiles over the last {self.window} spans",
+            "# TYPE pluto_stage_recent_seconds gauge",
+        ]
+        for name, (_, _, _, quantiles) in sorted(stats.items()):
+            for q, seconds in quantiles:
+                lines.append(f'pluto_stage_recent_seconds{{stage="{name}",quantile="{q}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+    
+    def export(self, path: str):
+        """Write the metrics file atomically (safe for a textfile collector)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# Shared by every component; configured by setup_tracing()
+tracer = Tracer()
+
+
+def span(name: str):
+    """Time a block as a stage of the current turn"""
+    return tracer.span(name)
+
+
+def traced(name: str):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled or tracer.turn_id is None:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def setup_tracing(config_path: str = "config/config.yaml") -> Tracer:
+    """
+    Configure the shared tracer from system.tracing
+    
+    Args:
+        config_path: Path to configuration file
+    
+    Returns:
+        The shared tracer
+    """
+    config = load_config(config_path)
+    
+    tracing_config = config.get('system', {}).get('tracing', {})
+    tracer.enabled = tracing_config.get('enabled', True)
+    tracer.metrics_file = tracing_config.get('metrics_file')
+    window = tracing_config.get('window', 200)
+    with tracer._lock:
+        tracer.window = window
+        for stats in tracer._stats.values():
+            stats.recent = deque(stats.recent, maxlen=window)
+    
+    if tracer.enabled:
+        logging.getLogger(__name__).info(
+            f"Latency tracing enabled (metrics: {tracer.metrics_file or 'not exported'})")
+    return tracer